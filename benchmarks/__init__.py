@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+"""
+Micro-benchmarks of the per-request hot paths. Run ``python -m benchmarks -h``.
+
+Benchmarks are defined in ``bench_*.py`` modules with :func:``runner.benchmark``.
+They run without network access.
+"""
+
+
+import importlib
+import pkgutil
+
+
+def load_benchmarks() -> None:
+    """ Import the ``bench_*`` modules to register their benchmarks.
+    """
+    for module in pkgutil.iter_modules(__path__):
+        if module.name.startswith('bench_'):
+            importlib.import_module('{0}.{1}'.format(__name__, module.name))
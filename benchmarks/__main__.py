@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+
+
+import argparse
+import json
+import sys
+
+from . import load_benchmarks
+from .runner import compare, format_time, get_benchmarks, run, to_baseline
+
+
+DEFAULT_BASELINE = 'benchmarks/baseline.json'
+
+
+def create_parser():
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks', description='Micro-benchmarks of the per-request hot paths of rekcurd.')
+    parser.add_argument('--filter', '-k', help='Run the benchmarks whose name matches this regular expression.')
+    parser.add_argument('--repeat', type=int, default=5, help='Rounds per benchmark. The fastest is taken. Default "5"')
+    parser.add_argument('--min-time', type=float, default=0.2, help='Min seconds per round. Default "0.2"')
+    parser.add_argument('--compare', nargs='?', const=DEFAULT_BASELINE, metavar='BASELINE',
+                        help='Fail if slower than the baseline by "--threshold". Default "{}"'.format(DEFAULT_BASELINE))
+    parser.add_argument('--threshold', type=float, default=1.5,
+                        help='Max ratio of the normalized time to the baseline. Default "1.5"')
+    parser.add_argument('--save', nargs='?', const=DEFAULT_BASELINE, metavar='BASELINE',
+                        help='Save the results as the baseline. Default "{}"'.format(DEFAULT_BASELINE))
+    parser.add_argument('--quick', action='store_true', help='Run every operation once without timing.')
+    return parser
+
+
+def main(argv=None) -> int:
+    args = create_parser().parse_args(argv)
+    load_benchmarks()
+    benchmarks = get_benchmarks(args.filter)
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+
+    def report(result):
+        print('{0:<48} {1:>10} {2:>8.3g}'.format(result.name, format_time(result.sec), result.normalized))
+        sys.stdout.flush()
+    print('{0:<48} {1:>10} {2:>8}'.format('benchmark', 'time/op', 'norm'))
+    results = run(benchmarks, args.repeat, args.min_time, args.quick, report)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(to_baseline(results), f, indent=2, sort_keys=True)
+            f.write('\n')
+        print('Saved the baseline to {}'.format(args.save))
+    if baseline is None or args.quick:
+        return 0
+    regressions = 0
+    print('\n{0:<48} {1:>10}'.format('compared to ' + args.compare, 'ratio'))
+    for result, ratio, regressed in compare(results, baseline, args.threshold):
+        if ratio is None:
+            print('{0:<48} {1:>10}'.format(result.name, 'new'))
+            continue
+        print('{0:<48} {1:>9.2f}x{2}'.format(result.name, ratio, '  REGRESSION' if regressed else ''))
+        regressions += regressed
+    if regressions:
+        print('{0} benchmarks are slower than {1:g}x of the baseline.'.format(regressions, args.threshold))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
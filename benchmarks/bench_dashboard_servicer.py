@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+
+
+from pathlib import Path
+
+from rekcurd import RekcurdPack, RekcurdDashboardServicer
+from rekcurd.protobuf import rekcurd_pb2
+from .bench_data_server import NUM_DETAILS, generate_details
+from .fixtures import get_app
+from .runner import benchmark
+
+
+@benchmark('dashboard.EvaluationResult.{}'.format(NUM_DETAILS))
+def evaluation_result():
+    """ Read saved evaluation details and split them into response chunks.
+    """
+    app = get_app()
+    data_path = Path(app.data_server._api_handler.LOCAL_EVAL_DIR, 'data.txt')
+    data_path.parent.mkdir(parents=True, exist_ok=True)
+    data_path.touch()
+    app.data_server.upload_evaluation_result(generate_details(), 'bench/details.pkl')
+    servicer = RekcurdDashboardServicer(RekcurdPack(app, 'predictor'))
+    request = rekcurd_pb2.EvaluationResultRequest(data_path='bench/data.txt', result_path='bench/details.pkl')
+
+    def operation():
+        if sum(len(response.detail) for response in servicer.EvaluationResult(request, None)) != NUM_DETAILS:
+            raise Exception("Error: Details are lost.")
+    return operation
@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+
+
+from rekcurd.protobuf import rekcurd_pb2
+from rekcurd.utils import EvaluateResult, EvaluateResultDetail, PredictResult
+from .fixtures import get_app
+from .runner import benchmark
+
+
+MODEL_SIZE = 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+NUM_DETAILS = 1000
+
+
+def generate_details(num: int = NUM_DETAILS):
+    detail = EvaluateResultDetail(PredictResult('label', 0.9), True)
+    for _ in range(num):
+        yield detail
+    return EvaluateResult(num, 1.0, [1.0], [1.0], [1.0], ['label'])
+
+
+@benchmark('data_server.upload_model.1MiB')
+def upload_model():
+    """ Write a ML model sent in 64KiB chunks. The local handler uploads nothing.
+    """
+    data_server = get_app().data_server
+    requests = [rekcurd_pb2.UploadModelRequest(path='bench/upload.model', data=b'\0' * CHUNK_SIZE)
+                for _ in range(MODEL_SIZE // CHUNK_SIZE)]
+    return lambda: data_server.upload_model(iter(requests))
+
+
+@benchmark('data_server.upload_evaluation_result.{}'.format(NUM_DETAILS))
+def upload_evaluation_result():
+    data_server = get_app().data_server
+    return lambda: data_server.upload_evaluation_result(generate_details(), 'bench/result.pkl')
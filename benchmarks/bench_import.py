@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+
+
+import subprocess
+import sys
+
+from pathlib import Path
+
+from .runner import benchmark
+
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+
+def _register(module: str) -> None:
+    @benchmark('import.{}'.format(module), measured=True)
+    def import_module():
+        """ Import time in a fresh interpreter, excluding the startup of the interpreter.
+        """
+        code = 'import time; start = time.perf_counter(); import {}; print(time.perf_counter() - start)'.format(module)
+
+        def operation() -> float:
+            output = subprocess.run([sys.executable, '-c', code], cwd=str(ROOT_DIR), check=True,
+                                    stdout=subprocess.PIPE, stderr=subprocess.DEVNULL).stdout
+            return float(output.decode().split()[-1])
+        return operation
+
+
+for _module in ['rekcurd', 'rekcurd.core', 'rekcurd.console_scripts']:
+    _register(_module)
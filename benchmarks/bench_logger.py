@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+
+
+import socketserver
+import threading
+
+from fluent import sender
+
+from rekcurd.logger import FluentServiceLogger, JsonServiceLogger, ServiceLoggerInterface
+from rekcurd.protobuf import rekcurd_pb2
+from .fixtures import TYPES, discard_output, get_app, make_request
+from .runner import benchmark
+
+
+def make_response():
+    response = rekcurd_pb2.StringOutput(output='label', score=0.9)
+    response.option.val = '{}'
+    return response
+
+
+class _DiscardHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        while self.request.recv(65536):
+            pass
+
+
+def start_fluent_sink() -> int:
+    """ Local TCP server taking the place of fluentd. Return the port.
+    """
+    server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), _DiscardHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server.server_address[1]
+
+
+@benchmark('logger.JsonServiceLogger.emit')
+def json_emit():
+    logger = JsonServiceLogger('rekcurd.bench.json', config=get_app().config)
+    discard_output(logger.log)
+    request, response = make_request('String'), make_response()
+    return lambda: logger.emit(request, response)
+
+
+@benchmark('logger.FluentServiceLogger.emit')
+def fluent_emit():
+    logger = FluentServiceLogger('rekcurd.bench.fluent', config=get_app().config)
+    logger.logger = sender.FluentSender('rekcurd.bench.fluent', host='127.0.0.1', port=start_fluent_sink())
+    request, response = make_request('String'), make_response()
+    return lambda: logger.emit(request, response)
+
+
+def _register(input_type: str) -> None:
+    @benchmark('logger.to_str_from_request.{}'.format(input_type))
+    def to_str_from_request():
+        logger = get_app().service_logger
+        request = make_request(input_type)
+        return lambda: ServiceLoggerInterface.to_str_from_request(logger, request)
+
+
+for _input_type in TYPES:
+    _register(_input_type)
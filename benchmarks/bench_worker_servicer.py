@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+
+
+import functools
+import itertools
+
+from rekcurd import RekcurdPack, RekcurdWorkerServicer
+from .fixtures import TYPES, get_app, make_request
+from .runner import benchmark
+
+
+@functools.lru_cache(maxsize=None)
+def get_servicer() -> RekcurdWorkerServicer:
+    return RekcurdWorkerServicer(RekcurdPack(get_app(), 'predictor'))
+
+
+def _register(input_type: str, output_type: str) -> None:
+    @benchmark('worker.Process.{0}_{1}'.format(input_type, output_type))
+    def process():
+        """ "Predict_*" without gRPC: parse, predict by a trivial predictor, set the response and write the service log.
+        """
+        servicer = get_servicer()
+        rpc = servicer.rpcs['Predict_{0}_{1}'.format(input_type, output_type)]
+        request = make_request(input_type)
+        return lambda: servicer.Process(request, None, rpc.response_class(), rpc.type_input, rpc.type_output)
+
+
+for _input_type, _output_type in itertools.product(TYPES, TYPES):
+    _register(_input_type, _output_type)
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+
+
+import atexit
+import functools
+import logging
+import os
+import shutil
+import tempfile
+
+from pathlib import Path
+from typing import Generator
+
+from rekcurd import Rekcurd
+from rekcurd.logger import JsonSystemLogger, JsonServiceLogger
+from rekcurd.data_servers import DataServer
+from rekcurd.protobuf import rekcurd_pb2
+from rekcurd.utils import RekcurdConfig, PredictInput, PredictResult, EvaluateResult, EvaluateDetail, EvaluateResultDetail
+
+
+TYPES = ['String', 'Bytes', 'ArrInt', 'ArrFloat', 'ArrString']
+ARRAY_SIZE = 16
+
+INPUTS = {
+    'String': 'rekcurd benchmark input',
+    'Bytes': b'rekcurd benchmark input',
+    'ArrInt': list(range(ARRAY_SIZE)),
+    'ArrFloat': [i / ARRAY_SIZE for i in range(ARRAY_SIZE)],
+    'ArrString': ['token{}'.format(i) for i in range(ARRAY_SIZE)],
+}
+RESULTS = {
+    'String': PredictResult('label', 0.9),
+    'Bytes': PredictResult(b'label', 0.9),
+    'ArrInt': PredictResult(list(range(ARRAY_SIZE)), [0.9] * ARRAY_SIZE),
+    'ArrFloat': PredictResult([0.5] * ARRAY_SIZE, [0.9] * ARRAY_SIZE),
+    'ArrString': PredictResult(['label'] * ARRAY_SIZE, [0.9] * ARRAY_SIZE),
+}
+
+
+class BenchApp(Rekcurd):
+    """ Trivial application returning a fixed result of the output type.
+    """
+
+    def load_model(self, filepath: str) -> object:
+        return 'predictor'
+
+    def predict(self, predictor: object, idata: PredictInput, option: dict = None) -> PredictResult:
+        return RESULTS[self.get_type_output().name]
+
+    def evaluate(self, predictor: object, filepath: str) -> Generator[EvaluateResultDetail, None, EvaluateResult]:
+        raise NotImplementedError()
+
+    def get_evaluate_detail(self, filepath: str, details: Generator[EvaluateResultDetail, None, None]
+                            ) -> Generator[EvaluateDetail, None, None]:
+        for detail in details:
+            yield EvaluateDetail(input=INPUTS['String'], label='label', result=detail)
+
+
+@functools.lru_cache(maxsize=None)
+def get_workdir() -> Path:
+    """ Temporary directory removed on exit.
+    """
+    workdir = Path(tempfile.mkdtemp(prefix='rekcurd-bench-'))
+    atexit.register(shutil.rmtree, str(workdir), True)
+    return workdir
+
+
+def discard_output(logger: logging.Logger) -> None:
+    """ Format the logs as usual but write them to the null device.
+    """
+    for handler in logger.handlers:
+        if isinstance(handler, logging.StreamHandler):
+            handler.setStream(open(os.devnull, 'w'))
+
+
+@functools.lru_cache(maxsize=None)
+def get_app() -> BenchApp:
+    workdir = get_workdir()
+    model_path = workdir / 'model' / 'default.model'
+    model_path.parent.mkdir(parents=True, exist_ok=True)
+    model_path.touch()
+    app = BenchApp()
+    app.config = RekcurdConfig()
+    app.config.set_configurations(
+        debug_mode=False, application_name='bench', service_level='development',
+        model_mode='local', model_filepath=str(model_path))
+    app.data_server = DataServer(app.config)
+    app.data_server._api_handler.LOCAL_EVAL_DIR = str(workdir / 'eval')
+    app.system_logger = JsonSystemLogger('rekcurd.bench.system', config=app.config)
+    app.service_logger = JsonServiceLogger('rekcurd.bench.service', config=app.config)
+    discard_output(app.system_logger.log)
+    discard_output(app.service_logger.log)
+    return app
+
+
+def make_request(input_type: str):
+    request = getattr(rekcurd_pb2, input_type + 'Input')(input=INPUTS[input_type])
+    request.option.val = '{}'
+    return request
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+
+
+import gc
+import json
+import platform
+import re
+import time
+
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+
+class Benchmark(NamedTuple):
+    """ Registered benchmark.
+
+    ``setup`` returns the operation to time, called without arguments. If
+    ``measured``, ``setup`` returns a function which measures one operation
+    by itself and returns the seconds (e.g. a subprocess).
+    """
+    name: str
+    setup: Callable[[], Callable]
+    measured: bool
+
+
+class Result(NamedTuple):
+    name: str
+    sec: float
+    normalized: float
+
+
+_benchmarks: Dict[str, Benchmark] = dict()
+
+
+def benchmark(name: str, measured: bool = False):
+    """ Register a setup function as a benchmark.
+
+    :param name: Unique name. e.g. "worker.Process.String_String"
+    :param measured: The operation returns the seconds it measured.
+    """
+    def register(setup: Callable[[], Callable]) -> Callable[[], Callable]:
+        if name in _benchmarks:
+            raise ValueError("Duplicated benchmark: {}".format(name))
+        _benchmarks[name] = Benchmark(name, setup, measured)
+        return setup
+    return register
+
+
+def get_benchmarks(pattern: str = None) -> List[Benchmark]:
+    regex = re.compile(pattern) if pattern else None
+    return [b for name, b in sorted(_benchmarks.items()) if regex is None or regex.search(name)]
+
+
+def reference_workload() -> None:
+    """ Fixed pure Python work timed with every run. Results are divided by it
+    so that baselines taken on other hardware stay comparable.
+    """
+    data = {'input': list(range(64)), 'option': {'key': 'value'}, 'score': [0.5] * 16}
+    for _ in range(10):
+        json.loads(json.dumps(data))
+        sorted(str(v) for v in data['input'])
+
+
+def time_operation(operation: Callable, measured: bool = False, repeat: int = 5, min_time: float = 0.2) -> float:
+    """ Seconds per operation. The fastest of ``repeat`` rounds, each at least ``min_time`` long.
+    """
+    if measured:
+        return min(operation() for _ in range(repeat))
+    operation()
+    loops = 1
+    while True:
+        elapsed = _time_loops(operation, loops)
+        if elapsed >= min_time:
+            break
+        loops = max(loops * 2, int(loops * min_time / max(elapsed, 1e-9) * 1.1))
+    best = elapsed / loops
+    for _ in range(repeat - 1):
+        best = min(best, _time_loops(operation, loops) / loops)
+    return best
+
+
+def _time_loops(operation: Callable, loops: int) -> float:
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        for _ in range(loops):
+            operation()
+        return time.perf_counter() - start
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def run(benchmarks: List[Benchmark], repeat: int = 5, min_time: float = 0.2,
+        quick: bool = False, callback: Callable[[Result], None] = None) -> List[Result]:
+    """ Run the benchmarks.
+
+    :param quick: Call every operation once without timing. For smoke tests.
+    :param callback: Called with every result.
+    """
+    reference = 1.0 if quick else time_operation(reference_workload, repeat=repeat, min_time=min_time)
+    results = list()
+    for b in benchmarks:
+        operation = b.setup()
+        if quick:
+            operation()
+            sec = 0.0
+        else:
+            sec = time_operation(operation, b.measured, repeat, min_time)
+        result = Result(b.name, sec, sec / reference)
+        results.append(result)
+        if callback is not None:
+            callback(result)
+    return results
+
+
+def to_baseline(results: List[Result]) -> dict:
+    return {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'benchmarks': {r.name: {'sec': r.sec, 'normalized': r.normalized} for r in results},
+    }
+
+
+def compare(results: List[Result], baseline: dict, threshold: float) -> List[tuple]:
+    """ Compare the normalized times with the baseline.
+
+    :return: (result, ratio to the baseline or None if new, regressed) per result.
+    """
+    rows = list()
+    for r in results:
+        base = baseline.get('benchmarks', {}).get(r.name)
+        ratio: Optional[float] = r.normalized / base['normalized'] if base and base['normalized'] > 0 else None
+        rows.append((r, ratio, ratio is not None and ratio > threshold))
+    return rows
+
+
+def format_time(sec: float) -> str:
+    for unit, scale in (('s', 1.0), ('ms', 1e-3), ('us', 1e-6)):
+        if sec >= scale:
+            return '{0:.2f}{1}'.format(sec / scale, unit)
+    return '{:.0f}ns'.format(sec / 1e-9)
@@ -18,7 +18,11 @@ from rekcurd import _version
 __project__ = _project.__project__
 __version__ = _version.__version__
 
-from rekcurd.core import (
-    Rekcurd, RekcurdPack, RekcurdInput, RekcurdOutput,
-    RekcurdWorkerServicer, RekcurdDashboardServicer
-)
+from rekcurd._lazy import lazy_import
+
+# Imported on first access, so that "rekcurd startapp" and "rekcurd bench" don't load grpc and the storage SDKs.
+__all__ = [
+    'Rekcurd', 'RekcurdPack', 'RekcurdInput', 'RekcurdOutput',
+    'RekcurdWorkerServicer', 'RekcurdDashboardServicer', 'RekcurdAsyncWorkerServicer', 'RekcurdHealthServicer'
+]
+__getattr__, __dir__ = lazy_import(__name__, {name: 'rekcurd.core' for name in __all__})
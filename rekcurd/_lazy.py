@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+
+
+import importlib
+import sys
+
+from typing import Callable, Dict, Tuple
+
+
+def lazy_import(package: str, attributes: Dict[str, str]) -> Tuple[Callable, Callable]:
+    """ Module ``__getattr__`` and ``__dir__`` (PEP 562) importing the attributes of a package on first access.
+
+    Usage in "__init__.py": ``__getattr__, __dir__ = lazy_import(__name__, {"Name": ".module"})``
+
+    :param package: Name of the package.
+    :param attributes: Attribute name and the (relative) module defining it.
+    """
+    def __getattr__(name: str):
+        if name not in attributes:
+            raise AttributeError("module {0!r} has no attribute {1!r}".format(package, name))
+        value = getattr(importlib.import_module(attributes[name], package), name)
+        setattr(sys.modules[package], name, value)
+        return value
+
+    def __dir__():
+        return sorted(set(vars(sys.modules[package])) | set(attributes))
+    return __getattr__, __dir__
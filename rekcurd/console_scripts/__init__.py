@@ -22,9 +22,61 @@ def create_parser():
         '--dir', required=False, help='Optional destination directory', default='./')
     parser_startapp.set_defaults(handler=startapp_handler)
 
+    # bench
+    parser_bench = subparsers.add_parser(
+        'bench', help='see `rekcurd bench -h`',
+        description='Drive a running rekcurd worker and report the throughput and the latency. '
+                    'Closed loop with "--concurrency" clients, or open loop at "--rps" requests per second.')
+    parser_bench.add_argument(
+        '--target', required=False, help='Worker address. Default "127.0.0.1:5000"', default='127.0.0.1:5000')
+    parser_bench.add_argument(
+        '--method', required=False,
+        help='"Predict_{Input}_{Output}" RPC. Types are String, Bytes, ArrInt, ArrFloat and ArrString. '
+             'Default "Predict_String_String"', default='Predict_String_String', metavar='METHOD')
+    parser_bench.add_argument(
+        '--duration', type=float, required=False, help='Seconds to measure. Default "10"', default=10.0)
+    parser_bench.add_argument(
+        '--warmup', type=float, required=False, help='Seconds to send before measuring. Default "0"', default=0.0)
+    parser_bench.add_argument(
+        '--concurrency', type=int, required=False,
+        help='Number of clients in closed loop (default "1"), or max in-flight requests in open loop (default "64")')
+    parser_bench.add_argument(
+        '--rps', type=float, required=False, help='Target requests per second. Runs in open loop if given.')
+    parser_bench.add_argument(
+        '--channels', type=int, required=False,
+        help='Number of gRPC channels (connections) used in turn. Default "1"', default=1)
+    parser_bench.add_argument(
+        '--timeout', type=float, required=False, help='Deadline of every request in seconds. Default "10"',
+        default=10.0)
+    parser_bench.add_argument(
+        '--payload-file', required=False,
+        help='JSON lines file of inputs, e.g. "[1, 2]" or {"input": "text", "option": {}}. Sent in turn.')
+    parser_bench.add_argument(
+        '--size', type=int, required=False,
+        help='Length of synthetic inputs (characters, bytes or elements). Default "16"', default=16)
+    parser_bench.add_argument(
+        '--payloads', type=int, required=False, help='Number of distinct synthetic inputs. Default "100"',
+        default=100)
+    parser_bench.add_argument(
+        '--seed', type=int, required=False, help='Random seed of synthetic inputs. Default "0"', default=0)
+    parser_bench.add_argument(
+        '--option', required=False, help='JSON option of every request. Default "{}"', default='{}')
+    parser_bench.add_argument(
+        '--metadata', required=False, action='append', metavar='KEY=VALUE',
+        help='gRPC metadata of every request, e.g. "x-rekcurd-model-path=model/b.model". Repeatable.')
+    parser_bench.add_argument(
+        '--format', required=False, help='Report format. Default "text"', default='text', choices=['text', 'json'])
+    parser_bench.set_defaults(handler=_bench_handler)
+
     return parser
 
 
+def _bench_handler(args):
+    # Import grpc only when it is needed.
+    from .bench_handler import bench_handler
+    return bench_handler(args)
+
+
 def main() -> None:
     parser = create_parser()
     args = parser.parse_args()
@@ -0,0 +1,324 @@
+# -*- coding: utf-8 -*-
+
+
+import grpc
+import json
+import math
+import random
+import string
+import threading
+import time
+
+from collections import Counter
+from concurrent import futures
+from google.protobuf import descriptor_pb2
+from typing import Callable, Dict, List, NamedTuple
+
+from rekcurd.protobuf import rekcurd_pb2
+from .errors import CommandError
+
+
+SERVICE_NAME = 'rekcurd.RekcurdWorker'
+PERCENTILES = [('p50', 50.0), ('p90', 90.0), ('p99', 99.0), ('p999', 99.9)]
+
+
+class BenchMethod(NamedTuple):
+    """ "Predict_*" RPC driven by the benchmark.
+    """
+    name: str
+    input_type: str
+    request_class: type
+    response_class: type
+    client_streaming: bool
+    server_streaming: bool
+
+
+def get_methods() -> Dict[str, BenchMethod]:
+    methods = dict()
+    for method_descriptor in rekcurd_pb2.DESCRIPTOR.services_by_name['RekcurdWorker'].methods:
+        method_proto = descriptor_pb2.MethodDescriptorProto()
+        method_descriptor.CopyToProto(method_proto)
+        methods[method_descriptor.name] = BenchMethod(
+            name=method_descriptor.name,
+            input_type=method_descriptor.input_type.name[:-len('Input')],
+            request_class=getattr(rekcurd_pb2, method_descriptor.input_type.name),
+            response_class=getattr(rekcurd_pb2, method_descriptor.output_type.name),
+            client_streaming=method_proto.client_streaming,
+            server_streaming=method_proto.server_streaming)
+    return methods
+
+
+def make_synthetic_input(input_type: str, size: int, rng: random.Random):
+    """ Random input of ``size`` characters, bytes or elements.
+    """
+    if input_type == 'String':
+        return ''.join(rng.choice(string.ascii_letters) for _ in range(size))
+    if input_type == 'Bytes':
+        return bytes(rng.getrandbits(8) for _ in range(size))
+    if input_type == 'ArrInt':
+        return [rng.randint(0, 1000) for _ in range(size)]
+    if input_type == 'ArrFloat':
+        return [rng.random() for _ in range(size)]
+    return [''.join(rng.choice(string.ascii_letters) for _ in range(8)) for _ in range(size)]
+
+
+def load_inputs(filepath: str, input_type: str) -> List[tuple]:
+    """ Read (input, option) pairs from a JSON lines file.
+
+    Each line is an input (e.g. ``"text"`` or ``[1, 2, 3]``), or an object
+    ``{"input": ..., "option": {...}}``. Strings are encoded in UTF-8 for
+    Bytes inputs.
+    """
+    inputs = list()
+    with open(filepath, 'r', encoding='utf-8') as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                value = json.loads(line)
+            except ValueError:
+                raise CommandError("{0}:{1}: Invalid JSON.".format(filepath, number))
+            option = None
+            if isinstance(value, dict):
+                option = value.get('option')
+                value = value.get('input')
+            if input_type in ('String', 'Bytes'):
+                if not isinstance(value, str):
+                    raise CommandError("{0}:{1}: {2} input must be a string.".format(filepath, number, input_type))
+                if input_type == 'Bytes':
+                    value = value.encode('utf-8')
+            elif not isinstance(value, list):
+                raise CommandError("{0}:{1}: {2} input must be a list.".format(filepath, number, input_type))
+            inputs.append((value, option))
+    if not inputs:
+        raise CommandError("No input in {}".format(filepath))
+    return inputs
+
+
+def make_requests(method: BenchMethod, args) -> list:
+    if args.payload_file:
+        inputs = load_inputs(args.payload_file, method.input_type)
+    else:
+        rng = random.Random(args.seed)
+        inputs = [(make_synthetic_input(method.input_type, args.size, rng), None) for _ in range(args.payloads)]
+    requests = list()
+    for value, option in inputs:
+        option = args.option if option is None else json.dumps(option)
+        requests.append(method.request_class(input=value, option=rekcurd_pb2.Option(val=option)))
+    return requests
+
+
+def make_call(channel: grpc.Channel, method: BenchMethod) -> Callable:
+    """ Function sending a request by ``method`` and reading all the responses.
+    """
+    path = '/{0}/{1}'.format(SERVICE_NAME, method.name)
+    serializer = method.request_class.SerializeToString
+    deserializer = method.response_class.FromString
+    if method.client_streaming and method.server_streaming:
+        stub = channel.stream_stream(path, serializer, deserializer)
+        return lambda request, **kwargs: list(stub(iter([request]), **kwargs))
+    if method.client_streaming:
+        stub = channel.stream_unary(path, serializer, deserializer)
+        return lambda request, **kwargs: stub(iter([request]), **kwargs)
+    if method.server_streaming:
+        stub = channel.unary_stream(path, serializer, deserializer)
+        return lambda request, **kwargs: list(stub(request, **kwargs))
+    return channel.unary_unary(path, serializer, deserializer)
+
+
+def invoke(call: Callable, request, timeout: float, metadata: list) -> str:
+    """ Send a request and return the name of the status code.
+    """
+    try:
+        call(request, timeout=timeout, metadata=metadata)
+        return 'OK'
+    except grpc.RpcError as e:
+        return e.code().name
+    except Exception:
+        return 'CLIENT_ERROR'
+
+
+class BenchRecorder:
+    """ Latencies of the succeeded requests and counts of the status codes
+    """
+
+    def __init__(self):
+        self.latencies = list()
+        self.codes = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, latency: float, code: str) -> None:
+        with self._lock:
+            self.codes[code] += 1
+            if code == 'OK':
+                self.latencies.append(latency)
+
+
+def run_closed_loop(calls: List[Callable], requests: list, concurrency: int, duration: float,
+                    warmup: float = 0.0, timeout: float = None, metadata: list = None) -> tuple:
+    """ ``concurrency`` clients send the next request as soon as the last one is answered.
+
+    :return: Recorder and the measured seconds.
+    """
+    recorder = BenchRecorder()
+    record_from = time.monotonic() + warmup
+    end = record_from + duration
+
+    def client(index: int):
+        call = calls[index % len(calls)]
+        count = index
+        while True:
+            start = time.monotonic()
+            if start >= end:
+                return
+            code = invoke(call, requests[count % len(requests)], timeout, metadata)
+            count += concurrency
+            if start >= record_from:
+                recorder.record(time.monotonic() - start, code)
+
+    threads = [threading.Thread(target=client, args=(i,), daemon=True) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return recorder, time.monotonic() - record_from
+
+
+def run_open_loop(calls: List[Callable], requests: list, rps: float, concurrency: int, duration: float,
+                  warmup: float = 0.0, timeout: float = None, metadata: list = None) -> tuple:
+    """ Send ``rps`` requests per second on schedule, whether or not the former ones are answered.
+
+    Latency is measured from the scheduled time, so that the time waiting
+    for one of the ``concurrency`` threads is included when the server
+    falls behind.
+
+    :return: Recorder and the measured seconds.
+    """
+    recorder = BenchRecorder()
+    interval = 1.0 / rps
+    start = time.monotonic()
+    record_from = start + warmup
+    end = record_from + duration
+
+    def send(index: int, scheduled: float):
+        code = invoke(calls[index % len(calls)], requests[index % len(requests)], timeout, metadata)
+        if scheduled >= record_from:
+            recorder.record(time.monotonic() - scheduled, code)
+
+    with futures.ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='rekcurd-bench') as executor:
+        index = 0
+        while True:
+            scheduled = start + index * interval
+            if scheduled >= end:
+                break
+            delay = scheduled - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            executor.submit(send, index, scheduled)
+            index += 1
+    return recorder, time.monotonic() - record_from
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """ Nearest-rank percentile.
+    """
+    if not sorted_values:
+        return 0.0
+    # Round off the error of floats, e.g. 99.9 / 100 * 1000 = 999.0000000000001
+    rank = max(int(math.ceil(round(p / 100.0 * len(sorted_values), 9))), 1)
+    return sorted_values[rank - 1]
+
+
+def summarize(recorder: BenchRecorder, elapsed: float, **info) -> dict:
+    latencies = sorted(recorder.latencies)
+    requests = sum(recorder.codes.values())
+    latency_ms = {'min': latencies[0] * 1000 if latencies else 0.0,
+                  'mean': sum(latencies) / len(latencies) * 1000 if latencies else 0.0}
+    for name, p in PERCENTILES:
+        latency_ms[name] = percentile(latencies, p) * 1000
+    latency_ms['max'] = latencies[-1] * 1000 if latencies else 0.0
+    summary = dict(info)
+    summary.update({
+        'duration_sec': elapsed,
+        'requests': requests,
+        'succeeded': len(latencies),
+        'errors': {code: count for code, count in recorder.codes.items() if code != 'OK'},
+        'throughput_rps': len(latencies) / elapsed if elapsed > 0 else 0.0,
+        'latency_ms': latency_ms,
+    })
+    return summary
+
+
+def format_text(summary: dict) -> str:
+    if summary['mode'] == 'open':
+        mode = "open loop, {0:g} req/s, max concurrency {1}".format(summary['rps'], summary['concurrency'])
+    else:
+        mode = "closed loop, concurrency {}".format(summary['concurrency'])
+    lines = [
+        "Target:      {0} {1}".format(summary['target'], summary['method']),
+        "Mode:        {}".format(mode),
+        "Duration:    {:.2f} s".format(summary['duration_sec']),
+        "Requests:    {0} ({1} succeeded)".format(summary['requests'], summary['succeeded']),
+    ]
+    for code, count in sorted(summary['errors'].items()):
+        lines.append("Errors:      {0} {1}".format(code, count))
+    lines.append("Throughput:  {:.1f} req/s".format(summary['throughput_rps']))
+    lines.append("Latency:     " + "  ".join(
+        "{0} {1:.2f}ms".format(name, value) for name, value in summary['latency_ms'].items()))
+    return '\n'.join(lines)
+
+
+def parse_metadata(items: List[str]) -> list:
+    metadata = list()
+    for item in items or []:
+        key, sep, value = item.partition('=')
+        if not sep:
+            raise CommandError("Invalid metadata: {}. Use \"key=value\".".format(item))
+        metadata.append((key.strip().lower(), value.strip()))
+    return metadata
+
+
+def bench_handler(args):
+    methods = get_methods()
+    if args.method not in methods:
+        raise CommandError("Unknown method: {}".format(args.method))
+    method = methods[args.method]
+    if args.duration <= 0:
+        raise CommandError("--duration must be positive.")
+    if args.rps is not None and args.rps <= 0:
+        raise CommandError("--rps must be positive.")
+    try:
+        json.loads(args.option)
+    except ValueError:
+        raise CommandError("--option must be JSON.")
+    metadata = parse_metadata(args.metadata)
+    requests = make_requests(method, args)
+
+    channels = [grpc.insecure_channel(args.target) for _ in range(max(args.channels, 1))]
+    try:
+        for channel in channels:
+            try:
+                grpc.channel_ready_future(channel).result(timeout=args.timeout)
+            except grpc.FutureTimeoutError:
+                raise CommandError("Cannot connect to {}".format(args.target))
+        calls = [make_call(channel, method) for channel in channels]
+        if args.rps is not None:
+            concurrency = args.concurrency or 64
+            recorder, elapsed = run_open_loop(calls, requests, args.rps, concurrency, args.duration,
+                                              args.warmup, args.timeout, metadata)
+        else:
+            concurrency = args.concurrency or 1
+            recorder, elapsed = run_closed_loop(calls, requests, concurrency, args.duration,
+                                                args.warmup, args.timeout, metadata)
+    finally:
+        for channel in channels:
+            channel.close()
+
+    summary = summarize(recorder, elapsed, target=args.target, method=method.name,
+                        mode='open' if args.rps is not None else 'closed',
+                        rps=args.rps, concurrency=concurrency, payloads=len(requests))
+    if args.format == 'json':
+        print(json.dumps(summary, indent=2))
+    else:
+        print(format_text(summary))
+    return summary
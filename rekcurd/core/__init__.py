@@ -1,6 +1,16 @@
 # coding: utf-8
 
 
-from .rekcurd_worker import Rekcurd, RekcurdPack
-from .rekcurd_worker_servicer import RekcurdInput, RekcurdOutput, RekcurdWorkerServicer
-from .rekcurd_dashboard_servicer import RekcurdDashboardServicer
+from rekcurd._lazy import lazy_import
+
+# The servicers import grpc and the generated protobuf modules. Import them on first access.
+__getattr__, __dir__ = lazy_import(__name__, {
+    'Rekcurd': '.rekcurd_worker',
+    'RekcurdPack': '.rekcurd_worker',
+    'RekcurdInput': '.rekcurd_worker_servicer',
+    'RekcurdOutput': '.rekcurd_worker_servicer',
+    'RekcurdWorkerServicer': '.rekcurd_worker_servicer',
+    'RekcurdDashboardServicer': '.rekcurd_dashboard_servicer',
+    'RekcurdAsyncWorkerServicer': '.rekcurd_async_worker_servicer',
+    'RekcurdHealthServicer': '.rekcurd_health_servicer',
+})
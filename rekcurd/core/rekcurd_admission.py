@@ -0,0 +1,114 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+
+import asyncio
+import contextlib
+import grpc
+import threading
+import time
+
+from grpc import ServicerContext
+
+from rekcurd.utils.rekcurd_metrics import QUEUE_WAIT
+
+
+class RekcurdAdmissionController:
+    """ Admission control of prediction requests
+
+    At most ``max_inflight`` requests are predicted at the same time and at
+    most ``max_queue`` requests wait for their turn. A request arriving when
+    both are full is rejected with ``RESOURCE_EXHAUSTED`` right away, and a
+    request whose deadline has passed while waiting is dropped with
+    ``DEADLINE_EXCEEDED`` before it is predicted.
+    """
+
+    def __init__(self, max_inflight: int, max_queue: int = 0):
+        if max_inflight < 1:
+            raise ValueError("max_inflight must be a positive integer.")
+        self.max_inflight = max_inflight
+        self.max_queue = max(max_queue, 0)
+        self.inflight = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.expired = 0
+        self._lock = threading.Lock()
+        self._semaphore = threading.Semaphore(max_inflight)
+        self._async_semaphore = None
+
+    def _enter(self) -> bool:
+        with self._lock:
+            if self.inflight + self.waiting >= self.max_inflight + self.max_queue:
+                self.rejected += 1
+                return False
+            self.waiting += 1
+            return True
+
+    def _start(self, acquired: bool, context: ServicerContext) -> bool:
+        with self._lock:
+            self.waiting -= 1
+            if acquired and not _is_expired(context):
+                self.inflight += 1
+                self.admitted += 1
+                return True
+            self.expired += 1
+            return False
+
+    def _finish(self) -> None:
+        with self._lock:
+            self.inflight -= 1
+
+    @contextlib.contextmanager
+    def admit(self, context: ServicerContext):
+        """ Wait for a slot and hold it in the ``with`` block. Abort the RPC if not admitted.
+        """
+        if not self._enter():
+            context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED, "Error: Too many requests.")
+        start = time.monotonic()
+        acquired = self._semaphore.acquire(timeout=_time_remaining(context))
+        QUEUE_WAIT.labels('admission').observe(time.monotonic() - start)
+        if not self._start(acquired, context):
+            if acquired:
+                self._semaphore.release()
+            context.abort(grpc.StatusCode.DEADLINE_EXCEEDED, "Error: Deadline exceeded in queue.")
+        try:
+            yield
+        finally:
+            self._finish()
+            self._semaphore.release()
+
+    @contextlib.asynccontextmanager
+    async def admit_async(self, context: ServicerContext):
+        """ asyncio version of :func:``admit``.
+        """
+        if self._async_semaphore is None:
+            self._async_semaphore = asyncio.Semaphore(self.max_inflight)
+        if not self._enter():
+            await context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED, "Error: Too many requests.")
+        start = time.monotonic()
+        try:
+            await asyncio.wait_for(self._async_semaphore.acquire(), _time_remaining(context))
+            acquired = True
+        except asyncio.TimeoutError:
+            acquired = False
+        QUEUE_WAIT.labels('admission').observe(time.monotonic() - start)
+        if not self._start(acquired, context):
+            if acquired:
+                self._async_semaphore.release()
+            await context.abort(grpc.StatusCode.DEADLINE_EXCEEDED, "Error: Deadline exceeded in queue.")
+        try:
+            yield
+        finally:
+            self._finish()
+            self._async_semaphore.release()
+
+
+def _time_remaining(context: ServicerContext):
+    remaining = context.time_remaining() if context is not None else None
+    return max(remaining, 0) if remaining is not None else None
+
+
+def _is_expired(context: ServicerContext) -> bool:
+    remaining = context.time_remaining() if context is not None else None
+    return remaining is not None and remaining <= 0
@@ -0,0 +1,263 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+
+import asyncio
+import contextlib
+import contextvars
+import functools
+import grpc
+import time
+
+from enum import Enum
+from grpc.aio import ServicerContext
+from typing import AsyncIterator, Callable
+
+from .rekcurd_worker import Rekcurd
+from .rekcurd_worker_servicer import (
+    INVALID_STREAM_MESSAGE, PredictRpc, RekcurdInput, RekcurdOutput, RekcurdWorkerServicer
+)
+from rekcurd.utils import PredictInput, PredictResult
+from rekcurd.utils.rekcurd_metrics import (
+    PREDICT_BATCH_DURATION, PREDICT_BATCH_SIZE, PREDICT_DURATION, PREDICT_ERRORS, SERVICE_LOG_DURATION
+)
+
+
+class RekcurdAsyncWorkerServicer(RekcurdWorkerServicer):
+    """ asyncio version of :class:``RekcurdWorkerServicer`` for ``grpc.aio``
+
+    Call :func:``Rekcurd.predict_async`` on the event loop, so that a worker
+    can hold many in-flight requests regardless of the number of threads.
+    """
+
+    async def Process(self,
+                      request: RekcurdInput,
+                      context: ServicerContext,
+                      response: RekcurdOutput,
+                      type_input: Enum = None,
+                      type_output: Enum = None
+                      ) -> RekcurdOutput:
+
+        await self.check_context_async(context)
+        with self.trace(context, self.get_rpc_name(type_input, type_output)) as trace:
+            with trace.span('parse_option'):
+                ioption = self.parse_option(request)
+
+            type_input, type_output = self.resolve_types(type_input, type_output)
+            input = self.parse_input(request, type_input)
+            single_output = type_output in [self.Type.STRING, self.Type.BYTES]
+            async with self.admit_async(context):
+                # Read after admission, so that the time waiting for it is not counted as budget.
+                time_remaining = context.time_remaining() if context is not None else None
+                with self.rekcurd_pack.app.use_time_remaining(time_remaining):
+                    try:
+                        model_name = self.get_model_name(ioption, context)
+                        start = time.monotonic()
+                        with trace.span('predict'):
+                            result = await self.predict_shared_async(
+                                input, ioption, type_input, type_output, model_name)
+                        live_latency = time.monotonic() - start
+                    except Exception as e:
+                        self.system_logger.error(str(e))
+                        PREDICT_ERRORS.labels(self.get_rpc_name(type_input, type_output)).inc()
+                        result = self.get_default_result(response, single_output)
+                    else:
+                        if model_name is None:
+                            self.mirror_shadow(input, ioption, result, live_latency)
+
+            with trace.span('encode_response'):
+                self.set_response(response, result, single_output)
+            with trace.span('service_log'), SERVICE_LOG_DURATION.time():
+                self.service_logger.emit(request, response, ioption.get('suppress_log_inout', False))
+            return response
+
+    async def process_stream(self,
+                             request_iterator: AsyncIterator[RekcurdInput],
+                             context: ServicerContext,
+                             rpc: PredictRpc
+                             ) -> AsyncIterator[RekcurdOutput]:
+        """ Predict every message of the stream and yield the responses in order.
+
+        Up to ``stream_max_inflight`` messages are predicted concurrently.
+        """
+        inflight = asyncio.Semaphore(self.stream_max_inflight)
+        pending = asyncio.Queue()
+
+        async def consume():
+            try:
+                async for request in request_iterator:
+                    await inflight.acquire()
+                    pending.put_nowait(asyncio.ensure_future(self.Process(
+                        request, context, rpc.response_class(), rpc.type_input, rpc.type_output)))
+            finally:
+                pending.put_nowait(None)
+
+        reader = asyncio.ensure_future(consume())
+        try:
+            while True:
+                task = await pending.get()
+                if task is None:
+                    return
+                try:
+                    yield await task
+                finally:
+                    inflight.release()
+        finally:
+            reader.cancel()
+
+    async def process_client_stream(self,
+                                    request_iterator: AsyncIterator[RekcurdInput],
+                                    context: ServicerContext,
+                                    rpc: PredictRpc
+                                    ) -> RekcurdOutput:
+        requests = request_iterator.__aiter__()
+        request = await _next_request(requests)
+        if request is None or await _next_request(requests) is not None:
+            await self.abort_invalid_stream_async(context, rpc)
+        return await self.Process(request, context, rpc.response_class(), rpc.type_input, rpc.type_output)
+
+    async def abort_invalid_stream_async(self, context: ServicerContext, rpc: PredictRpc) -> None:
+        message = INVALID_STREAM_MESSAGE.format(rpc.name)
+        if context is None:
+            raise Exception(message)
+        await context.abort(grpc.StatusCode.INVALID_ARGUMENT, message)
+
+    async def process_batch(self, request, context: ServicerContext, rpc: PredictRpc):
+        await self.check_context_async(context)
+        with self.trace(context, 'Batch' + rpc.name) as trace:
+            with trace.span('parse_option', inputs=len(request.inputs)):
+                inputs, ioptions = self.parse_batch(request, rpc.type_input)
+            type_input, type_output = self.resolve_types(rpc.type_input, rpc.type_output)
+            single_output = type_output in [self.Type.STRING, self.Type.BYTES]
+            response = rpc.batch_response_class()
+            async with self.admit_async(context):
+                # Read after admission, so that the time waiting for it is not counted as budget.
+                time_remaining = context.time_remaining() if context is not None else None
+                with self.rekcurd_pack.app.use_time_remaining(time_remaining):
+                    try:
+                        batch_option = self.parse_option(request) if request.option.val else {}
+                        model_name = self.get_model_name(batch_option, context)
+                        await self.load_model_async(model_name)
+                        PREDICT_BATCH_SIZE.observe(len(inputs))
+                        with trace.span('predict'), self.rekcurd_pack.use_predictor(model_name) as predictor, \
+                                PREDICT_BATCH_DURATION.time():
+                            func = functools.partial(contextvars.copy_context().run,
+                                                     self.rekcurd_pack.app.predict_batch, predictor, inputs, ioptions)
+                            results = await asyncio.get_running_loop().run_in_executor(None, func)
+                        results = self.check_batch_results(inputs, results)
+                    except Exception as e:
+                        self.system_logger.error(str(e))
+                        PREDICT_ERRORS.labels('Batch' + rpc.name).inc()
+                        results = [self.get_default_result(rpc.response_class(), single_output) for _ in inputs]
+            with trace.span('encode_response'):
+                self.set_batch_response(request, response, results, ioptions, single_output)
+            return response
+
+    async def check_context_async(self, context: ServicerContext) -> None:
+        if context is None:
+            return
+        if context.cancelled():
+            self.count_dropped(grpc.StatusCode.CANCELLED)
+            await context.abort(grpc.StatusCode.CANCELLED, "Error: Cancelled by the client.")
+        time_remaining = context.time_remaining()
+        if time_remaining is not None and time_remaining <= 0:
+            self.count_dropped(grpc.StatusCode.DEADLINE_EXCEEDED)
+            await context.abort(grpc.StatusCode.DEADLINE_EXCEEDED, "Error: Deadline exceeded.")
+        if not self.rekcurd_pack.loaded:
+            await context.abort(grpc.StatusCode.UNAVAILABLE, "Error: ML model is not loaded yet.")
+
+    def admit_async(self, context: ServicerContext):
+        if self.admission is None:
+            return _null_async_context()
+        return self.admission.admit_async(context)
+
+    async def predict_shared_async(self, input: PredictInput, ioption: dict,
+                                   type_input: Enum, type_output: Enum, model_name: str = None) -> PredictResult:
+        key = self.get_prediction_key(input, ioption, type_input, type_output, model_name)
+        if key is None:
+            return await self.predict_async(input, ioption, type_input, type_output, model_name)
+        cache = self.rekcurd_pack.cache
+        result = cache.get(key) if cache is not None else None
+        if result is None:
+            if self.singleflight is not None:
+                result = await self.singleflight.do_async(
+                    key, self.predict_async, input, ioption, type_input, type_output, model_name)
+            else:
+                result = await self.predict_async(input, ioption, type_input, type_output, model_name)
+            if cache is not None:
+                cache.put(key, result)
+        return result
+
+    async def predict_async(self, input: PredictInput, ioption: dict, type_input: Enum, type_output: Enum,
+                            model_name: str = None) -> PredictResult:
+        app = self.rekcurd_pack.app
+        await self.load_model_async(model_name)
+        if self.batcher is not None and type(app).predict_async is Rekcurd.predict_async:
+            return await asyncio.wrap_future(self.batcher.submit((type_input, type_output), input, ioption, model_name))
+        with self.rekcurd_pack.use_predictor(model_name) as predictor, \
+                PREDICT_DURATION.labels(self.get_rpc_name(type_input, type_output)).time():
+            return await app.predict_async(predictor, input, ioption)
+
+    async def load_model_async(self, model_name: str = None) -> None:
+        """ Load a routed ML model on the default executor instead of blocking the event loop.
+        """
+        if model_name is not None and model_name not in self.rekcurd_pack.registry:
+            await asyncio.get_running_loop().run_in_executor(None, self.rekcurd_pack.get_model, model_name)
+
+
+@contextlib.asynccontextmanager
+async def _null_async_context():
+    yield
+
+
+async def _next_request(requests: AsyncIterator[RekcurdInput]):
+    try:
+        return await requests.__anext__()
+    except StopAsyncIteration:
+        return None
+
+
+def _unary_unary(name: str) -> Callable:
+    async def method(self, request: RekcurdInput, context: ServicerContext) -> RekcurdOutput:
+        rpc = self.rpcs[name]
+        return await self.Process(request, context, rpc.response_class(), rpc.type_input, rpc.type_output)
+    return method
+
+
+def _unary_stream(name: str) -> Callable:
+    async def method(self, request: RekcurdInput, context: ServicerContext) -> AsyncIterator[RekcurdOutput]:
+        rpc = self.rpcs[name]
+        yield await self.Process(request, context, rpc.response_class(), rpc.type_input, rpc.type_output)
+    return method
+
+
+def _stream_unary(name: str) -> Callable:
+    async def method(self, request_iterator: AsyncIterator[RekcurdInput], context: ServicerContext) -> RekcurdOutput:
+        return await self.process_client_stream(request_iterator, context, self.rpcs[name])
+    return method
+
+
+def _stream_stream(name: str) -> Callable:
+    async def method(self, request_iterator: AsyncIterator[RekcurdInput],
+                     context: ServicerContext) -> AsyncIterator[RekcurdOutput]:
+        async for response in self.process_stream(request_iterator, context, self.rpcs[name]):
+            yield response
+    return method
+
+
+def _add_predict_methods(servicer_class: type) -> None:
+    """ Define the async version of every "Predict_*" method in the same manner as the sync one.
+    """
+    makers = {
+        (False, False): _unary_unary,
+        (False, True): _unary_stream,
+        (True, False): _stream_unary,
+        (True, True): _stream_stream,
+    }
+    for rpc in servicer_class.build_rpcs().values():
+        method = makers[(rpc.client_streaming, rpc.server_streaming)](rpc.name)
+        method.__name__ = rpc.name
+        setattr(servicer_class, rpc.name, method)
+
+
+_add_predict_methods(RekcurdAsyncWorkerServicer)
@@ -0,0 +1,51 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+
+from typing import Dict
+
+from .rekcurd_messages import FieldSpec, FieldType, MessageSpec, build_messages
+from rekcurd.protobuf import rekcurd_pb2
+
+
+BATCH_PROTO_NAME = 'rekcurd_batch.proto'
+TYPE_NAMES = ['String', 'Bytes', 'ArrInt', 'ArrFloat', 'ArrString']
+
+
+def build_batch_messages() -> Dict[str, type]:
+    """ Build "Batch{Type}Input" and "Batch{Type}Output" message classes.
+    They are not defined in the protobuf of rekcurd/grpc.
+
+    message Batch{Type}Input {
+      repeated {Type}Input inputs = 1;
+      Option option = 2;
+    }
+    message Batch{Type}Output {
+      repeated {Type}Output outputs = 1;
+      Option option = 2;
+    }
+
+    :return: dict of message name and class. e.g. {"BatchArrFloatInput": class, ...}
+    """
+    package = rekcurd_pb2.DESCRIPTOR.package
+    message_specs = [
+        MessageSpec('Batch' + type_name + suffix, [
+            FieldSpec(field_name, FieldType.TYPE_MESSAGE, '.{0}.{1}{2}'.format(package, type_name, suffix),
+                      repeated=True),
+            FieldSpec('option', FieldType.TYPE_MESSAGE, '.{0}.Option'.format(package)),
+        ])
+        for type_name in TYPE_NAMES for suffix, field_name in [('Input', 'inputs'), ('Output', 'outputs')]]
+    return build_messages(BATCH_PROTO_NAME, package, message_specs, [rekcurd_pb2.DESCRIPTOR.name])
+
+
+_messages = build_batch_messages()
+BatchStringInput = _messages['BatchStringInput']
+BatchStringOutput = _messages['BatchStringOutput']
+BatchBytesInput = _messages['BatchBytesInput']
+BatchBytesOutput = _messages['BatchBytesOutput']
+BatchArrIntInput = _messages['BatchArrIntInput']
+BatchArrIntOutput = _messages['BatchArrIntOutput']
+BatchArrFloatInput = _messages['BatchArrFloatInput']
+BatchArrFloatOutput = _messages['BatchArrFloatOutput']
+BatchArrStringInput = _messages['BatchArrStringInput']
+BatchArrStringOutput = _messages['BatchArrStringOutput']
@@ -0,0 +1,130 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+
+import contextvars
+import queue
+import threading
+import time
+
+from concurrent.futures import Future
+from typing import Dict, Hashable, List, Optional, Tuple
+
+from .rekcurd_worker import RekcurdPack
+from rekcurd.utils import PredictInput, PredictResult
+from rekcurd.utils.rekcurd_metrics import PREDICT_BATCH_DURATION, PREDICT_BATCH_SIZE, QUEUE_WAIT
+
+
+class RekcurdBatcher:
+    """ Micro-batching scheduler for prediction
+
+    Concurrent requests sharing the same key (e.g. input/output type) are
+    grouped and passed to :func:``Rekcurd.predict_batch`` at once. A batch
+    is sent when it reaches ``max_batch_size`` items or when the first item
+    has waited ``max_wait_ms`` milliseconds, whichever comes first.
+    """
+
+    def __init__(self, rekcurd_pack: RekcurdPack, max_batch_size: int = 32, max_wait_ms: float = 5.0):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be a positive integer.")
+        self.rekcurd_pack = rekcurd_pack
+        self.max_batch_size = max_batch_size
+        self.max_wait = max(max_wait_ms, 0) / 1000.0
+        self._queues: Dict[Hashable, queue.Queue] = dict()
+        self._lock = threading.Lock()
+
+    def predict(self, key: Hashable, idata: PredictInput, option: dict = None, model_name: str = None) -> PredictResult:
+        """ Block until the batch containing this item is predicted.
+
+        :param key: Batch group. Items of different keys are never mixed.
+        :param idata: Input data.
+        :param option: Miscellaneous.
+        :param model_name: ML model file path. The default model if None.
+        :return: Result of this item.
+        """
+        return self.submit(key, idata, option, model_name).result()
+
+    def submit(self, key: Hashable, idata: PredictInput, option: dict = None, model_name: str = None) -> Future:
+        future = Future()
+        # "predict_batch" runs in the context of the first item, e.g. to keep "get_type_input/get_type_output".
+        self._get_queue((model_name, key)).put(
+            (idata, option, future, time.monotonic(), contextvars.copy_context()))
+        return future
+
+    def close(self) -> None:
+        """ Stop all the scheduler threads after the pending items are processed.
+        """
+        with self._lock:
+            for q in self._queues.values():
+                q.put(None)
+            self._queues = dict()
+
+    def _get_queue(self, key: Hashable) -> queue.Queue:
+        q = self._queues.get(key)
+        if q is None:
+            with self._lock:
+                q = self._queues.get(key)
+                if q is None:
+                    q = queue.Queue()
+                    thread = threading.Thread(target=self._loop, args=(q, key[0]), daemon=True,
+                                              name="rekcurd-batcher-{}".format(len(self._queues)))
+                    thread.start()
+                    self._queues[key] = q
+        return q
+
+    def _loop(self, q: queue.Queue, model_name: str = None) -> None:
+        while True:
+            item = q.get()
+            if item is None:
+                return
+            batch, closed = self._collect(q, item)
+            self._run(batch, model_name)
+            if closed:
+                return
+
+    def _collect(self, q: queue.Queue, first: tuple) -> Tuple[List[tuple], bool]:
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            try:
+                item = q.get_nowait() if timeout <= 0 else q.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self, batch: List[tuple], model_name: str = None) -> None:
+        batch = [item for item in batch if item[2].set_running_or_notify_cancel()]
+        if not batch:
+            return
+        futures = [item[2] for item in batch]
+        started = time.monotonic()
+        queue_wait = QUEUE_WAIT.labels('batch')
+        for item in batch:
+            queue_wait.observe(started - item[3])
+        PREDICT_BATCH_SIZE.observe(len(batch))
+        # Time budget of the batch is the one of the earliest deadline.
+        budgets = [item[4].run(self.rekcurd_pack.app.get_time_remaining) for item in batch]
+        budgets = [budget for budget in budgets if budget is not None]
+        try:
+            results = batch[0][4].run(self._predict_batch, batch, min(budgets) if budgets else None, model_name)
+        except Exception as e:
+            for future in futures:
+                future.set_exception(e)
+            return
+        for future, result in zip(futures, results):
+            future.set_result(result)
+
+    def _predict_batch(self, batch: List[tuple], time_remaining: Optional[float],
+                       model_name: str = None) -> List[PredictResult]:
+        app = self.rekcurd_pack.app
+        app.set_time_remaining(time_remaining)
+        with self.rekcurd_pack.use_predictor(model_name) as predictor, PREDICT_BATCH_DURATION.time():
+            results = app.predict_batch(
+                predictor, [item[0] for item in batch], [item[1] for item in batch])
+        if results is None or len(results) != len(batch):
+            raise Exception("Error: \"predict_batch\" must return one result per input.")
+        return results
@@ -0,0 +1,90 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+
+import hashlib
+import json
+import threading
+import time
+
+from collections import OrderedDict
+from enum import Enum
+from typing import Hashable, Optional
+
+from rekcurd.utils import PredictInput, PredictResult
+
+
+class RekcurdCache:
+    """ LRU cache of prediction results
+
+    At most ``max_size`` results are kept. The least recently used one is
+    evicted first. A result older than ``ttl_sec`` seconds is treated as a
+    miss. ``ttl_sec`` of 0 means no expiration.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl_sec: float = 0.0):
+        if max_size < 1:
+            raise ValueError("max_size must be a positive integer.")
+        self.max_size = max_size
+        self.ttl_sec = max(ttl_sec, 0.0)
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    @staticmethod
+    def make_key(model_name: str, type_input: Enum, type_output: Enum,
+                 idata: PredictInput, option: dict) -> Hashable:
+        """ Key of a prediction. Bytes input and numpy arrays are hashed not to keep large data in the key.
+
+        :param model_name: ML model file name.
+        :param type_input: Input type.
+        :param type_output: Output type.
+        :param idata: Input data.
+        :param option: Miscellaneous. Normalized to a JSON string with sorted keys.
+        :return: Cache key.
+        """
+        if isinstance(idata, bytes):
+            input_key = hashlib.sha1(idata).digest()
+        elif hasattr(idata, 'tobytes'):
+            input_key = (str(idata.dtype), hashlib.sha1(idata.tobytes()).digest())
+        elif isinstance(idata, str):
+            input_key = idata
+        else:
+            input_key = tuple(idata)
+        option_key = json.dumps(option, sort_keys=True, default=str)
+        return model_name, type_input, type_output, input_key, option_key
+
+    def get(self, key: Hashable) -> Optional[PredictResult]:
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None and self.ttl_sec and time.monotonic() - item[0] > self.ttl_sec:
+                del self._items[key]
+                item = None
+            if item is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def put(self, key: Hashable, result: PredictResult) -> None:
+        with self._lock:
+            self._items[key] = (time.monotonic(), result)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        """ Remove all the results. Hit/miss counters are kept.
+        """
+        with self._lock:
+            self._items.clear()
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
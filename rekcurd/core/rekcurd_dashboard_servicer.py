@@ -2,6 +2,7 @@
 # -*- coding: utf-8 -*-
 
 
+import functools
 import traceback
 
 import grpc
@@ -9,10 +10,13 @@ import types
 import pickle
 import sys
 
+from concurrent.futures import Future
 from grpc import ServicerContext
 from typing import Iterator, Union, List
 
 from .rekcurd_worker import RekcurdPack
+from .rekcurd_model_switcher import RekcurdModelSwitcher
+from .rekcurd_profiler import RekcurdProfiler, ProfileRequest, ProfileResponse
 from rekcurd.protobuf import rekcurd_pb2, rekcurd_pb2_grpc
 from rekcurd.utils import PredictInput, PredictLabel, PredictScore
 
@@ -75,9 +79,24 @@ class RekcurdDashboardServicer(rekcurd_pb2_grpc.RekcurdDashboardServicer):
     CHUNK_SIZE = 100
     BYTE_LIMIT = 4190000
 
+    SWITCH_MODEL_STATUS = {
+        RekcurdModelSwitcher.Status.IDLE: 1,
+        RekcurdModelSwitcher.Status.SUCCEEDED: 1,
+        RekcurdModelSwitcher.Status.FAILED: 0,
+        RekcurdModelSwitcher.Status.SWITCHING: 2,
+    }
+    PROFILE_STATUS = {
+        RekcurdProfiler.Status.IDLE: 0,
+        RekcurdProfiler.Status.SUCCEEDED: 1,
+        RekcurdProfiler.Status.FAILED: 0,
+        RekcurdProfiler.Status.PROFILING: 2,
+    }
+
     def __init__(self, rekcurd_pack: RekcurdPack):
         self.rekcurd_pack = rekcurd_pack
         self.logger = rekcurd_pack.app.system_logger
+        self.model_switcher = RekcurdModelSwitcher(rekcurd_pack)
+        self.profiler = RekcurdProfiler()
 
     def on_error(self, error: Exception):
         """ Postprocessing on error
@@ -131,17 +150,106 @@ class RekcurdDashboardServicer(rekcurd_pb2_grpc.RekcurdDashboardServicer):
                     ) -> rekcurd_pb2.ModelResponse:
         """ Switch your ML model.
 
+        With "switch_model.background", reply at once with status 1 and switch in
+        background. Poll "SwitchModelStatus" for the result.
+
         :param request:
         :param context:
         :return:
         """
         self.logger.info("Run SwitchModel.")
         filepath = request.path
-        local_filepath = self.rekcurd_pack.app.data_server.switch_model(filepath)
-        self.rekcurd_pack.predictor = self.rekcurd_pack.app.load_model(local_filepath)
+        self.rekcurd_pack.app.data_server.validate_path(filepath)
+        config = self.rekcurd_pack.app.config
+        if config is not None and config.SWITCH_MODEL_BACKGROUND:
+            self.model_switcher.start(filepath)
+            return rekcurd_pb2.ModelResponse(status=1,
+                                             message='Success: Switching model file in background.')
+        self.model_switcher.switch(filepath)
         return rekcurd_pb2.ModelResponse(status=1,
                                          message='Success: Switching model file.')
 
+    @error_handling(rekcurd_pb2.ModelResponse(status=0, message='Error: Prefetching model file.'))
+    def PrefetchModel(self,
+                      request: rekcurd_pb2.SwitchModelRequest,
+                      context: ServicerContext
+                      ) -> rekcurd_pb2.ModelResponse:
+        """ Download your ML model in background, so that "SwitchModel" only loads it. Not defined in the protobuf.
+
+        :param request:
+        :param context:
+        :return:
+        """
+        self.logger.info("Run PrefetchModel.")
+        filepath = request.path
+        future = self.rekcurd_pack.app.data_server.prefetch_model(filepath)
+        future.add_done_callback(functools.partial(self.on_prefetched, filepath))
+        return rekcurd_pb2.ModelResponse(status=1,
+                                         message='Success: Prefetching model file in background.')
+
+    def on_prefetched(self, filepath: str, future: Future) -> None:
+        error = future.exception()
+        if error is not None:
+            self.logger.error("Prefetching {} failed. {}".format(filepath, str(error)))
+        else:
+            self.logger.info("Prefetched model. {}".format(filepath))
+
+    @error_handling(ProfileResponse(status=0, message='Error: Profiling.'))
+    def Profile(self,
+                request: ProfileRequest,
+                context: ServicerContext
+                ) -> ProfileResponse:
+        """ Start sampling the stacks of all the threads for "seconds" in background. Not defined in the protobuf.
+
+        Get the collapsed stacks by "ProfileResult" once finished.
+
+        :param request:
+        :param context:
+        :return:
+        """
+        self.logger.info("Run Profile for {} sec.".format(request.seconds))
+        self.profiler.start(
+            request.seconds, request.interval_ms / 1000.0 if request.interval_ms > 0 else 0.01,
+            request.include_idle)
+        return ProfileResponse(status=self.PROFILE_STATUS[RekcurdProfiler.Status.PROFILING],
+                               message='Success: Profiling in background.')
+
+    @error_handling(ProfileResponse(status=0, message='Error: Getting profile result.'))
+    def ProfileResult(self,
+                      request: ProfileRequest,
+                      context: ServicerContext
+                      ) -> ProfileResponse:
+        """ Result of the last "Profile". Not defined in the protobuf.
+
+        status is 1 on success, 0 on failure or if never profiled and 2 while profiling.
+
+        :param request: Not used.
+        :param context:
+        :return:
+        """
+        status, stacks, samples, message = self.profiler.get_result()
+        return ProfileResponse(status=self.PROFILE_STATUS[status],
+                               message='{0}: {1}'.format(status.value, message or '{} samples'.format(samples)),
+                               stacks=stacks, samples=samples)
+
+    @error_handling(rekcurd_pb2.ModelResponse(status=0, message='Error: Getting model switch status.'))
+    def SwitchModelStatus(self,
+                          request: rekcurd_pb2.SwitchModelRequest,
+                          context: ServicerContext
+                          ) -> rekcurd_pb2.ModelResponse:
+        """ Status of the last "SwitchModel". Not defined in the protobuf.
+
+        status is 1 on success, 0 on failure and 2 while switching.
+
+        :param request: Not used.
+        :param context:
+        :return:
+        """
+        status, filepath, message = self.model_switcher.get_status()
+        return rekcurd_pb2.ModelResponse(
+            status=self.SWITCH_MODEL_STATUS[status],
+            message='{0}: {1}'.format(status.value, message or filepath or ''))
+
     @error_handling(rekcurd_pb2.EvaluateModelResponse())
     def EvaluateModel(self,
                       request_iterator: Iterator[rekcurd_pb2.EvaluateModelRequest],
@@ -159,8 +267,9 @@ class RekcurdDashboardServicer(rekcurd_pb2_grpc.RekcurdDashboardServicer):
         result_path = first_req.result_path
 
         local_data_path = self.rekcurd_pack.app.data_server.get_evaluation_data_path(data_path)
-        evaluate_result_gen = self.rekcurd_pack.app.evaluate(self.rekcurd_pack.predictor, local_data_path)
-        result = self.rekcurd_pack.app.data_server.upload_evaluation_result(evaluate_result_gen, result_path)
+        with self.rekcurd_pack.use_predictor() as predictor:
+            evaluate_result_gen = self.rekcurd_pack.app.evaluate(predictor, local_data_path)
+            result = self.rekcurd_pack.app.data_server.upload_evaluation_result(evaluate_result_gen, result_path)
         label_ios = [self.get_io_by_type(l) for l in result.label]
         metrics = rekcurd_pb2.EvaluationMetrics(num=result.num,
                                                 accuracy=result.accuracy,
@@ -253,3 +362,42 @@ class RekcurdDashboardServicer(rekcurd_pb2_grpc.RekcurdDashboardServicer):
             return score
         else:
             return [score]
+
+
+def add_RekcurdDashboardServicer_extensions_to_server(servicer: RekcurdDashboardServicer, server: grpc.Server) -> None:
+    """ Register the dashboard RPCs which are not defined in the protobuf.
+
+    - SwitchModelStatus
+        Status of the last "SwitchModel". "SwitchModelRequest" (not used) to "ModelResponse".
+    - PrefetchModel
+        Download a ML model file in background without switching to it.
+    - Profile
+        Start sampling the stacks of the threads of the worker for a while. "ProfileRequest" to "ProfileResponse".
+    - ProfileResult
+        Collapsed stacks of the last "Profile". "ProfileRequest" (not used) to "ProfileResponse".
+    """
+    rpc_method_handlers = {
+        'PrefetchModel': grpc.unary_unary_rpc_method_handler(
+            servicer.PrefetchModel,
+            request_deserializer=rekcurd_pb2.SwitchModelRequest.FromString,
+            response_serializer=rekcurd_pb2.ModelResponse.SerializeToString,
+        ),
+        'SwitchModelStatus': grpc.unary_unary_rpc_method_handler(
+            servicer.SwitchModelStatus,
+            request_deserializer=rekcurd_pb2.SwitchModelRequest.FromString,
+            response_serializer=rekcurd_pb2.ModelResponse.SerializeToString,
+        ),
+        'Profile': grpc.unary_unary_rpc_method_handler(
+            servicer.Profile,
+            request_deserializer=ProfileRequest.FromString,
+            response_serializer=ProfileResponse.SerializeToString,
+        ),
+        'ProfileResult': grpc.unary_unary_rpc_method_handler(
+            servicer.ProfileResult,
+            request_deserializer=ProfileRequest.FromString,
+            response_serializer=ProfileResponse.SerializeToString,
+        ),
+    }
+    generic_handler = grpc.method_handlers_generic_handler(
+        'rekcurd.RekcurdDashboard', rpc_method_handlers)
+    server.add_generic_rpc_handlers((generic_handler,))
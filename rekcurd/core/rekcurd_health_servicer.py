@@ -0,0 +1,111 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+
+import grpc
+
+from grpc import ServicerContext
+from typing import Dict, Iterator
+
+from .rekcurd_messages import FieldSpec, FieldType, MessageSpec, build_messages
+from .rekcurd_worker import RekcurdPack
+
+
+HEALTH_PROTO_NAME = 'grpc/health/v1/health.proto'
+HEALTH_SERVICE_NAME = 'grpc.health.v1.Health'
+
+
+def build_health_messages() -> Dict[str, type]:
+    """ Build the messages of the standard gRPC health checking protocol.
+    The ones of "grpcio-health-checking" are used if installed.
+
+    message HealthCheckRequest {
+      string service = 1;
+    }
+    message HealthCheckResponse {
+      enum ServingStatus {
+        UNKNOWN = 0;
+        SERVING = 1;
+        NOT_SERVING = 2;
+        SERVICE_UNKNOWN = 3;
+      }
+      ServingStatus status = 1;
+    }
+
+    :return: dict of message name and class. e.g. {"HealthCheckRequest": class, ...}
+    """
+    try:
+        from grpc_health.v1 import health_pb2
+        return {'HealthCheckRequest': health_pb2.HealthCheckRequest,
+                'HealthCheckResponse': health_pb2.HealthCheckResponse}
+    except ImportError:
+        pass
+    message_specs = [
+        MessageSpec('HealthCheckRequest', [FieldSpec('service', FieldType.TYPE_STRING)]),
+        MessageSpec('HealthCheckResponse',
+                    [FieldSpec('status', FieldType.TYPE_ENUM, '.grpc.health.v1.HealthCheckResponse.ServingStatus')],
+                    {'ServingStatus': ['UNKNOWN', 'SERVING', 'NOT_SERVING', 'SERVICE_UNKNOWN']}),
+    ]
+    return build_messages(HEALTH_PROTO_NAME, 'grpc.health.v1', message_specs)
+
+
+_messages = build_health_messages()
+HealthCheckRequest = _messages['HealthCheckRequest']
+HealthCheckResponse = _messages['HealthCheckResponse']
+
+
+class RekcurdHealthServicer:
+    """ "grpc.health.v1.Health" service
+
+    The whole server ("") and "rekcurd.RekcurdWorker" are SERVING once the ML
+    model is loaded and warmed up, until the worker starts to shut down.
+    "rekcurd.RekcurdDashboard" is always SERVING so that ServiceInfo and
+    SwitchModel are reachable while the ML model is loaded.
+    """
+
+    WORKER_SERVICE_NAMES = ('', 'rekcurd.RekcurdWorker')
+    DASHBOARD_SERVICE_NAME = 'rekcurd.RekcurdDashboard'
+
+    def __init__(self, rekcurd_pack: RekcurdPack):
+        self.rekcurd_pack = rekcurd_pack
+
+    def get_status(self, service: str) -> int:
+        if service in self.WORKER_SERVICE_NAMES:
+            if self.rekcurd_pack.ready:
+                return HealthCheckResponse.SERVING
+            return HealthCheckResponse.NOT_SERVING
+        if service == self.DASHBOARD_SERVICE_NAME:
+            return HealthCheckResponse.SERVING
+        return HealthCheckResponse.SERVICE_UNKNOWN
+
+    def Check(self, request: HealthCheckRequest, context: ServicerContext) -> HealthCheckResponse:
+        status = self.get_status(request.service)
+        if status == HealthCheckResponse.SERVICE_UNKNOWN:
+            context.abort(grpc.StatusCode.NOT_FOUND, "Error: Unknown service. {}".format(request.service))
+        return HealthCheckResponse(status=status)
+
+    def Watch(self, request: HealthCheckRequest, context: ServicerContext) -> Iterator[HealthCheckResponse]:
+        """ Send the current status and end the stream.
+
+        A stream kept open would hold one of the server threads per watcher.
+        Clients following the health checking protocol call Watch again when
+        the stream ends, so they still see the changes.
+        """
+        yield HealthCheckResponse(status=self.get_status(request.service))
+
+
+def add_RekcurdHealthServicer_to_server(servicer: RekcurdHealthServicer, server: grpc.Server) -> None:
+    rpc_method_handlers = {
+        'Check': grpc.unary_unary_rpc_method_handler(
+            servicer.Check,
+            request_deserializer=HealthCheckRequest.FromString,
+            response_serializer=HealthCheckResponse.SerializeToString,
+        ),
+        'Watch': grpc.unary_stream_rpc_method_handler(
+            servicer.Watch,
+            request_deserializer=HealthCheckRequest.FromString,
+            response_serializer=HealthCheckResponse.SerializeToString,
+        ),
+    }
+    generic_handler = grpc.method_handlers_generic_handler(HEALTH_SERVICE_NAME, rpc_method_handlers)
+    server.add_generic_rpc_handlers((generic_handler,))
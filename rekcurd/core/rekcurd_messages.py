@@ -0,0 +1,82 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+
+from google.protobuf import descriptor_pb2, descriptor_pool, message_factory
+from typing import Dict, NamedTuple, Sequence
+
+FieldType = descriptor_pb2.FieldDescriptorProto
+
+
+class FieldSpec(NamedTuple):
+    """ Field of a message. Numbered by its position from 1.
+
+    :param name: Field name.
+    :param type: ``FieldType.TYPE_*``.
+    :param type_name: Fully qualified name of the message or enum type. e.g. ".rekcurd.Option"
+    :param repeated: Repeated field if True.
+    """
+    name: str
+    type: int
+    type_name: str = ''
+    repeated: bool = False
+
+
+class MessageSpec(NamedTuple):
+    """ Message definition.
+
+    :param name: Message name.
+    :param fields: Fields of the message.
+    :param enums: Nested enums. dict of enum name and value names numbered from 0.
+    """
+    name: str
+    fields: Sequence[FieldSpec]
+    enums: Dict[str, Sequence[str]] = None
+
+
+def build_file_descriptor_proto(proto_name: str, package: str, message_specs: Sequence[MessageSpec],
+                                dependencies: Sequence[str] = ()) -> descriptor_pb2.FileDescriptorProto:
+    """ Define the messages in a proto3 file.
+    """
+    file_proto = descriptor_pb2.FileDescriptorProto(
+        name=proto_name, package=package, syntax='proto3', dependency=list(dependencies))
+    for message_spec in message_specs:
+        message_proto = file_proto.message_type.add(name=message_spec.name)
+        for enum_name, value_names in (message_spec.enums or dict()).items():
+            enum_proto = message_proto.enum_type.add(name=enum_name)
+            for number, value_name in enumerate(value_names):
+                enum_proto.value.add(name=value_name, number=number)
+        for number, field_spec in enumerate(message_spec.fields, 1):
+            message_proto.field.add(
+                name=field_spec.name, number=number, type=field_spec.type, type_name=field_spec.type_name,
+                label=FieldType.LABEL_REPEATED if field_spec.repeated else FieldType.LABEL_OPTIONAL)
+    return file_proto
+
+
+def get_message_class(descriptor) -> type:
+    if hasattr(message_factory, 'GetMessageClass'):
+        return message_factory.GetMessageClass(descriptor)
+    return message_factory.MessageFactory(descriptor.file.pool).GetPrototype(descriptor)
+
+
+def build_messages(proto_name: str, package: str, message_specs: Sequence[MessageSpec],
+                   dependencies: Sequence[str] = ()) -> Dict[str, type]:
+    """ Build message classes which are not defined in the protobuf of rekcurd/grpc.
+
+    The file is added to the default descriptor pool once, so that the messages
+    can be used by gRPC method handlers like the generated ones.
+
+    :param proto_name: Name of the proto file. e.g. "rekcurd_batch.proto"
+    :param package: Package of the messages.
+    :param message_specs: Messages to define.
+    :param dependencies: Names of the proto files of the types referred by the fields.
+    :return: dict of message name and class.
+    """
+    pool = descriptor_pool.Default()
+    try:
+        file_descriptor = pool.FindFileByName(proto_name)
+    except KeyError:
+        pool.Add(build_file_descriptor_proto(proto_name, package, message_specs, dependencies))
+        file_descriptor = pool.FindFileByName(proto_name)
+    return {name: get_message_class(descriptor)
+            for name, descriptor in file_descriptor.message_types_by_name.items()}
@@ -0,0 +1,127 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+
+import grpc
+import inspect
+import time
+
+from concurrent import futures
+from typing import Callable, Optional, Tuple
+
+from rekcurd.utils.rekcurd_metrics import RPC_DURATION, RPC_INFLIGHT, RPC_ERRORS, QUEUE_WAIT
+
+
+class RekcurdMetricsInterceptor(grpc.ServerInterceptor):
+    """ Server interceptor measuring every RPC
+
+    The time from the start of the handler to the end of the response
+    (the last message of a stream), the number of in-flight RPCs and the
+    number of RPCs ended by an exception are recorded per method.
+    """
+
+    def intercept_service(self, continuation, handler_call_details):
+        return wrap_rpc_method_handler(continuation(handler_call_details), handler_call_details.method)
+
+
+class RekcurdAsyncMetricsInterceptor(grpc.aio.ServerInterceptor):
+    """ ``grpc.aio`` version of :class:``RekcurdMetricsInterceptor``.
+    """
+
+    async def intercept_service(self, continuation, handler_call_details):
+        return wrap_rpc_method_handler(await continuation(handler_call_details), handler_call_details.method)
+
+
+class RekcurdThreadPoolExecutor(futures.ThreadPoolExecutor):
+    """ Thread pool recording how long the tasks wait for a free thread
+
+    A long wait means that the gRPC server has too few threads for the load.
+    """
+
+    def submit(self, fn, *args, **kwargs):
+        submitted = time.monotonic()
+
+        def run():
+            QUEUE_WAIT.labels('executor').observe(time.monotonic() - submitted)
+            return fn(*args, **kwargs)
+        return super().submit(run)
+
+
+def wrap_rpc_method_handler(handler: Optional[grpc.RpcMethodHandler], method: str) -> Optional[grpc.RpcMethodHandler]:
+    """ Wrap the behavior of the handler keeping its kind (sync, coroutine, or async generator).
+    """
+    if handler is None:
+        return None
+    labels = _split_method(method)
+    duration = RPC_DURATION.labels(*labels)
+    inflight = RPC_INFLIGHT.labels(*labels)
+    errors = RPC_ERRORS.labels(*labels)
+    for attr in ('unary_unary', 'unary_stream', 'stream_unary', 'stream_stream'):
+        behavior = getattr(handler, attr)
+        if behavior is not None:
+            return handler._replace(**{attr: _wrap_behavior(behavior, duration, inflight, errors)})
+    return handler
+
+
+def _split_method(method: str) -> Tuple[str, str]:
+    # "/rekcurd.RekcurdWorker/Predict_String_String"
+    service, _, name = method.lstrip('/').rpartition('/')
+    return service, name
+
+
+def _wrap_behavior(behavior: Callable, duration, inflight, errors) -> Callable:
+    if inspect.isasyncgenfunction(behavior):
+        async def async_stream_behavior(request, context):
+            inflight.inc()
+            start = time.monotonic()
+            try:
+                async for response in behavior(request, context):
+                    yield response
+            except Exception:
+                errors.inc()
+                raise
+            finally:
+                duration.observe(time.monotonic() - start)
+                inflight.dec()
+        return async_stream_behavior
+    if inspect.iscoroutinefunction(behavior):
+        async def async_behavior(request, context):
+            inflight.inc()
+            start = time.monotonic()
+            try:
+                return await behavior(request, context)
+            except Exception:
+                errors.inc()
+                raise
+            finally:
+                duration.observe(time.monotonic() - start)
+                inflight.dec()
+        return async_behavior
+
+    def sync_behavior(request, context):
+        inflight.inc()
+        start = time.monotonic()
+        try:
+            response = behavior(request, context)
+        except Exception:
+            errors.inc()
+            duration.observe(time.monotonic() - start)
+            inflight.dec()
+            raise
+        if inspect.isgenerator(response):
+            return _observe_stream(response, start, duration, inflight, errors)
+        duration.observe(time.monotonic() - start)
+        inflight.dec()
+        return response
+    return sync_behavior
+
+
+def _observe_stream(responses, start: float, duration, inflight, errors):
+    try:
+        yield from responses
+    except Exception:
+        errors.inc()
+        raise
+    finally:
+        duration.observe(time.monotonic() - start)
+        inflight.dec()
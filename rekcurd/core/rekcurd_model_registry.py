@@ -0,0 +1,97 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+
+import threading
+
+from collections import OrderedDict
+from typing import Hashable, List, Optional, Tuple
+
+
+class RekcurdModelRegistry:
+    """ Resident ML models with LRU eviction
+
+    Keep loaded predictors by name (ML model file path). The least recently
+    used ones are evicted when there are more than ``max_models`` of them or
+    their estimated size exceeds ``max_memory_bytes``. 0 means no limit of
+    memory. Eviction only removes them from the registry. Releasing them is
+    up to the caller.
+    """
+
+    def __init__(self, max_models: int = 1, max_memory_bytes: int = 0):
+        if max_models < 1:
+            raise ValueError("max_models must be a positive integer.")
+        self.max_models = max_models
+        self.max_memory_bytes = max_memory_bytes
+        self.memory_bytes = 0
+        self.evictions = 0
+        self._models = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, name: Hashable) -> Optional[object]:
+        with self._lock:
+            entry = self._models.get(name)
+            if entry is None:
+                return None
+            self._models.move_to_end(name)
+            return entry[0]
+
+    def put(self, name: Hashable, predictor: object, size: int = 0) -> Optional[object]:
+        """ Register a predictor as the most recently used one.
+
+        :param name: ML model name.
+        :param predictor: ML predictor.
+        :param size: Estimated memory size in bytes.
+        :return: Predictor previously registered with the name, if any.
+        """
+        with self._lock:
+            old = self._models.pop(name, None)
+            if old is not None:
+                self.memory_bytes -= old[1]
+            self._models[name] = (predictor, size)
+            self.memory_bytes += size
+            return old[0] if old is not None else None
+
+    def remove(self, name: Hashable) -> Optional[object]:
+        with self._lock:
+            entry = self._models.pop(name, None)
+            if entry is None:
+                return None
+            self.memory_bytes -= entry[1]
+            return entry[0]
+
+    def evict(self, *keep: Hashable) -> List[Tuple[Hashable, object]]:
+        """ Remove the least recently used predictors until the limits are met.
+
+        :param keep: Names never evicted (e.g. the default model).
+        :return: Evicted names and predictors.
+        """
+        evicted = []
+        with self._lock:
+            for name in list(self._models):
+                if not self._over_limit():
+                    break
+                if name in keep:
+                    continue
+                predictor, size = self._models.pop(name)
+                self.memory_bytes -= size
+                self.evictions += 1
+                evicted.append((name, predictor))
+        return evicted
+
+    def names(self) -> List[Hashable]:
+        """ Names from the least recently used one.
+        """
+        with self._lock:
+            return list(self._models)
+
+    def _over_limit(self) -> bool:
+        if len(self._models) > self.max_models:
+            return True
+        return 0 < self.max_memory_bytes < self.memory_bytes
+
+    def __contains__(self, name: Hashable) -> bool:
+        return name in self._models
+
+    def __len__(self) -> int:
+        return len(self._models)
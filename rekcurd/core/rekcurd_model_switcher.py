@@ -0,0 +1,115 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+
+import gc
+import threading
+import time
+import traceback
+
+from enum import Enum
+from typing import Tuple
+
+from .rekcurd_worker import RekcurdPack
+from rekcurd.utils.rekcurd_metrics import MODEL_SWITCH_DURATION
+
+
+class RekcurdModelSwitcher:
+    """ Switch ML model on the calling thread or in background
+
+    Download, load and warm up the new model while the current one keeps
+    serving, then make it the default one. The status of the last switch is
+    kept either way. The previous
+    model stays in :class:``RekcurdModelRegistry`` for rollback until
+    evicted, and is unloaded once the requests using it have finished.
+    """
+
+    class Status(Enum):
+        IDLE = 'Idle'
+        SWITCHING = 'Switching'
+        SUCCEEDED = 'Success'
+        FAILED = 'Error'
+
+    def __init__(self, rekcurd_pack: RekcurdPack):
+        self.rekcurd_pack = rekcurd_pack
+        self.logger = rekcurd_pack.app.system_logger
+        self.status = self.Status.IDLE
+        self.filepath = None
+        self.message = ''
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self, filepath: str) -> None:
+        """ Start switching on a background thread.
+
+        :param filepath: ML model file path.
+        """
+        with self._lock:
+            self._begin(filepath)
+            self._thread = threading.Thread(target=self._run, args=(filepath,),
+                                            daemon=True, name='rekcurd-model-switcher')
+            self._thread.start()
+
+    def join(self, timeout: float = None) -> None:
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def switch(self, filepath: str) -> None:
+        """ Switch ML model on the current thread. Errors are raised.
+
+        :param filepath: ML model file path.
+        """
+        with self._lock:
+            self._begin(filepath)
+        try:
+            self._timed_switch(filepath)
+        except Exception as e:
+            self._end(self.Status.FAILED, str(e))
+            raise
+        self._end(self.Status.SUCCEEDED, '')
+
+    def _begin(self, filepath: str) -> None:
+        """ Must hold ``_lock``.
+        """
+        if self.status is self.Status.SWITCHING:
+            raise Exception('Error: Another model is being switched -> {}'.format(self.filepath))
+        self.status, self.filepath, self.message = self.Status.SWITCHING, filepath, ''
+
+    def _end(self, status: Status, message: str) -> None:
+        with self._lock:
+            self.status, self.message = status, message
+
+    def _timed_switch(self, filepath: str) -> None:
+        start = time.monotonic()
+        try:
+            self._switch(filepath)
+        except Exception:
+            MODEL_SWITCH_DURATION.labels('failure').observe(time.monotonic() - start)
+            raise
+        MODEL_SWITCH_DURATION.labels('success').observe(time.monotonic() - start)
+
+    def _switch(self, filepath: str) -> None:
+        # Switching to the current model reloads it, e.g. after "UploadModel" replaced the file.
+        self.rekcurd_pack.get_model(filepath, reload=filepath == self.rekcurd_pack.model_name)
+        self.rekcurd_pack.app.data_server.switch_model(filepath)
+        self.logger.info("Switch default model. {}".format(filepath))
+        self.rekcurd_pack.set_default_model(filepath)
+        # Recover the worker whose ML model failed to load on start.
+        self.rekcurd_pack.loaded = True
+        gc.collect()
+
+    def get_status(self) -> Tuple[Status, str, str]:
+        """ Status, ML model file path and message of the last switch.
+        """
+        with self._lock:
+            return self.status, self.filepath, self.message
+
+    def _run(self, filepath: str) -> None:
+        try:
+            self._timed_switch(filepath)
+        except Exception as e:
+            self.logger.error(str(e))
+            self.logger.error(traceback.format_exc())
+            self._end(self.Status.FAILED, str(e))
+            return
+        self._end(self.Status.SUCCEEDED, '')
@@ -0,0 +1,166 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+
+import collections
+import queue
+import re
+import selectors
+import sys
+import threading
+import time
+
+from concurrent.futures import thread as futures_thread
+from enum import Enum
+from typing import Dict, Tuple
+
+from .rekcurd_messages import FieldSpec, FieldType, MessageSpec, build_messages
+from rekcurd.protobuf import rekcurd_pb2
+
+
+PROFILE_PROTO_NAME = 'rekcurd_profile.proto'
+
+
+def build_profile_messages() -> Dict[str, type]:
+    """ Build "ProfileRequest" and "ProfileResponse" message classes.
+    They are not defined in the protobuf of rekcurd/grpc.
+
+    message ProfileRequest {
+      double seconds = 1;
+      double interval_ms = 2;
+      bool include_idle = 3;
+    }
+    message ProfileResponse {
+      int32 status = 1;
+      string message = 2;
+      string stacks = 3;
+      int64 samples = 4;
+    }
+
+    :return: dict of message name and class. e.g. {"ProfileRequest": class, ...}
+    """
+    message_specs = [
+        MessageSpec('ProfileRequest', [FieldSpec('seconds', FieldType.TYPE_DOUBLE),
+                                       FieldSpec('interval_ms', FieldType.TYPE_DOUBLE),
+                                       FieldSpec('include_idle', FieldType.TYPE_BOOL)]),
+        MessageSpec('ProfileResponse', [FieldSpec('status', FieldType.TYPE_INT32),
+                                        FieldSpec('message', FieldType.TYPE_STRING),
+                                        FieldSpec('stacks', FieldType.TYPE_STRING),
+                                        FieldSpec('samples', FieldType.TYPE_INT64)]),
+    ]
+    return build_messages(PROFILE_PROTO_NAME, rekcurd_pb2.DESCRIPTOR.package, message_specs)
+
+
+_messages = build_profile_messages()
+ProfileRequest = _messages['ProfileRequest']
+ProfileResponse = _messages['ProfileResponse']
+
+
+class RekcurdProfiler:
+    """ Sampling profiler of a live worker
+
+    The stacks of all the threads (gRPC threads running ``Process`` and
+    ``predict``, the asyncio event loop, batching and streaming threads) are
+    sampled every ``interval`` seconds without tracing every call, and
+    collapsed into stacks ("thread;outer;...;inner count" per line), the
+    input format of flamegraph tools. Threads idling in the standard
+    library (e.g. waiting for a task or a lock) are skipped by default.
+    Sampling runs on its own daemon thread, so that the gRPC threads keep
+    serving while profiled. Only one profile runs at a time.
+    """
+
+    class Status(Enum):
+        IDLE = 'Idle'
+        PROFILING = 'Profiling'
+        SUCCEEDED = 'Success'
+        FAILED = 'Error'
+
+    MAX_SECONDS = 300.0
+    IDLE_FILES = frozenset([threading.__file__, queue.__file__, selectors.__file__, futures_thread.__file__])
+
+    def __init__(self):
+        self.status = self.Status.IDLE
+        self.stacks = ''
+        self.samples = 0
+        self.message = ''
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self, seconds: float, interval: float = 0.01, include_idle: bool = False) -> None:
+        """ Start sampling the threads for ``seconds`` on a background thread.
+
+        :param seconds: Duration of the profile.
+        :param interval: Seconds between samples.
+        :param include_idle: Keep the samples of idle threads.
+        """
+        if not 0 < seconds <= self.MAX_SECONDS:
+            raise ValueError("Error: Profile duration must be in (0, {}] seconds.".format(self.MAX_SECONDS))
+        interval = max(interval, 0.001)
+        with self._lock:
+            if self.status is self.Status.PROFILING:
+                raise Exception("Error: Another profile is running.")
+            self.status, self.stacks, self.samples, self.message = self.Status.PROFILING, '', 0, ''
+            self._thread = threading.Thread(target=self._run, args=(seconds, interval, include_idle),
+                                            daemon=True, name='rekcurd-profiler')
+            self._thread.start()
+
+    def join(self, timeout: float = None) -> None:
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def get_result(self) -> Tuple[Status, str, int, str]:
+        """ Status, collapsed stacks, the number of samples and message of the last profile.
+        """
+        with self._lock:
+            return self.status, self.stacks, self.samples, self.message
+
+    def profile(self, seconds: float, interval: float = 0.01, include_idle: bool = False) -> Tuple[str, int]:
+        """ Profile and wait for the result.
+
+        :return: Collapsed stacks and the number of samples.
+        """
+        self.start(seconds, interval, include_idle)
+        self.join()
+        status, stacks, samples, message = self.get_result()
+        if status is not self.Status.SUCCEEDED:
+            raise Exception(message)
+        return stacks, samples
+
+    def _run(self, seconds: float, interval: float, include_idle: bool) -> None:
+        try:
+            stacks, samples = self._sample(seconds, interval, include_idle)
+            status, message = self.Status.SUCCEEDED, ''
+        except Exception as e:
+            stacks, samples = '', 0
+            status, message = self.Status.FAILED, str(e)
+        with self._lock:
+            self.status, self.stacks, self.samples, self.message = status, stacks, samples, message
+
+    def _sample(self, seconds: float, interval: float, include_idle: bool) -> Tuple[str, int]:
+        counts = collections.Counter()
+        samples = 0
+        own_ident = threading.get_ident()
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                if not include_idle and frame.f_code.co_filename in self.IDLE_FILES:
+                    continue
+                counts[self._collapse(names.get(ident, str(ident)), frame)] += 1
+            samples += 1
+            time.sleep(interval)
+        stacks = '\n'.join('{0} {1}'.format(stack, count) for stack, count in counts.most_common())
+        return stacks, samples
+
+    @staticmethod
+    def _collapse(thread_name: str, frame) -> str:
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            names.append('{0} ({1})'.format(code.co_name, code.co_filename))
+            frame = frame.f_back
+        # Merge the threads of a pool. e.g. "ThreadPoolExecutor-0_3" -> "ThreadPoolExecutor-0"
+        names.append(re.sub(r'_\d+$', '', thread_name))
+        return ';'.join(name.replace(';', ':') for name in reversed(names))
@@ -0,0 +1,166 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+
+import contextvars
+import os
+import random
+import threading
+import time
+
+from concurrent import futures
+from typing import Dict
+
+from .rekcurd_worker import RekcurdPack
+from rekcurd.utils import PredictInput, PredictResult
+from rekcurd.utils.rekcurd_metrics import SHADOW_PREDICT_DURATION
+
+
+class RekcurdShadow:
+    """ Mirroring of live traffic to a candidate ML model
+
+    A ``ratio`` of the predictions is predicted again by the candidate model
+    on its own low priority threads after the live response is decided, and
+    the agreement of the labels and the latency of both models are counted
+    and exported by ``rekcurd.utils.metrics``.
+    Mirrors are dropped while ``max_queue`` of them are pending, so that the
+    candidate never slows down the live traffic.
+    """
+
+    NICE_INCREMENT = 10
+
+    def __init__(self, rekcurd_pack: RekcurdPack, filepath: str, ratio: float = 1.0,
+                 max_workers: int = 1, max_queue: int = 16):
+        self.rekcurd_pack = rekcurd_pack
+        self.logger = rekcurd_pack.app.system_logger
+        self.filepath = filepath
+        self.ratio = ratio
+        self.max_queue = max_queue
+        self.mirrored = 0
+        self.agreed = 0
+        self.errors = 0
+        self.dropped = 0
+        self.live_latency_sum = 0.0
+        self.shadow_latency_sum = 0.0
+        self._pending = 0
+        self._predictor = None
+        self._using = 0
+        self._closed = False
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._executor = futures.ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix='rekcurd-shadow', initializer=self._lower_priority)
+
+    def mirror(self, idata: PredictInput, option: dict, live_result: PredictResult, live_latency: float) -> bool:
+        """ Submit a prediction by the candidate model, if sampled and not overloaded. Never blocks.
+
+        :param idata: Input data of the live prediction.
+        :param option: Option of the live prediction.
+        :param live_result: Result of the live model.
+        :param live_latency: Seconds taken by the live model.
+        :return: True if submitted.
+        """
+        if self.ratio < 1.0 and random.random() >= self.ratio:
+            return False
+        with self._lock:
+            if self._pending >= self.max_queue:
+                self.dropped += 1
+                return False
+            self._pending += 1
+        # Keep "get_type_input/get_type_output" of the live request.
+        context = contextvars.copy_context()
+        self._executor.submit(context.run, self._run, idata, option, live_result, live_latency)
+        return True
+
+    def get_stats(self) -> Dict[str, float]:
+        with self._lock:
+            compared = self.mirrored - self.errors
+            return {
+                'mirrored': self.mirrored,
+                'agreed': self.agreed,
+                'errors': self.errors,
+                'dropped': self.dropped,
+                'agreement_rate': self.agreed / compared if compared else 0.0,
+                'live_latency_avg': self.live_latency_sum / compared if compared else 0.0,
+                'shadow_latency_avg': self.shadow_latency_sum / compared if compared else 0.0,
+            }
+
+    def close(self) -> None:
+        """ Stop the candidate threads without waiting for the pending mirrors.
+
+        The candidate model is unloaded by ``app.unload_model`` once no mirror uses it.
+        """
+        self._executor.shutdown(wait=False)
+        with self._load_lock:
+            self._closed = True
+            self._unload_if_unused()
+
+    def _acquire_predictor(self) -> object:
+        with self._load_lock:
+            if self._closed:
+                raise Exception("Error: Shadow is closed.")
+            if self._predictor is None:
+                app = self.rekcurd_pack.app
+                self.logger.info("Load shadow model. {}".format(self.filepath))
+                local_filepath = app.data_server.download_model(self.filepath)
+                self._predictor = app.load_model(local_filepath)
+            self._using += 1
+            return self._predictor
+
+    def _release_predictor(self) -> None:
+        with self._load_lock:
+            self._using -= 1
+            if self._closed:
+                self._unload_if_unused()
+
+    def _unload_if_unused(self) -> None:
+        # Called with "_load_lock" held.
+        if self._predictor is None or self._using > 0:
+            return
+        predictor, self._predictor = self._predictor, None
+        self.logger.info("Unload shadow model. {}".format(self.filepath))
+        try:
+            self.rekcurd_pack.app.unload_model(predictor)
+        except Exception as e:
+            self.logger.error("Unloading shadow model failed. {}".format(str(e)))
+
+    def _run(self, idata: PredictInput, option: dict, live_result: PredictResult, live_latency: float) -> None:
+        try:
+            predictor = self._acquire_predictor()
+            try:
+                start = time.monotonic()
+                result = self.rekcurd_pack.app.predict(predictor, idata, option)
+                latency = time.monotonic() - start
+            finally:
+                self._release_predictor()
+            agreed = self._same_label(result.label, live_result.label)
+        except Exception as e:
+            self.logger.error("Shadow prediction failed. {}".format(str(e)))
+            with self._lock:
+                self._pending -= 1
+                self.mirrored += 1
+                self.errors += 1
+            return
+        with self._lock:
+            self._pending -= 1
+            self.mirrored += 1
+            self.agreed += int(agreed)
+            self.live_latency_sum += live_latency
+            self.shadow_latency_sum += latency
+        SHADOW_PREDICT_DURATION.labels('live').observe(live_latency)
+        SHADOW_PREDICT_DURATION.labels('shadow').observe(latency)
+
+    @staticmethod
+    def _same_label(label, live_label) -> bool:
+        label = label.tolist() if hasattr(label, 'tolist') else label
+        live_label = live_label.tolist() if hasattr(live_label, 'tolist') else live_label
+        return label == live_label
+
+    @classmethod
+    def _lower_priority(cls) -> None:
+        # Linux applies the nice value per thread.
+        try:
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(),
+                           os.getpriority(os.PRIO_PROCESS, 0) + cls.NICE_INCREMENT)
+        except (AttributeError, OSError):
+            pass
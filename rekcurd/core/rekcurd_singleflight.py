@@ -0,0 +1,91 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+
+import asyncio
+import threading
+
+from concurrent.futures import Future
+from typing import Any, Callable, Hashable
+
+
+class RekcurdSingleFlight:
+    """ Coalescing of identical in-flight predictions
+
+    While a prediction of a key is running, callers of the same key wait for
+    it and share its result instead of predicting again. Nothing is kept
+    after the prediction finishes.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.coalesced = 0
+        self._futures = dict()
+        self._lock = threading.Lock()
+
+    def _join(self, key: Hashable, create_future: Callable):
+        with self._lock:
+            self.calls += 1
+            future = self._futures.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future, False
+            future = self._futures[key] = create_future()
+            return future, True
+
+    def _leave(self, key: Hashable) -> None:
+        with self._lock:
+            del self._futures[key]
+
+    def do(self, key: Hashable, func: Callable, *args) -> Any:
+        """ Call ``func(*args)`` unless the same key is in flight.
+
+        :param key: Identity of the call.
+        :param func: Function to call.
+        :return: Result of ``func``. Exceptions are raised to all the callers sharing it.
+        """
+        future, leader = self._join(key, Future)
+        if not leader:
+            return future.result()
+        try:
+            result = func(*args)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            self._leave(key)
+
+    async def do_async(self, key: Hashable, func: Callable, *args) -> Any:
+        """ asyncio version of :func:``do``. ``func`` is a coroutine function.
+        """
+        future, leader = self._join(key, asyncio.get_running_loop().create_future)
+        if not leader:
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                # The first caller has been cancelled. Predict by itself.
+                return await func(*args)
+        try:
+            result = await func(*args)
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Retrieved by the other callers. Don't warn if there is none.
+            future.exception()
+            raise
+        finally:
+            self._leave(key)
+
+    @property
+    def coalescing_ratio(self) -> float:
+        """ Ratio of the calls served by another in-flight call.
+        """
+        return self.coalesced / self.calls if self.calls else 0.0
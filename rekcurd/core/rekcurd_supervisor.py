@@ -0,0 +1,103 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+
+import os
+import signal
+import time
+
+from typing import Callable, Dict, Tuple
+
+from rekcurd.logger import SystemLoggerInterface
+
+
+class RekcurdSupervisor:
+    """ Pre-fork process supervisor
+
+    Fork ``processes`` children running ``target``. Everything loaded in the
+    parent before :func:``run`` (e.g. ML model) is shared with the children
+    as copy-on-write pages. Crashed children are restarted, and SIGTERM/SIGINT
+    received by the parent is passed on to the children. In a child,
+    ``worker_index`` tells its slot from 0 to ``processes - 1``, kept by the
+    restarted one.
+    """
+
+    RESTART_DELAY = 1.0
+
+    def __init__(self, target: Callable[[], None], processes: int, logger: SystemLoggerInterface):
+        if processes < 1:
+            raise ValueError("processes must be a positive integer.")
+        self.target = target
+        self.processes = processes
+        self.logger = logger
+        self.worker_index = None
+        self._children: Dict[int, Tuple[float, int]] = dict()
+        self._stopping = False
+
+    def run(self) -> None:
+        """ Start the children and supervise them until all of them exit.
+        """
+        handlers = {
+            signum: signal.signal(signum, self._handle_signal)
+            for signum in (signal.SIGTERM, signal.SIGINT)
+        }
+        try:
+            for index in range(self.processes):
+                self._spawn(index)
+            while self._children:
+                try:
+                    pid, status = os.wait()
+                except ChildProcessError:
+                    break
+                except InterruptedError:
+                    continue
+                child = self._children.pop(pid, None)
+                if child is None:
+                    continue
+                started_at, index = child
+                if self._stopping or self._is_clean_exit(status):
+                    self.logger.info("Rekcurd worker process {} exited.".format(pid))
+                    continue
+                self.logger.error("Rekcurd worker process {0} crashed with status {1}. Restart it.".format(pid, status))
+                if time.monotonic() - started_at < self.RESTART_DELAY:
+                    time.sleep(self.RESTART_DELAY)
+                if not self._stopping:
+                    self._spawn(index)
+        finally:
+            for signum, handler in handlers.items():
+                signal.signal(signum, handler)
+
+    def stop(self, signum: int = signal.SIGTERM) -> None:
+        """ Stop supervising and pass the signal on to the children.
+        """
+        self._stopping = True
+        for pid in list(self._children):
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                pass
+
+    def _spawn(self, index: int) -> None:
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            self.worker_index = index
+            try:
+                signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                signal.signal(signal.SIGINT, signal.default_int_handler)
+                self.target()
+            except BaseException as e:
+                self.logger.error(str(e))
+                code = 1
+            finally:
+                os._exit(code)
+        self._children[pid] = (time.monotonic(), index)
+        self.logger.info("Rekcurd worker process {} started.".format(pid))
+
+    def _handle_signal(self, signum, frame) -> None:
+        self.logger.info("Received signal {}. Stop rekcurd worker processes.".format(signum))
+        self.stop(signum)
+
+    @staticmethod
+    def _is_clean_exit(status: int) -> bool:
+        return os.WIFEXITED(status) and os.WEXITSTATUS(status) == 0
@@ -2,13 +2,34 @@
 # -*- coding: utf-8 -*-
 
 
+import asyncio
+import contextlib
+import contextvars
+import functools
+import json
+import os
+import signal
+import threading
+import time
+
 from abc import ABCMeta, abstractmethod
 from enum import Enum
-from typing import Generator
+from typing import Callable, Generator, List, Optional
 
 from rekcurd.utils import RekcurdConfig, PredictInput, PredictResult, EvaluateResult, EvaluateDetail, EvaluateResultDetail
-from rekcurd.logger import SystemLoggerInterface, ServiceLoggerInterface, JsonSystemLogger, JsonServiceLogger
+from rekcurd.utils import metrics, tracer
+from rekcurd.utils.rekcurd_metrics import MODEL_LOAD_DURATION
+from rekcurd.logger import SystemLoggerInterface, ServiceLoggerInterface
 from rekcurd.data_servers import DataServer
+from .rekcurd_cache import RekcurdCache
+from .rekcurd_model_registry import RekcurdModelRegistry
+from .rekcurd_singleflight import RekcurdSingleFlight
+from .rekcurd_supervisor import RekcurdSupervisor
+
+
+_type_input = contextvars.ContextVar('rekcurd_type_input', default=None)
+_type_output = contextvars.ContextVar('rekcurd_type_output', default=None)
+_deadline = contextvars.ContextVar('rekcurd_deadline', default=None)
 
 
 class Rekcurd(metaclass=ABCMeta):
@@ -19,6 +40,8 @@ class Rekcurd(metaclass=ABCMeta):
     _service_logger: ServiceLoggerInterface = None
     config: RekcurdConfig = None
     data_server: DataServer = None
+    _metrics_server = None
+    SHUTDOWN_SIGNALS = (signal.SIGTERM, signal.SIGINT)
 
     @abstractmethod
     def load_model(self, filepath: str) -> object:
@@ -43,6 +66,100 @@ class Rekcurd(metaclass=ABCMeta):
         """
         raise NotImplemented()
 
+    def unload_model(self, predictor: object) -> None:
+        """
+        unload_model
+        Called after the predictor has left the model registry and no request uses it.
+        Override it to free resources that garbage collection doesn't (e.g. GPU memory).
+        :param predictor: Your old ML predictor object. object
+        """
+        pass
+
+    def estimate_model_size(self, predictor: object, filepath: str) -> int:
+        """
+        estimate_model_size
+        Memory size of a predictor for "model_registry.max_memory_mb". The ML model file size by default.
+        :param predictor: Your ML predictor object. object
+        :param filepath: ML model file path. str
+        :return size: Size in bytes. int
+        """
+        return os.path.getsize(filepath) if os.path.isfile(filepath) else 0
+
+    def predict_batch(self, predictor: object, idata: List[PredictInput], option: List[dict] = None) -> List[PredictResult]:
+        """
+        predict_batch
+        Override it if your ML predictor supports vectorized prediction.
+        Concurrent requests of the same input/output type are grouped and passed at once.
+        :param predictor: Your ML predictor object. object
+        :param idata: List of input data. List[PredictInput]
+        :param option: List of miscellaneous. List[dict]
+        :return results: List of results in the same order as "idata". List[PredictResult]
+        """
+        if option is None:
+            option = [None] * len(idata)
+        return [self.predict(predictor, i, o) for i, o in zip(idata, option)]
+
+    async def predict_async(self, predictor: object, idata: PredictInput, option: dict = None) -> PredictResult:
+        """
+        predict_async
+        Override it if your prediction is I/O-bound (e.g. calling a feature store or other models).
+        Used in "async_mode". By default, "predict" runs in the thread pool executor.
+        :param predictor: Your ML predictor object. object
+        :param idata: Input data. PredictInput, one of string/bytes/arr[int]/arr[float]/arr[string]
+        :param option: Miscellaneous. dict
+        :return result: Result. PredictResult
+        """
+        func = functools.partial(contextvars.copy_context().run, self.predict, predictor, idata, option)
+        return await asyncio.get_running_loop().run_in_executor(None, func)
+
+    def warmup(self, predictor: object, idata: List[PredictInput]) -> None:
+        """
+        warmup
+        Called before the predictor takes traffic, on start and on "SwitchModel".
+        Override it to warm up your ML predictor in your own way (e.g. by "predict_batch").
+        :param predictor: Your ML predictor object. object
+        :param idata: Warmup inputs of "warmup.inputs" and "warmup.filepath". List[PredictInput]
+        """
+        for i in idata:
+            self.predict(predictor, i, {})
+
+    def load_warmup_data(self, filepath: str) -> List[PredictInput]:
+        """
+        load_warmup_data
+        Override it if your warmup file is not a JSON array of inputs.
+        :param filepath: Warmup data file path. str
+        :return: Warmup inputs. List[PredictInput]
+        """
+        with open(filepath, 'r') as f:
+            return json.load(f)
+
+    def get_time_remaining(self) -> Optional[float]:
+        """
+        get_time_remaining
+        Time budget of the current request. Use it in "predict"/"predict_async" to choose a cheaper path.
+        In "predict_batch", the budget of the request whose deadline is the earliest in the batch.
+        :return: Remaining seconds until the client deadline, or None if no deadline. float
+        """
+        deadline = _deadline.get()
+        return deadline - time.monotonic() if deadline is not None else None
+
+    def set_time_remaining(self, time_remaining: Optional[float]) -> contextvars.Token:
+        return _deadline.set(time.monotonic() + time_remaining if time_remaining is not None else None)
+
+    @contextlib.contextmanager
+    def use_time_remaining(self, time_remaining: Optional[float]):
+        """
+        use_time_remaining
+        Set the time budget of the request within the "with" block, so that it doesn't leak into the next request
+        handled on the same thread.
+        :param time_remaining: Remaining seconds until the client deadline, or None if no deadline. float
+        """
+        token = self.set_time_remaining(time_remaining)
+        try:
+            yield
+        finally:
+            _deadline.reset(token)
+
     @abstractmethod
     def evaluate(self, predictor: object, filepath: str) -> Generator[EvaluateResultDetail, None, EvaluateResult]:
         """
@@ -100,14 +217,18 @@ class Rekcurd(metaclass=ABCMeta):
     def load_config_file(self, config_file: str):
         self.config = RekcurdConfig(config_file)
 
-    def run(self, host: str = None, port: int = None, max_workers: int = None, **options):
-        import grpc
-        import os
-        import time
-        from concurrent import futures
-        from rekcurd.protobuf import rekcurd_pb2_grpc
-        from rekcurd import RekcurdDashboardServicer, RekcurdWorkerServicer
-
+    def run(self, host: str = None, port: int = None, max_workers: int = None, processes: int = None,
+            async_mode: bool = False, **options):
+        """
+        run
+        :param host: Service insecure host. str
+        :param port: Service insecure port. int
+        :param max_workers: Number of gRPC threads per process. "grpc.max_workers" by default. int
+            In "async_mode", number of threads running sync methods (e.g. "predict").
+        :param processes: Number of pre-forked worker processes sharing the ML model. int
+            The ML model is loaded once, and every process binds the same port with SO_REUSEPORT.
+        :param async_mode: Serve on "grpc.aio" and call "predict_async" on the event loop. bool
+        """
         if self.config is None:
             self.config = RekcurdConfig()
         if host and "service_insecure_host" in options:
@@ -118,62 +239,559 @@ class Rekcurd(metaclass=ABCMeta):
 
         self.data_server = DataServer(self.config)
         if self._system_logger is None:
+            from rekcurd.logger import JsonSystemLogger
             self._system_logger = JsonSystemLogger(config=self.config)
         if self._service_logger is None:
+            from rekcurd.logger import JsonServiceLogger
             self._service_logger = JsonServiceLogger(config=self.config)
         self.system_logger.info("Service start.")
         _host = "127.0.0.1"
         _port = 5000
         _max_workers = 1
+        _processes = 1
         host = host or self.config.SERVICE_INSECURE_HOST or _host
         port = int(port or self.config.SERVICE_INSECURE_PORT or _port)
-        max_workers = int(max_workers or _max_workers)
+        max_workers = int(max_workers or self.config.GRPC_MAX_WORKERS or _max_workers)
+        processes = int(processes or _processes)
+        if not async_mode:
+            max_workers = self._fit_max_workers(max_workers)
+
+        serve = self._serve_async if async_mode else self._serve
+        if processes > 1:
+            # Load the ML model before fork to share it.
+            try:
+                predictor = self.load_predictor()
+            except Exception as e:
+                self.system_logger.error(str(e))
+                print(str(e))
+                return
+            rekcurd_pack = RekcurdPack(self, predictor)
 
+            # Warm up in every worker process. Thread pools (e.g. BLAS) don't survive fork.
+            def serve_worker():
+                self.start_metrics_server(supervisor.worker_index)
+                self.start_tracer()
+                self.start_initializer(rekcurd_pack, predictor)
+                serve(rekcurd_pack, host, port, max_workers, reuse_port=True)
+            self.system_logger.info("Fork {} rekcurd worker processes.".format(processes))
+            supervisor = RekcurdSupervisor(serve_worker, processes, self.system_logger)
+            supervisor.run()
+        else:
+            rekcurd_pack = RekcurdPack(self, None)
+            self.start_metrics_server()
+            self.start_tracer()
+            self.start_initializer(rekcurd_pack)
+            serve(rekcurd_pack, host, port, max_workers)
+
+    def start_metrics_server(self, port_offset: int = 0) -> None:
+        """ Serve the metrics on "metrics.port" + ``port_offset`` in the Prometheus text format if it's set.
+        """
+        if self.config.METRICS_PORT <= 0:
+            return
+        port = self.config.METRICS_PORT + port_offset
+        self._metrics_server = metrics.start_http_server(port, self.config.METRICS_HOST)
+        self.system_logger.info("Serve metrics on {0}:{1}".format(self.config.METRICS_HOST, port))
+
+    def start_tracer(self) -> None:
+        """ Export the spans of "Predict_*" RPCs to "tracing.filepath" and/or "tracing.endpoint" if either is set.
+        """
+        if not self.config.TRACING_FILE_PATH and not self.config.TRACING_ENDPOINT:
+            return
+        tracer.start(self.config.APPLICATION_NAME or 'rekcurd', self.config.TRACING_FILE_PATH,
+                     self.config.TRACING_ENDPOINT, self.config.TRACING_SAMPLE_RATIO)
+        self.system_logger.info("Export spans to {}".format(
+            ', '.join(filter(None, [self.config.TRACING_FILE_PATH, self.config.TRACING_ENDPOINT]))))
+
+    def load_predictor(self) -> object:
+        """ Download and load the default ML model.
+        """
+        self.system_logger.info("Download model.")
+        model_path = self.data_server.get_model_path()
+        self.system_logger.info("Initialize predictor.")
+        predictor = self.load_model(model_path)
+        if predictor is None:
+            raise Exception("Error: No predictor found. Need your \"Rekcurd\" implementation.")
+        return predictor
+
+    def start_initializer(self, rekcurd_pack, predictor: object = None) -> threading.Thread:
+        """ Load (unless ``predictor`` is given) and warm up the default ML model in background.
+
+        The server starts meanwhile and the health service reports NOT_SERVING
+        until it finishes. If loading fails, the worker stays NOT_SERVING
+        until a successful "SwitchModel".
+        """
+        def initialize():
+            try:
+                with MODEL_LOAD_DURATION.time():
+                    _predictor = predictor if predictor is not None else self.load_predictor()
+                    self.run_warmup(_predictor)
+            except Exception as e:
+                self.system_logger.error("Loading model failed. {}".format(str(e)))
+                return
+            if not rekcurd_pack.set_initial_predictor(_predictor, switches):
+                # "SwitchModel" has won. It has also made the worker ready.
+                self.system_logger.info("Discard the initial model. The default model has been switched.")
+                if predictor is None:
+                    self.unload_model(_predictor)
+                return
+            rekcurd_pack.loaded = True
+            self.system_logger.info("Rekcurd worker is ready.")
+
+        switches = rekcurd_pack.switches
+        rekcurd_pack.loaded = False
+        thread = threading.Thread(target=initialize, name='rekcurd-initializer', daemon=True)
+        thread.start()
+        return thread
+
+    def run_warmup(self, predictor: object) -> None:
+        """ Call :func:``warmup`` "warmup.passes" times with the warmup inputs.
+
+        Failure of warmup is logged and doesn't stop serving.
+        """
+        passes = self.config.WARMUP_PASSES
+        if passes <= 0:
+            return
         try:
-            self.system_logger.info("Download model.")
-            model_path = self.data_server.get_model_path()
-            self.system_logger.info("Initialize predictor.")
-            predictor = self.load_model(model_path)
-            if predictor is None:
-                raise Exception("Error: No predictor found. Need your \"Rekcurd\" implementation.")
+            idata = list(self.config.WARMUP_INPUTS or [])
+            if self.config.WARMUP_FILE_PATH:
+                filepath = self.data_server.get_warmup_data_path(self.config.WARMUP_FILE_PATH)
+                idata.extend(self.load_warmup_data(filepath))
+            if self.config.NUMPY_MODE:
+                idata = self._convert_numpy_inputs(idata)
+            self.system_logger.info("Warm up predictor.")
+            start = time.monotonic()
+            for _ in range(passes):
+                self.warmup(predictor, idata)
+            self.system_logger.info("Warmup finished. {0} passes of {1} inputs in {2:.3f} sec.".format(
+                passes, len(idata), time.monotonic() - start))
         except Exception as e:
-            self.system_logger.error(str(e))
-            print(str(e))
-            return
+            self.system_logger.error("Warmup failed. {}".format(str(e)))
+
+    @staticmethod
+    def _convert_numpy_inputs(idata: List[PredictInput]) -> List[PredictInput]:
+        """ Convert ArrInt/ArrFloat inputs to numpy arrays in the same way as requests in numpy mode.
+
+        The type of a warmup input is not declared, so a list of ints is taken as ArrInt and
+        a list of numbers including a float as ArrFloat. The others are left as they are.
+        """
+        from .rekcurd_worker_servicer import RekcurdWorkerServicer
+        converters = RekcurdWorkerServicer.build_numpy_converters()
+        Type = RekcurdWorkerServicer.Type
+        converted = list()
+        for i in idata:
+            if isinstance(i, list) and i and all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in i):
+                type_input = Type.ARRAY_INT if all(isinstance(v, int) for v in i) else Type.ARRAY_FLOAT
+                i = converters[type_input](i)
+            converted.append(i)
+        return converted
+
+    def _fit_max_workers(self, max_workers: int) -> int:
+        """ Number of gRPC threads which can hold every request allowed by "admission".
+
+        Requests beyond the threads wait in the gRPC queue, where neither "max_queue" nor the deadline is checked.
+        """
+        config = self.config
+        if config.ADMISSION_MAX_INFLIGHT <= 0:
+            return max_workers
+        required = config.ADMISSION_MAX_INFLIGHT + max(config.ADMISSION_MAX_QUEUE, 0)
+        if max_workers < required:
+            self.system_logger.warn(
+                "Raise gRPC max_workers from {0} to {1} to fit admission.max_inflight + admission.max_queue.".format(
+                    max_workers, required))
+            return required
+        return max_workers
 
-        rekcurd_pack = RekcurdPack(self, predictor)
-        server = grpc.server(futures.ThreadPoolExecutor(max_workers=max_workers))
-        rekcurd_pb2_grpc.add_RekcurdDashboardServicer_to_server(
-            RekcurdDashboardServicer(rekcurd_pack), server)
-        rekcurd_pb2_grpc.add_RekcurdWorkerServicer_to_server(
-            RekcurdWorkerServicer(rekcurd_pack), server)
+    def _get_server_options(self, reuse_port: bool = False) -> list:
+        """ gRPC channel arguments from "grpc" configurations. Unset ones are left to gRPC defaults.
+
+        SO_REUSEPORT is always set explicitly, because gRPC enables it by default on Linux
+        and another server could then bind the same port silently.
+        """
+        config = self.config
+        options = [("grpc.so_reuseport", int(reuse_port or config.GRPC_SO_REUSEPORT))]
+        if config.GRPC_MAX_SEND_MESSAGE_LENGTH:
+            options.append(("grpc.max_send_message_length", config.GRPC_MAX_SEND_MESSAGE_LENGTH))
+        if config.GRPC_MAX_RECEIVE_MESSAGE_LENGTH:
+            options.append(("grpc.max_receive_message_length", config.GRPC_MAX_RECEIVE_MESSAGE_LENGTH))
+        if config.GRPC_MAX_CONCURRENT_STREAMS > 0:
+            options.append(("grpc.max_concurrent_streams", config.GRPC_MAX_CONCURRENT_STREAMS))
+        if config.GRPC_KEEPALIVE_TIME_MS > 0:
+            options.append(("grpc.keepalive_time_ms", config.GRPC_KEEPALIVE_TIME_MS))
+        if config.GRPC_KEEPALIVE_TIMEOUT_MS > 0:
+            options.append(("grpc.keepalive_timeout_ms", config.GRPC_KEEPALIVE_TIMEOUT_MS))
+        if config.GRPC_KEEPALIVE_PERMIT_WITHOUT_CALLS:
+            options.append(("grpc.keepalive_permit_without_calls", 1))
+        if config.GRPC_MIN_PING_INTERVAL_MS > 0:
+            options.append(("grpc.http2.min_recv_ping_interval_without_data_ms", config.GRPC_MIN_PING_INTERVAL_MS))
+        return options
+
+    def _get_compression(self):
+        """ Default response compression from "grpc.compression". None, "gzip" or "deflate".
+        """
+        import grpc
+        compression = (self.config.GRPC_COMPRESSION or "none").lower()
+        compressions = {
+            "none": None,
+            "gzip": grpc.Compression.Gzip,
+            "deflate": grpc.Compression.Deflate,
+        }
+        if compression not in compressions:
+            raise ValueError("'{}' is not supported as gRPC compression".format(self.config.GRPC_COMPRESSION))
+        return compressions[compression]
+
+    def _serve(self, rekcurd_pack, host: str, port: int, max_workers: int, reuse_port: bool = False):
+        import grpc
+        from rekcurd.protobuf import rekcurd_pb2_grpc
+        from rekcurd import RekcurdDashboardServicer, RekcurdWorkerServicer
+        from rekcurd.core.rekcurd_worker_servicer import add_RekcurdWorkerServicer_extensions_to_server
+        from rekcurd.core.rekcurd_dashboard_servicer import add_RekcurdDashboardServicer_extensions_to_server
+        from rekcurd.core.rekcurd_health_servicer import RekcurdHealthServicer, add_RekcurdHealthServicer_to_server
+        from rekcurd.core.rekcurd_metrics_interceptor import RekcurdMetricsInterceptor, RekcurdThreadPoolExecutor
+
+        server = grpc.server(RekcurdThreadPoolExecutor(max_workers=max_workers),
+                             interceptors=[RekcurdMetricsInterceptor()],
+                             options=self._get_server_options(reuse_port),
+                             compression=self._get_compression())
+        dashboard_servicer = RekcurdDashboardServicer(rekcurd_pack)
+        rekcurd_pb2_grpc.add_RekcurdDashboardServicer_to_server(dashboard_servicer, server)
+        add_RekcurdDashboardServicer_extensions_to_server(dashboard_servicer, server)
+        worker_servicer = RekcurdWorkerServicer(rekcurd_pack)
+        rekcurd_pb2_grpc.add_RekcurdWorkerServicer_to_server(worker_servicer, server)
+        add_RekcurdWorkerServicer_extensions_to_server(worker_servicer, server)
+        add_RekcurdHealthServicer_to_server(RekcurdHealthServicer(rekcurd_pack), server)
         server.add_insecure_port("{0}:{1}".format(host, port))
         self.system_logger.info("Start rekcurd worker on {0}:{1}".format(host, port))
         server.start()
+        stopping = threading.Event()
+        handlers = self._set_shutdown_handlers(stopping.set)
+        try:
+            if os.getenv("REKCURD_UNITTEST", "False").lower() == 'false':
+                stopping.wait()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._restore_signal_handlers(handlers)
+            self._prepare_shutdown(rekcurd_pack)
+            if self.config.SHUTDOWN_PRE_STOP_DELAY_SEC > 0:
+                time.sleep(self.config.SHUTDOWN_PRE_STOP_DELAY_SEC)
+            server.stop(self.config.SHUTDOWN_GRACE_PERIOD_SEC).wait()
+            worker_servicer.close()
+            self._finish_shutdown()
+
+    def _serve_async(self, rekcurd_pack, host: str, port: int, max_workers: int, reuse_port: bool = False):
         try:
-            while os.getenv("REKCURD_UNITTEST", "False").lower() == 'false':
-                time.sleep(86400)
+            asyncio.run(self._serve_aio(rekcurd_pack, host, port, max_workers, reuse_port))
         except KeyboardInterrupt:
             self.system_logger.info("Shutdown rekcurd worker.")
+
+    async def _serve_aio(self, rekcurd_pack, host: str, port: int, max_workers: int, reuse_port: bool = False):
+        import grpc
+        from concurrent import futures
+        from rekcurd.protobuf import rekcurd_pb2_grpc
+        from rekcurd import RekcurdDashboardServicer, RekcurdAsyncWorkerServicer
+        from rekcurd.core.rekcurd_worker_servicer import add_RekcurdWorkerServicer_extensions_to_server
+        from rekcurd.core.rekcurd_dashboard_servicer import add_RekcurdDashboardServicer_extensions_to_server
+        from rekcurd.core.rekcurd_health_servicer import RekcurdHealthServicer, add_RekcurdHealthServicer_to_server
+        from rekcurd.core.rekcurd_metrics_interceptor import (
+            RekcurdAsyncMetricsInterceptor, RekcurdThreadPoolExecutor
+        )
+
+        # Sync methods (e.g. dashboard RPCs and "predict") run on this executor.
+        executor = RekcurdThreadPoolExecutor(max_workers=max_workers)
+        # Blocking calls of async methods (e.g. "predict_batch") run on the default executor.
+        if self.config.GRPC_EXECUTOR_MAX_WORKERS > 0:
+            asyncio.get_running_loop().set_default_executor(
+                futures.ThreadPoolExecutor(max_workers=self.config.GRPC_EXECUTOR_MAX_WORKERS))
+        else:
+            asyncio.get_running_loop().set_default_executor(executor)
+        server = grpc.aio.server(migration_thread_pool=executor,
+                                 interceptors=[RekcurdAsyncMetricsInterceptor()],
+                                 options=self._get_server_options(reuse_port),
+                                 compression=self._get_compression())
+        dashboard_servicer = RekcurdDashboardServicer(rekcurd_pack)
+        rekcurd_pb2_grpc.add_RekcurdDashboardServicer_to_server(dashboard_servicer, server)
+        add_RekcurdDashboardServicer_extensions_to_server(dashboard_servicer, server)
+        worker_servicer = RekcurdAsyncWorkerServicer(rekcurd_pack)
+        rekcurd_pb2_grpc.add_RekcurdWorkerServicer_to_server(worker_servicer, server)
+        add_RekcurdWorkerServicer_extensions_to_server(worker_servicer, server)
+        add_RekcurdHealthServicer_to_server(RekcurdHealthServicer(rekcurd_pack), server)
+        server.add_insecure_port("{0}:{1}".format(host, port))
+        self.system_logger.info("Start rekcurd worker on {0}:{1} in async mode".format(host, port))
+        await server.start()
+        stopping = asyncio.Event()
+        signums = self._add_shutdown_handlers_async(stopping.set)
+        try:
+            if os.getenv("REKCURD_UNITTEST", "False").lower() == 'false':
+                await stopping.wait()
         finally:
-            server.stop(0)
+            for signum in signums:
+                asyncio.get_running_loop().remove_signal_handler(signum)
+            self._prepare_shutdown(rekcurd_pack)
+            if self.config.SHUTDOWN_PRE_STOP_DELAY_SEC > 0:
+                await asyncio.sleep(self.config.SHUTDOWN_PRE_STOP_DELAY_SEC)
+            await server.stop(self.config.SHUTDOWN_GRACE_PERIOD_SEC)
+            worker_servicer.close()
+            self._finish_shutdown()
+
+    def _set_shutdown_handlers(self, callback: Callable[[], None]) -> dict:
+        """ Call ``callback`` on SIGTERM/SIGINT. Signal handlers can only be set on the main thread.
+
+        :return: Previous handlers.
+        """
+        if threading.current_thread() is not threading.main_thread():
+            return dict()
+
+        def handler(signum, frame):
+            self.system_logger.info("Received signal {}.".format(signum))
+            callback()
+        return {signum: signal.signal(signum, handler) for signum in self.SHUTDOWN_SIGNALS}
+
+    @staticmethod
+    def _restore_signal_handlers(handlers: dict) -> None:
+        for signum, handler in handlers.items():
+            signal.signal(signum, handler)
+
+    def _add_shutdown_handlers_async(self, callback: Callable[[], None]) -> list:
+        """ asyncio version of :func:``_set_shutdown_handlers``.
+
+        :return: Signals handled.
+        """
+        if threading.current_thread() is not threading.main_thread():
+            return []
+
+        def handler(signum):
+            self.system_logger.info("Received signal {}.".format(signum))
+            callback()
+        loop = asyncio.get_running_loop()
+        signums = list()
+        for signum in self.SHUTDOWN_SIGNALS:
+            try:
+                loop.add_signal_handler(signum, handler, signum)
+                signums.append(signum)
+            except (NotImplementedError, RuntimeError, ValueError):
+                pass
+        return signums
+
+    def _prepare_shutdown(self, rekcurd_pack) -> None:
+        rekcurd_pack.stopping = True
+        self.system_logger.info("Shutdown rekcurd worker. Wait {} sec at most for in-flight requests.".format(
+            self.config.SHUTDOWN_GRACE_PERIOD_SEC))
+
+    def _finish_shutdown(self) -> None:
+        if self._metrics_server is not None:
+            self._metrics_server.shutdown()
+            self._metrics_server.server_close()
+            self._metrics_server = None
+        tracer.shutdown()
+        self.system_logger.info("Rekcurd worker stopped.")
+        self.system_logger.flush()
+        self.service_logger.flush()
 
     # TODO: DEPRECATED BELOW
+    # Types are stored per thread/asyncio task, so that concurrent requests don't overwrite each other.
+    # The last types set are kept process-wide as well for the code running outside a request.
     __type_input = None
     __type_output = None
 
     def set_type(self, type_input: Enum, type_output: Enum) -> None:
+        _type_input.set(type_input)
+        _type_output.set(type_output)
         self.__type_input = type_input
         self.__type_output = type_output
 
     def get_type_input(self) -> Enum:
-        return self.__type_input
+        type_input = _type_input.get()
+        return self.__type_input if type_input is None else type_input
 
     def get_type_output(self) -> Enum:
-        return self.__type_output
+        type_output = _type_output.get()
+        return self.__type_output if type_output is None else type_output
 
 
 class RekcurdPack:
-    def __init__(self, app: Rekcurd, predictor: object):
+    """ Predictors shared by the servicers
+
+    ``predictor`` is the default ML model. Other models named by their file
+    path are loaded on demand and kept in :class:``RekcurdModelRegistry``
+    until evicted. Evicted predictors are passed to :func:``Rekcurd.unload_model``
+    once the requests using them finish.
+    """
+
+    def __init__(self, app: Rekcurd, predictor: object, model_name: str = None):
         self.app = app
+        config = app.config
+        if config is not None and config.CACHE_MAX_SIZE > 0:
+            self.cache = RekcurdCache(config.CACHE_MAX_SIZE, config.CACHE_TTL_SEC)
+        else:
+            self.cache = None
+        if config is not None:
+            self.registry = RekcurdModelRegistry(
+                config.MODEL_REGISTRY_MAX_MODELS, int(config.MODEL_REGISTRY_MAX_MEMORY_MB * 1024 * 1024))
+        else:
+            self.registry = RekcurdModelRegistry()
+        if model_name is None and config is not None:
+            model_name = config.MODEL_FILE_PATH
+        self.model_name = model_name
+        self._loader = RekcurdSingleFlight()
+        self._inflight = dict()
+        self._retired = dict()
+        self._condition = threading.Condition()
+        # False while the default ML model is loaded in background on start.
+        self.loaded = True
+        # True once the worker starts to shut down.
+        self.stopping = False
+        # Incremented by every switch of the default model.
+        self.switches = 0
         self.predictor = predictor
+
+    @property
+    def ready(self) -> bool:
+        """ Whether the worker should take traffic. Reported by the health service.
+        """
+        return self.loaded and not self.stopping
+
+    @property
+    def predictor(self) -> object:
+        return self._predictor
+
+    @predictor.setter
+    def predictor(self, predictor: object):
+        with self._condition:
+            self._predictor = predictor
+            if predictor is not None:
+                self.registry.put(self.model_name, predictor)
+            # Results of the previous ML model must not be served any more.
+            if self.cache is not None:
+                self.cache.clear()
+
+    def set_initial_predictor(self, predictor: object, switches: int) -> bool:
+        """ Install the predictor loaded on start, unless the default model has been switched meanwhile.
+
+        :param predictor: Predictor of the default ML model.
+        :param switches: :attr:``switches`` when the load started.
+        :return: True if installed.
+        """
+        with self._condition:
+            if self.switches != switches:
+                return False
+            self.predictor = predictor
+            return True
+
+    @property
+    def routing_enabled(self) -> bool:
+        """ Whether requests may choose a model other than the default one.
+        """
+        return self.registry.max_models > 1
+
+    @contextlib.contextmanager
+    def use_predictor(self, model_name: str = None):
+        """ Hold a predictor in the ``with`` block, so that it is not swapped out or unloaded meanwhile.
+
+        :param model_name: ML model file path. The default model if None. Loaded if not resident.
+        """
+        while True:
+            with self._condition:
+                if model_name is None or model_name == self.model_name:
+                    predictor = self._predictor
+                else:
+                    predictor = self.registry.get(model_name)
+                if predictor is not None or model_name is None or model_name == self.model_name:
+                    key = id(predictor)
+                    self._inflight[key] = self._inflight.get(key, 0) + 1
+                    break
+            self.get_model(model_name)
+        try:
+            yield predictor
+        finally:
+            unload = None
+            with self._condition:
+                self._inflight[key] -= 1
+                if self._inflight[key] == 0:
+                    del self._inflight[key]
+                    unload = self._retired.pop(key, None)
+            if unload is not None:
+                self._unload([unload])
+
+    def get_model(self, model_name: str, reload: bool = False) -> object:
+        """ Resident predictor of the ML model. Download, load and warm it up if not resident.
+
+        Concurrent calls for the same model share one load.
+
+        :param model_name: ML model file path.
+        :param reload: Load it again even if resident.
+        :return: Predictor.
+        """
+        predictor = None if reload else self.registry.get(model_name)
+        if predictor is not None:
+            return predictor
+        return self._loader.do(model_name, self._load_model, model_name)
+
+    def set_default_model(self, model_name: str) -> object:
+        """ Repoint the default model. The previous one stays resident until evicted.
+
+        :param model_name: ML model file path.
+        :return: Previous default predictor.
+        """
+        while True:
+            predictor = self.get_model(model_name)
+            with self._condition:
+                if self.registry.get(model_name) is not predictor:
+                    # Evicted by another load meanwhile.
+                    continue
+                old_name, old_predictor = self.model_name, self._predictor
+                self.model_name = model_name
+                self._predictor = predictor
+                self.switches += 1
+                if self.cache is not None:
+                    self.cache.clear()
+                unload = self._evict()
+                if old_name == model_name and old_predictor is not None and old_predictor is not predictor:
+                    # Reloaded. The old one has already left the registry.
+                    unload.extend(self._release(old_predictor))
+                break
+        self._unload(unload)
+        return old_predictor
+
+    def _load_model(self, model_name: str) -> object:
+        app = self.app
+        app.system_logger.info("Load model. {}".format(model_name))
+        with MODEL_LOAD_DURATION.time():
+            local_filepath = app.data_server.download_model(model_name)
+            predictor = app.load_model(local_filepath)
+            app.run_warmup(predictor)
+        size = app.estimate_model_size(predictor, local_filepath)
+        with self._condition:
+            replaced = self.registry.put(model_name, predictor, size)
+            unload = self._evict(model_name)
+            if replaced is not None and replaced is not self._predictor:
+                unload.extend(self._release(replaced))
+        self._unload(unload)
+        return predictor
+
+    def _evict(self, *keep: str) -> List[object]:
+        """ Evict models over the limits. Must hold ``_condition``.
+
+        :return: Predictors which can be unloaded now. The others are unloaded when released.
+        """
+        unload = []
+        for name, predictor in self.registry.evict(self.model_name, *keep):
+            self.app.system_logger.info("Evict model. {}".format(name))
+            unload.extend(self._release(predictor))
+        return unload
+
+    def _release(self, predictor: object) -> List[object]:
+        """ Unload a predictor which left the registry after its requests finish. Must hold ``_condition``.
+        """
+        if predictor is self._predictor:
+            return []
+        if id(predictor) in self._inflight:
+            self._retired[id(predictor)] = predictor
+            return []
+        return [predictor]
+
+    def _unload(self, predictors: List[object]) -> None:
+        for predictor in predictors:
+            try:
+                self.app.unload_model(predictor)
+            except Exception as e:
+                self.app.system_logger.error(str(e))
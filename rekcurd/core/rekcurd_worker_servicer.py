@@ -2,14 +2,31 @@
 # -*- coding: utf-8 -*-
 
 
+import contextlib
+import functools
+import grpc
 import json
+import queue
+import threading
+import time
 
+from concurrent import futures
 from enum import Enum
+from google.protobuf import descriptor_pb2
 from grpc import ServicerContext
-from typing import Iterator, Union
+from typing import Callable, Dict, Hashable, Iterator, List, NamedTuple, Optional, Tuple, Union
 
 from .rekcurd_worker import RekcurdPack
-from rekcurd.utils import PredictResult
+from .rekcurd_admission import RekcurdAdmissionController
+from .rekcurd_batcher import RekcurdBatcher
+from .rekcurd_cache import RekcurdCache
+from .rekcurd_shadow import RekcurdShadow
+from .rekcurd_singleflight import RekcurdSingleFlight
+from . import rekcurd_batch_messages
+from rekcurd.utils import PredictInput, PredictResult, metrics, tracer, getForwardHeaders
+from rekcurd.utils.rekcurd_metrics import (
+    PREDICT_BATCH_DURATION, PREDICT_BATCH_SIZE, PREDICT_DURATION, PREDICT_ERRORS, SERVICE_LOG_DURATION
+)
 from rekcurd.protobuf import rekcurd_pb2, rekcurd_pb2_grpc
 
 
@@ -20,6 +37,28 @@ RekcurdOutput = Union[
     rekcurd_pb2.StringOutput, rekcurd_pb2.BytesOutput,
     rekcurd_pb2.ArrIntOutput, rekcurd_pb2.ArrFloatOutput, rekcurd_pb2.ArrStringOutput]
 
+INVALID_STREAM_MESSAGE = 'Error: "{0}" takes exactly one message. Use "Stream{0}" for more.'
+
+
+def to_builtin(value):
+    """ Convert numpy arrays and scalars to builtin types at once, since protobuf checks them element by element.
+    """
+    return value.tolist() if hasattr(value, 'tolist') else value
+
+
+class PredictRpc(NamedTuple):
+    """ Static description of a "Predict_*" RPC.
+    """
+    name: str
+    type_input: Enum
+    type_output: Enum
+    request_class: type
+    response_class: type
+    client_streaming: bool
+    server_streaming: bool
+    batch_request_class: type
+    batch_response_class: type
+
 
 class RekcurdWorkerServicer(rekcurd_pb2_grpc.RekcurdWorkerServicer):
     class Type(Enum):
@@ -29,262 +68,656 @@ class RekcurdWorkerServicer(rekcurd_pb2_grpc.RekcurdWorkerServicer):
         ARRAY_FLOAT = 4
         ARRAY_STRING = 5
 
+    MODEL_OPTION_KEY = 'model_path'
+    MODEL_METADATA_KEY = 'x-rekcurd-model-path'
+
     def __init__(self, rekcurd_pack: RekcurdPack):
         self.rekcurd_pack = rekcurd_pack
+        self.rpcs = self.build_rpcs()
+        self.rpc_names = {(rpc.type_input, rpc.type_output): rpc.name for rpc in self.rpcs.values()}
         self.system_logger = rekcurd_pack.app.system_logger
         self.service_logger = rekcurd_pack.app.service_logger
+        config = rekcurd_pack.app.config
+        if config is not None and config.BATCHING_MAX_SIZE > 1:
+            self.batcher = RekcurdBatcher(rekcurd_pack, config.BATCHING_MAX_SIZE, config.BATCHING_MAX_WAIT_MS)
+        else:
+            self.batcher = None
+        self.stream_max_inflight = config.STREAMING_MAX_INFLIGHT if config is not None else 1
+        if self.stream_max_inflight > 1:
+            # Every stream holds a gRPC thread, so at most "grpc.max_workers" streams run at once.
+            self.stream_executor = futures.ThreadPoolExecutor(
+                max_workers=self.stream_max_inflight * max(config.GRPC_MAX_WORKERS, 1),
+                thread_name_prefix='rekcurd-stream')
+        else:
+            self.stream_executor = None
+        self.cancelled = 0
+        self.expired = 0
+        self.counter_lock = threading.Lock()
+        if config is not None and config.ADMISSION_MAX_INFLIGHT > 0:
+            self.admission = RekcurdAdmissionController(config.ADMISSION_MAX_INFLIGHT, config.ADMISSION_MAX_QUEUE)
+        else:
+            self.admission = None
+        if config is not None and config.COALESCING_ENABLED:
+            self.singleflight = RekcurdSingleFlight()
+        else:
+            self.singleflight = None
+        if config is not None and config.SHADOW_FILE_PATH and config.SHADOW_RATIO > 0:
+            self.shadow = RekcurdShadow(rekcurd_pack, config.SHADOW_FILE_PATH, config.SHADOW_RATIO,
+                                        config.SHADOW_MAX_WORKERS, config.SHADOW_MAX_QUEUE)
+        else:
+            self.shadow = None
+        if config is not None and config.NUMPY_MODE:
+            self.numpy_converters = self.build_numpy_converters()
+        else:
+            self.numpy_converters = dict()
+        self.register_metrics()
+
+    @classmethod
+    def build_numpy_converters(cls) -> Dict[Enum, Callable]:
+        """ Converters of ArrInt/ArrFloat inputs to numpy arrays of int64/float64 in numpy mode.
+        """
+        import numpy
+        return {
+            cls.Type.ARRAY_INT: functools.partial(numpy.array, dtype=numpy.int64),
+            cls.Type.ARRAY_FLOAT: functools.partial(numpy.array, dtype=numpy.float64),
+        }
+
+    @classmethod
+    def build_rpcs(cls) -> Dict[str, PredictRpc]:
+        """ Build the table of "Predict_*" RPCs from the service definition.
+        """
+        types = {
+            'String': cls.Type.STRING,
+            'Bytes': cls.Type.BYTES,
+            'ArrInt': cls.Type.ARRAY_INT,
+            'ArrFloat': cls.Type.ARRAY_FLOAT,
+            'ArrString': cls.Type.ARRAY_STRING,
+        }
+        rpcs = dict()
+        for method_descriptor in rekcurd_pb2.DESCRIPTOR.services_by_name['RekcurdWorker'].methods:
+            # Streaming flags are only available through the descriptor proto.
+            method_proto = descriptor_pb2.MethodDescriptorProto()
+            method_descriptor.CopyToProto(method_proto)
+            rpcs[method_descriptor.name] = PredictRpc(
+                name=method_descriptor.name,
+                type_input=types[method_descriptor.input_type.name[:-len('Input')]],
+                type_output=types[method_descriptor.output_type.name[:-len('Output')]],
+                request_class=getattr(rekcurd_pb2, method_descriptor.input_type.name),
+                response_class=getattr(rekcurd_pb2, method_descriptor.output_type.name),
+                client_streaming=method_proto.client_streaming,
+                server_streaming=method_proto.server_streaming,
+                batch_request_class=getattr(rekcurd_batch_messages, 'Batch' + method_descriptor.input_type.name),
+                batch_response_class=getattr(rekcurd_batch_messages, 'Batch' + method_descriptor.output_type.name))
+        return rpcs
 
     def Process(self,
                 request: RekcurdInput,
                 context: ServicerContext,
-                response: RekcurdOutput
+                response: RekcurdOutput,
+                type_input: Enum = None,
+                type_output: Enum = None
                 ) -> RekcurdOutput:
 
-        input = request.input
-        try:
-            ioption = json.loads(request.option.val)
-        except:
-            ioption = {request.option.val: request.option.val}
-
-        single_output = self.rekcurd_pack.app.get_type_output() in [self.Type.STRING, self.Type.BYTES]
+        self.check_context(context)
+        with self.trace(context, self.get_rpc_name(type_input, type_output)) as trace:
+            with trace.span('parse_option'):
+                ioption = self.parse_option(request)
+
+            type_input, type_output = self.resolve_types(type_input, type_output)
+            input = self.parse_input(request, type_input)
+            single_output = type_output in [self.Type.STRING, self.Type.BYTES]
+            with self.admit(context):
+                # Read after admission, so that the time waiting for it is not counted as budget.
+                time_remaining = context.time_remaining() if context is not None else None
+                with self.rekcurd_pack.app.use_time_remaining(time_remaining):
+                    try:
+                        model_name = self.get_model_name(ioption, context)
+                        start = time.monotonic()
+                        with trace.span('predict'):
+                            result = self.predict_shared(input, ioption, type_input, type_output, model_name)
+                        live_latency = time.monotonic() - start
+                    except Exception as e:
+                        self.system_logger.error(str(e))
+                        PREDICT_ERRORS.labels(self.get_rpc_name(type_input, type_output)).inc()
+                        result = self.get_default_result(response, single_output)
+                    else:
+                        if model_name is None:
+                            self.mirror_shadow(input, ioption, result, live_latency)
+
+            with trace.span('encode_response'):
+                self.set_response(response, result, single_output)
+            with trace.span('service_log'), SERVICE_LOG_DURATION.time():
+                self.service_logger.emit(request, response, ioption.get('suppress_log_inout', False))
+            return response
+
+    def mirror_shadow(self, input: PredictInput, ioption: dict, result: PredictResult, live_latency: float) -> None:
+        """ Mirror a live prediction to the shadow model if enabled. Never fails the live response.
+        """
+        if self.shadow is None:
+            return
         try:
-            result = self.rekcurd_pack.app.predict(self.rekcurd_pack.predictor, input, ioption)
+            self.shadow.mirror(input, ioption, result, live_latency)
         except Exception as e:
-            self.system_logger.error(str(e))
-            if single_output:
-                if isinstance(response, rekcurd_pb2.StringOutput):
-                    label = "None"
-                elif isinstance(response, rekcurd_pb2.BytesOutput):
-                    label = b'None'
-                else:
-                    label = None
-                result = PredictResult(label=label, score=0.0, option={})
+            self.system_logger.error("Shadow mirroring failed. {}".format(str(e)))
+
+    def get_rpc_name(self, type_input: Enum, type_output: Enum) -> str:
+        """ "Predict_{Input}_{Output}" of the types. Label of the metrics.
+        """
+        return self.rpc_names.get((type_input, type_output), 'Predict')
+
+    def close(self) -> None:
+        """ Release the threads of the components. Called when the server is stopped.
+        """
+        if self.shadow is not None:
+            self.shadow.close()
+        if self.stream_executor is not None:
+            self.stream_executor.shutdown(wait=False)
+
+    def register_metrics(self) -> None:
+        """ Export the counters kept by this servicer and its components.
+        """
+        metrics.callback('rekcurd_cancelled_total', 'Requests cancelled by the client before prediction.',
+                         lambda: self.cancelled)
+        metrics.callback('rekcurd_expired_total', 'Requests whose deadline passed before prediction.',
+                         lambda: self.expired)
+        registry = self.rekcurd_pack.registry
+        metrics.callback('rekcurd_models_loaded', 'ML models kept in the model registry.',
+                         lambda: len(registry), 'gauge')
+        metrics.callback('rekcurd_model_evictions_total', 'ML models evicted from the model registry.',
+                         lambda: registry.evictions)
+        cache = self.rekcurd_pack.cache
+        if cache is not None:
+            metrics.callback('rekcurd_cache_hits_total', 'Prediction cache hits.', lambda: cache.hits)
+            metrics.callback('rekcurd_cache_misses_total', 'Prediction cache misses.', lambda: cache.misses)
+        if self.admission is not None:
+            admission = self.admission
+            metrics.callback('rekcurd_admission_rejected_total', 'Requests rejected by admission control.',
+                             lambda: admission.rejected)
+            metrics.callback('rekcurd_admission_expired_total', 'Requests expired in the admission queue.',
+                             lambda: admission.expired)
+            metrics.callback('rekcurd_admission_waiting', 'Requests waiting in the admission queue.',
+                             lambda: admission.waiting, 'gauge')
+        if self.singleflight is not None:
+            singleflight = self.singleflight
+            metrics.callback('rekcurd_coalesced_total', 'Requests coalesced into an identical in-flight one.',
+                             lambda: singleflight.coalesced)
+            metrics.callback('rekcurd_coalescing_calls_total', 'Requests passed through request coalescing.',
+                             lambda: singleflight.calls)
+            metrics.callback('rekcurd_coalescing_ratio', 'Ratio of requests coalesced into an identical in-flight one.',
+                             lambda: singleflight.coalescing_ratio, 'gauge')
+        if self.shadow is not None:
+            shadow = self.shadow
+            metrics.callback('rekcurd_shadow_mirrored_total', 'Predictions mirrored to the shadow model.',
+                             lambda: shadow.mirrored)
+            metrics.callback('rekcurd_shadow_dropped_total', 'Mirrors dropped by the shadow queue limit.',
+                             lambda: shadow.dropped)
+            metrics.callback('rekcurd_shadow_agreement_rate', 'Label agreement rate of the shadow model.',
+                             lambda: shadow.get_stats()['agreement_rate'], 'gauge')
+
+    # noinspection PyMethodMayBeStatic
+    def trace(self, context: ServicerContext, name: str):
+        """ Context manager tracing a request under the B3 headers forwarded in the metadata.
+        """
+        headers = dict(getForwardHeaders(context.invocation_metadata() or ())) if context is not None else dict()
+        return tracer.trace(name, headers)
+
+    def check_context(self, context: ServicerContext) -> None:
+        """ Abort the RPC before any work if the client has cancelled it or its deadline has passed,
+        or the ML model is still being loaded.
+        """
+        if context is None:
+            return
+        if not context.is_active():
+            self.count_dropped(grpc.StatusCode.CANCELLED)
+            context.abort(grpc.StatusCode.CANCELLED, "Error: Cancelled by the client.")
+        time_remaining = context.time_remaining()
+        if time_remaining is not None and time_remaining <= 0:
+            self.count_dropped(grpc.StatusCode.DEADLINE_EXCEEDED)
+            context.abort(grpc.StatusCode.DEADLINE_EXCEEDED, "Error: Deadline exceeded.")
+        if not self.rekcurd_pack.loaded:
+            context.abort(grpc.StatusCode.UNAVAILABLE, "Error: ML model is not loaded yet.")
+
+    def count_dropped(self, code: grpc.StatusCode) -> None:
+        with self.counter_lock:
+            if code is grpc.StatusCode.CANCELLED:
+                self.cancelled += 1
+            else:
+                self.expired += 1
+
+    def admit(self, context: ServicerContext):
+        """ Context manager holding a slot of :class:``RekcurdAdmissionController`` if enabled.
+        """
+        if self.admission is None:
+            return contextlib.nullcontext()
+        return self.admission.admit(context)
+
+    def get_model_name(self, ioption: dict, context: ServicerContext) -> Optional[str]:
+        """ ML model chosen by ``MODEL_OPTION_KEY`` option or ``MODEL_METADATA_KEY`` metadata. None for the default one.
+        """
+        model_name = ioption.get(self.MODEL_OPTION_KEY)
+        if model_name is None and context is not None:
+            model_name = dict(context.invocation_metadata() or ()).get(self.MODEL_METADATA_KEY)
+        if not model_name or model_name == self.rekcurd_pack.model_name:
+            return None
+        if not self.rekcurd_pack.routing_enabled:
+            raise Exception("Error: Model routing is disabled. Set \"model_registry.max_models\" more than 1.")
+        return model_name
+
+    def predict(self, input: PredictInput, ioption: dict, type_input: Enum, type_output: Enum,
+                model_name: str = None) -> PredictResult:
+        if self.batcher is None:
+            with self.rekcurd_pack.use_predictor(model_name) as predictor, \
+                    PREDICT_DURATION.labels(self.get_rpc_name(type_input, type_output)).time():
+                return self.rekcurd_pack.app.predict(predictor, input, ioption)
+        return self.batcher.predict((type_input, type_output), input, ioption, model_name)
+
+    def predict_shared(self, input: PredictInput, ioption: dict, type_input: Enum, type_output: Enum,
+                       model_name: str = None) -> PredictResult:
+        """ Predict through the result cache and the coalescing of identical in-flight requests if enabled.
+        """
+        key = self.get_prediction_key(input, ioption, type_input, type_output, model_name)
+        if key is None:
+            return self.predict(input, ioption, type_input, type_output, model_name)
+        cache = self.rekcurd_pack.cache
+        result = cache.get(key) if cache is not None else None
+        if result is None:
+            if self.singleflight is not None:
+                result = self.singleflight.do(key, self.predict, input, ioption, type_input, type_output, model_name)
             else:
-                if isinstance(response, rekcurd_pb2.ArrStringOutput):
-                    label = ["None"]
-                elif isinstance(response, rekcurd_pb2.ArrIntOutput):
-                    label = [0]
-                elif isinstance(response, rekcurd_pb2.ArrFloatOutput):
-                    label = [0.0]
-                else:
-                    label = None
-                result = PredictResult(label=label, score=[0.0], option={})
+                result = self.predict(input, ioption, type_input, type_output, model_name)
+            if cache is not None:
+                cache.put(key, result)
+        return result
+
+    def get_prediction_key(self, input: PredictInput, ioption: dict, type_input: Enum, type_output: Enum,
+                           model_name: str = None) -> Optional[Hashable]:
+        """ Identity of a prediction. None if neither the cache nor the coalescing is enabled.
+        """
+        if self.rekcurd_pack.cache is None and self.singleflight is None:
+            return None
+        if model_name is None:
+            model_name = self.rekcurd_pack.model_name
+        return RekcurdCache.make_key(model_name, type_input, type_output, input, ioption)
+
+    def process_stream(self,
+                       request_iterator: Iterator[RekcurdInput],
+                       context: ServicerContext,
+                       rpc: PredictRpc
+                       ) -> Iterator[RekcurdOutput]:
+        """ Predict every message of the stream and yield the responses in order.
+
+        Up to ``stream_max_inflight`` messages of each stream are predicted
+        concurrently. Requests are read on another thread so that a client can
+        wait for a response before sending the next message. With 1, messages
+        are predicted one by one on the gRPC thread of the stream.
+        """
+        if self.stream_executor is None:
+            for request in request_iterator:
+                yield self.Process(request, context, rpc.response_class(), rpc.type_input, rpc.type_output)
+            return
+        inflight = threading.BoundedSemaphore(self.stream_max_inflight)
+        pending = queue.Queue()
+        closed = threading.Event()
+
+        def consume():
+            try:
+                for request in request_iterator:
+                    while not inflight.acquire(timeout=0.1):
+                        if closed.is_set():
+                            return
+                    pending.put(self.stream_executor.submit(
+                        self.Process, request, context, rpc.response_class(), rpc.type_input, rpc.type_output))
+            except Exception as e:
+                # Client cancellation is handled by gRPC. Just stop reading.
+                self.system_logger.debug(str(e))
+            finally:
+                pending.put(None)
+
+        threading.Thread(target=consume, daemon=True, name='rekcurd-stream-reader').start()
+        try:
+            while True:
+                future = pending.get()
+                if future is None:
+                    return
+                try:
+                    yield future.result()
+                finally:
+                    inflight.release()
+        finally:
+            closed.set()
+
+    def process_client_stream(self,
+                              request_iterator: Iterator[RekcurdInput],
+                              context: ServicerContext,
+                              rpc: PredictRpc
+                              ) -> RekcurdOutput:
+        """ Predict the only message of a client stream.
+
+        The single response has no room for the results of more messages, so
+        a stream of zero or several messages is rejected with INVALID_ARGUMENT
+        rather than truncated. Use "StreamPredict_*" to predict many messages
+        over one stream.
+        """
+        requests = iter(request_iterator)
+        request = next(requests, None)
+        if request is None or next(requests, None) is not None:
+            self.abort_invalid_stream(context, rpc)
+        return self.Process(request, context, rpc.response_class(), rpc.type_input, rpc.type_output)
+
+    # noinspection PyMethodMayBeStatic
+    def abort_invalid_stream(self, context: ServicerContext, rpc: PredictRpc) -> None:
+        message = INVALID_STREAM_MESSAGE.format(rpc.name)
+        if context is None:
+            raise Exception(message)
+        context.abort(grpc.StatusCode.INVALID_ARGUMENT, message)
+
+    def process_batch(self, request, context: ServicerContext, rpc: PredictRpc):
+        """ Predict all the inputs of a "Batch{Input}Input" message by :func:``Rekcurd.predict_batch``.
+
+        The option of the batch message is parsed once and applies to every
+        input which has no option of its own.
+        """
+        self.check_context(context)
+        with self.trace(context, 'Batch' + rpc.name) as trace:
+            with trace.span('parse_option', inputs=len(request.inputs)):
+                inputs, ioptions = self.parse_batch(request, rpc.type_input)
+            type_input, type_output = self.resolve_types(rpc.type_input, rpc.type_output)
+            single_output = type_output in [self.Type.STRING, self.Type.BYTES]
+            response = rpc.batch_response_class()
+            with self.admit(context):
+                # Read after admission, so that the time waiting for it is not counted as budget.
+                time_remaining = context.time_remaining() if context is not None else None
+                with self.rekcurd_pack.app.use_time_remaining(time_remaining):
+                    try:
+                        batch_option = self.parse_option(request) if request.option.val else {}
+                        model_name = self.get_model_name(batch_option, context)
+                        PREDICT_BATCH_SIZE.observe(len(inputs))
+                        with trace.span('predict'), self.rekcurd_pack.use_predictor(model_name) as predictor, \
+                                PREDICT_BATCH_DURATION.time():
+                            results = self.rekcurd_pack.app.predict_batch(predictor, inputs, ioptions)
+                        results = self.check_batch_results(inputs, results)
+                    except Exception as e:
+                        self.system_logger.error(str(e))
+                        PREDICT_ERRORS.labels('Batch' + rpc.name).inc()
+                        results = [self.get_default_result(rpc.response_class(), single_output) for _ in inputs]
+            with trace.span('encode_response'):
+                self.set_batch_response(request, response, results, ioptions, single_output)
+            return response
+
+    def parse_batch(self, request, type_input: Enum) -> Tuple[list, List[dict]]:
+        batch_option = self.parse_option(request) if request.option.val else {}
+        inputs = [self.parse_input(item, type_input) for item in request.inputs]
+        ioptions = [self.parse_option(item) if item.option.val else batch_option for item in request.inputs]
+        return inputs, ioptions
+
+    # noinspection PyMethodMayBeStatic
+    def check_batch_results(self, inputs: list, results: List[PredictResult]) -> List[PredictResult]:
+        results = list(results)
+        if len(results) != len(inputs):
+            raise Exception("Error: \"predict_batch\" must return one result per input.")
+        return results
+
+    def set_batch_response(self, request, response, results: List[PredictResult],
+                           ioptions: List[dict], single_output: bool) -> None:
+        for item, result, ioption in zip(request.inputs, results, ioptions):
+            output = response.outputs.add()
+            self.set_response(output, result, single_output)
+            self.service_logger.emit(item, output, ioption.get('suppress_log_inout', False))
+
+    def resolve_types(self, type_input: Enum = None, type_output: Enum = None) -> Tuple[Enum, Enum]:
+        app = self.rekcurd_pack.app
+        if type_input is None or type_output is None:
+            # TODO: DEPRECATED. Types are passed explicitly by "Predict_*" methods.
+            return app.get_type_input(), app.get_type_output()
+        # Keep "get_type_input/get_type_output" available in "predict". They are stored per call.
+        app.set_type(type_input, type_output)
+        return type_input, type_output
+
+    def parse_input(self, request: RekcurdInput, type_input: Enum) -> PredictInput:
+        """ Input of "predict". ArrInt/ArrFloat are converted to numpy arrays in numpy mode.
+        """
+        converter = self.numpy_converters.get(type_input)
+        if converter is None:
+            return request.input
+        # Slicing copies a repeated field into a list at once. It is much faster than iterating it.
+        return converter(request.input[:])
+
+    # noinspection PyMethodMayBeStatic
+    def parse_option(self, request: RekcurdInput) -> dict:
+        try:
+            return json.loads(request.option.val)
+        except:
+            return {request.option.val: request.option.val}
+
+    # noinspection PyMethodMayBeStatic
+    def get_default_result(self, response: RekcurdOutput, single_output: bool) -> PredictResult:
+        """ Result returned when "predict" fails.
+        """
+        if single_output:
+            if isinstance(response, rekcurd_pb2.StringOutput):
+                label = "None"
+            elif isinstance(response, rekcurd_pb2.BytesOutput):
+                label = b'None'
+            else:
+                label = None
+            return PredictResult(label=label, score=0.0, option={})
+        else:
+            if isinstance(response, rekcurd_pb2.ArrStringOutput):
+                label = ["None"]
+            elif isinstance(response, rekcurd_pb2.ArrIntOutput):
+                label = [0]
+            elif isinstance(response, rekcurd_pb2.ArrFloatOutput):
+                label = [0.0]
+            else:
+                label = None
+            return PredictResult(label=label, score=[0.0], option={})
 
+    def set_response(self, response: RekcurdOutput, result: PredictResult, single_output: bool) -> None:
         try:
             if single_output:
-                response.output = result.label
-                response.score = result.score
+                response.output = to_builtin(result.label)
+                response.score = to_builtin(result.score)
             else:
-                response.output.extend(result.label)
-                response.score.extend(result.score)
+                response.output.extend(to_builtin(result.label))
+                response.score.extend(to_builtin(result.score))
             response.option.val = result.option
         except Exception as e:
             self.system_logger.error(str(e))
 
-        self.service_logger.emit(request, response, ioption.get('suppress_log_inout', False))
-        return response
-
     def Predict_String_String(self,
                               request: rekcurd_pb2.StringInput,
                               context: ServicerContext
                               ) -> rekcurd_pb2.StringOutput:
-        response = rekcurd_pb2.StringOutput()
-        self.rekcurd_pack.app.set_type(self.Type.STRING, self.Type.STRING)
-        return self.Process(request, context, response)
+        rpc = self.rpcs['Predict_String_String']
+        return self.Process(request, context, rpc.response_class(), rpc.type_input, rpc.type_output)
 
     def Predict_String_Bytes(self,
                              request: rekcurd_pb2.StringInput,
                              context: ServicerContext
                              ) -> rekcurd_pb2.BytesOutput:
-        response = rekcurd_pb2.BytesOutput()
-        self.rekcurd_pack.app.set_type(self.Type.STRING, self.Type.BYTES)
-        yield self.Process(request, context, response)
+        rpc = self.rpcs['Predict_String_Bytes']
+        yield self.Process(request, context, rpc.response_class(), rpc.type_input, rpc.type_output)
 
     def Predict_String_ArrInt(self,
                               request: rekcurd_pb2.StringInput,
                               context: ServicerContext
                               ) -> rekcurd_pb2.ArrIntOutput:
-        response = rekcurd_pb2.ArrIntOutput()
-        self.rekcurd_pack.app.set_type(self.Type.STRING, self.Type.ARRAY_INT)
-        return self.Process(request, context, response)
+        rpc = self.rpcs['Predict_String_ArrInt']
+        return self.Process(request, context, rpc.response_class(), rpc.type_input, rpc.type_output)
 
     def Predict_String_ArrFloat(self,
                                 request: rekcurd_pb2.StringInput,
                                 context: ServicerContext
                                 ) -> rekcurd_pb2.ArrFloatOutput:
-        response = rekcurd_pb2.ArrFloatOutput()
-        self.rekcurd_pack.app.set_type(self.Type.STRING, self.Type.ARRAY_FLOAT)
-        return self.Process(request, context, response)
+        rpc = self.rpcs['Predict_String_ArrFloat']
+        return self.Process(request, context, rpc.response_class(), rpc.type_input, rpc.type_output)
 
     def Predict_String_ArrString(self,
                                  request: rekcurd_pb2.StringInput,
                                  context: ServicerContext
                                  ) -> rekcurd_pb2.ArrStringOutput:
-        response = rekcurd_pb2.ArrStringOutput()
-        self.rekcurd_pack.app.set_type(self.Type.STRING, self.Type.ARRAY_STRING)
-        return self.Process(request, context, response)
+        rpc = self.rpcs['Predict_String_ArrString']
+        return self.Process(request, context, rpc.response_class(), rpc.type_input, rpc.type_output)
 
     def Predict_Bytes_String(self,
                              request_iterator: Iterator[rekcurd_pb2.BytesInput],
                              context: ServicerContext
                              ) -> rekcurd_pb2.StringOutput:
-        for request in request_iterator:
-            response = rekcurd_pb2.StringOutput()
-            self.rekcurd_pack.app.set_type(self.Type.BYTES, self.Type.STRING)
-            return self.Process(request, context, response)
+        return self.process_client_stream(request_iterator, context, self.rpcs['Predict_Bytes_String'])
 
     def Predict_Bytes_Bytes(self,
                             request_iterator: Iterator[rekcurd_pb2.BytesInput],
                             context: ServicerContext
                             ) -> rekcurd_pb2.BytesOutput:
-        for request in request_iterator:
-            response = rekcurd_pb2.BytesOutput()
-            self.rekcurd_pack.app.set_type(self.Type.BYTES, self.Type.BYTES)
-            yield self.Process(request, context, response)
+        yield from self.process_stream(request_iterator, context, self.rpcs['Predict_Bytes_Bytes'])
 
     def Predict_Bytes_ArrInt(self,
                              request_iterator: Iterator[rekcurd_pb2.BytesInput],
                              context: ServicerContext
                              ) -> rekcurd_pb2.ArrIntOutput:
-        for request in request_iterator:
-            response = rekcurd_pb2.ArrIntOutput()
-            self.rekcurd_pack.app.set_type(self.Type.BYTES, self.Type.ARRAY_INT)
-            return self.Process(request, context, response)
+        return self.process_client_stream(request_iterator, context, self.rpcs['Predict_Bytes_ArrInt'])
 
     def Predict_Bytes_ArrFloat(self,
                                request_iterator: Iterator[rekcurd_pb2.BytesInput],
                                context: ServicerContext
                                ) -> rekcurd_pb2.ArrFloatOutput:
-        for request in request_iterator:
-            response = rekcurd_pb2.ArrFloatOutput()
-            self.rekcurd_pack.app.set_type(self.Type.BYTES, self.Type.ARRAY_FLOAT)
-            return self.Process(request, context, response)
+        return self.process_client_stream(request_iterator, context, self.rpcs['Predict_Bytes_ArrFloat'])
 
     def Predict_Bytes_ArrString(self,
                                 request_iterator: Iterator[rekcurd_pb2.BytesInput],
                                 context: ServicerContext
                                 ) -> rekcurd_pb2.ArrStringOutput:
-        for request in request_iterator:
-            response = rekcurd_pb2.ArrStringOutput()
-            self.rekcurd_pack.app.set_type(self.Type.BYTES, self.Type.ARRAY_STRING)
-            return self.Process(request, context, response)
+        return self.process_client_stream(request_iterator, context, self.rpcs['Predict_Bytes_ArrString'])
 
     def Predict_ArrInt_String(self,
                               request: rekcurd_pb2.ArrIntInput,
                               context: ServicerContext
                               ) -> rekcurd_pb2.StringOutput:
-        response = rekcurd_pb2.StringOutput()
-        self.rekcurd_pack.app.set_type(self.Type.ARRAY_INT, self.Type.STRING)
-        return self.Process(request, context, response)
+        rpc = self.rpcs['Predict_ArrInt_String']
+        return self.Process(request, context, rpc.response_class(), rpc.type_input, rpc.type_output)
 
     def Predict_ArrInt_Bytes(self,
                              request: rekcurd_pb2.ArrIntInput,
                              context: ServicerContext
                              ) -> rekcurd_pb2.BytesOutput:
-        response = rekcurd_pb2.BytesOutput()
-        self.rekcurd_pack.app.set_type(self.Type.ARRAY_INT, self.Type.BYTES)
-        yield self.Process(request, context, response)
+        rpc = self.rpcs['Predict_ArrInt_Bytes']
+        yield self.Process(request, context, rpc.response_class(), rpc.type_input, rpc.type_output)
 
     def Predict_ArrInt_ArrInt(self,
                               request: rekcurd_pb2.ArrIntInput,
                               context: ServicerContext
                               ) -> rekcurd_pb2.ArrIntOutput:
-        response = rekcurd_pb2.ArrIntOutput()
-        self.rekcurd_pack.app.set_type(self.Type.ARRAY_INT, self.Type.ARRAY_INT)
-        return self.Process(request, context, response)
+        rpc = self.rpcs['Predict_ArrInt_ArrInt']
+        return self.Process(request, context, rpc.response_class(), rpc.type_input, rpc.type_output)
 
     def Predict_ArrInt_ArrFloat(self,
                                 request: rekcurd_pb2.ArrIntInput,
                                 context: ServicerContext
                                 ) -> rekcurd_pb2.ArrFloatOutput:
-        response = rekcurd_pb2.ArrFloatOutput()
-        self.rekcurd_pack.app.set_type(self.Type.ARRAY_INT, self.Type.ARRAY_FLOAT)
-        return self.Process(request, context, response)
+        rpc = self.rpcs['Predict_ArrInt_ArrFloat']
+        return self.Process(request, context, rpc.response_class(), rpc.type_input, rpc.type_output)
 
     def Predict_ArrInt_ArrString(self,
                                  request: rekcurd_pb2.ArrIntInput,
                                  context: ServicerContext
                                  ) -> rekcurd_pb2.ArrStringOutput:
-        response = rekcurd_pb2.ArrStringOutput()
-        self.rekcurd_pack.app.set_type(self.Type.ARRAY_INT, self.Type.ARRAY_STRING)
-        return self.Process(request, context, response)
+        rpc = self.rpcs['Predict_ArrInt_ArrString']
+        return self.Process(request, context, rpc.response_class(), rpc.type_input, rpc.type_output)
 
     def Predict_ArrFloat_String(self,
                                 request: rekcurd_pb2.ArrFloatInput,
                                 context: ServicerContext
                                 ) -> rekcurd_pb2.StringOutput:
-        response = rekcurd_pb2.StringOutput()
-        self.rekcurd_pack.app.set_type(self.Type.ARRAY_FLOAT, self.Type.STRING)
-        return self.Process(request, context, response)
+        rpc = self.rpcs['Predict_ArrFloat_String']
+        return self.Process(request, context, rpc.response_class(), rpc.type_input, rpc.type_output)
 
     def Predict_ArrFloat_Bytes(self,
                                request: rekcurd_pb2.ArrFloatInput,
                                context: ServicerContext
                                ) -> rekcurd_pb2.BytesOutput:
-        response = rekcurd_pb2.BytesOutput()
-        self.rekcurd_pack.app.set_type(self.Type.ARRAY_FLOAT, self.Type.BYTES)
-        yield self.Process(request, context, response)
+        rpc = self.rpcs['Predict_ArrFloat_Bytes']
+        yield self.Process(request, context, rpc.response_class(), rpc.type_input, rpc.type_output)
 
     def Predict_ArrFloat_ArrInt(self,
                                 request: rekcurd_pb2.ArrFloatInput,
                                 context: ServicerContext
                                 ) -> rekcurd_pb2.ArrIntOutput:
-        response = rekcurd_pb2.ArrIntOutput()
-        self.rekcurd_pack.app.set_type(self.Type.ARRAY_FLOAT, self.Type.ARRAY_INT)
-        return self.Process(request, context, response)
+        rpc = self.rpcs['Predict_ArrFloat_ArrInt']
+        return self.Process(request, context, rpc.response_class(), rpc.type_input, rpc.type_output)
 
     def Predict_ArrFloat_ArrFloat(self,
                                   request: rekcurd_pb2.ArrFloatInput,
                                   context: ServicerContext
                                   ) -> rekcurd_pb2.ArrFloatOutput:
-        response = rekcurd_pb2.ArrFloatOutput()
-        self.rekcurd_pack.app.set_type(self.Type.ARRAY_FLOAT, self.Type.ARRAY_FLOAT)
-        return self.Process(request, context, response)
+        rpc = self.rpcs['Predict_ArrFloat_ArrFloat']
+        return self.Process(request, context, rpc.response_class(), rpc.type_input, rpc.type_output)
 
     def Predict_ArrFloat_ArrString(self,
                                    request: rekcurd_pb2.ArrFloatInput,
                                    context: ServicerContext
                                    ) -> rekcurd_pb2.ArrStringOutput:
-        response = rekcurd_pb2.ArrStringOutput()
-        self.rekcurd_pack.app.set_type(self.Type.ARRAY_FLOAT, self.Type.ARRAY_STRING)
-        return self.Process(request, context, response)
+        rpc = self.rpcs['Predict_ArrFloat_ArrString']
+        return self.Process(request, context, rpc.response_class(), rpc.type_input, rpc.type_output)
 
     def Predict_ArrString_String(self,
                                  request: rekcurd_pb2.ArrStringInput,
                                  context: ServicerContext
                                  ) -> rekcurd_pb2.StringOutput:
-        response = rekcurd_pb2.StringOutput()
-        self.rekcurd_pack.app.set_type(self.Type.ARRAY_STRING, self.Type.STRING)
-        return self.Process(request, context, response)
+        rpc = self.rpcs['Predict_ArrString_String']
+        return self.Process(request, context, rpc.response_class(), rpc.type_input, rpc.type_output)
 
     def Predict_ArrString_Bytes(self,
                                 request: rekcurd_pb2.ArrStringInput,
                                 context: ServicerContext
                                 ) -> rekcurd_pb2.BytesOutput:
-        response = rekcurd_pb2.BytesOutput()
-        self.rekcurd_pack.app.set_type(self.Type.ARRAY_STRING, self.Type.BYTES)
-        yield self.Process(request, context, response)
+        rpc = self.rpcs['Predict_ArrString_Bytes']
+        yield self.Process(request, context, rpc.response_class(), rpc.type_input, rpc.type_output)
 
     def Predict_ArrString_ArrInt(self,
                                  request: rekcurd_pb2.ArrStringInput,
                                  context: ServicerContext
                                  ) -> rekcurd_pb2.ArrIntOutput:
-        response = rekcurd_pb2.ArrIntOutput()
-        self.rekcurd_pack.app.set_type(self.Type.ARRAY_STRING, self.Type.ARRAY_INT)
-        return self.Process(request, context, response)
+        rpc = self.rpcs['Predict_ArrString_ArrInt']
+        return self.Process(request, context, rpc.response_class(), rpc.type_input, rpc.type_output)
 
     def Predict_ArrString_ArrFloat(self,
                                    request: rekcurd_pb2.ArrStringInput,
                                    context: ServicerContext
                                    ) -> rekcurd_pb2.ArrFloatOutput:
-        response = rekcurd_pb2.ArrFloatOutput()
-        self.rekcurd_pack.app.set_type(self.Type.ARRAY_STRING, self.Type.ARRAY_FLOAT)
-        return self.Process(request, context, response)
+        rpc = self.rpcs['Predict_ArrString_ArrFloat']
+        return self.Process(request, context, rpc.response_class(), rpc.type_input, rpc.type_output)
 
     def Predict_ArrString_ArrString(self,
                                     request: rekcurd_pb2.ArrStringInput,
                                     context: ServicerContext
                                     ) -> rekcurd_pb2.ArrStringOutput:
-        response = rekcurd_pb2.ArrStringOutput()
-        self.rekcurd_pack.app.set_type(self.Type.ARRAY_STRING, self.Type.ARRAY_STRING)
-        return self.Process(request, context, response)
+        rpc = self.rpcs['Predict_ArrString_ArrString']
+        return self.Process(request, context, rpc.response_class(), rpc.type_input, rpc.type_output)
+
+
+def add_RekcurdWorkerServicer_extensions_to_server(servicer: RekcurdWorkerServicer, server: grpc.Server) -> None:
+    """ Register the worker RPCs which are not defined in the protobuf.
+
+    - StreamPredict_{Input}_{Output}
+        Bidirectional stream of every "Predict_*" type. Messages are pipelined
+        by :func:``RekcurdWorkerServicer.process_stream`` and the responses
+        keep the order of the requests.
+    - BatchPredict_{Input}_{Output}
+        Unary RPC of "Batch{Input}Input" and "Batch{Output}Output" messages
+        predicted by :func:``RekcurdWorkerServicer.process_batch``.
+    """
+    rpc_method_handlers = dict()
+    for rpc in servicer.rpcs.values():
+        rpc_method_handlers['Batch' + rpc.name] = grpc.unary_unary_rpc_method_handler(
+            functools.partial(servicer.process_batch, rpc=rpc),
+            request_deserializer=rpc.batch_request_class.FromString,
+            response_serializer=rpc.batch_response_class.SerializeToString,
+        )
+        rpc_method_handlers['Stream' + rpc.name] = grpc.stream_stream_rpc_method_handler(
+            functools.partial(servicer.process_stream, rpc=rpc),
+            request_deserializer=rpc.request_class.FromString,
+            response_serializer=rpc.response_class.SerializeToString,
+        )
+    generic_handler = grpc.method_handlers_generic_handler(
+        'rekcurd.RekcurdWorker', rpc_method_handlers)
+    server.add_generic_rpc_handlers((generic_handler,))
@@ -1,18 +1,50 @@
 # coding: utf-8
 
 
+import os
 import pickle
+import tempfile
+import threading
+import time
 
+from concurrent.futures import Future
 from pathlib import Path
-from typing import Iterator, Generator
+from typing import TYPE_CHECKING, Dict, Iterator, Generator
 
-from rekcurd.protobuf import rekcurd_pb2
+from rekcurd._lazy import lazy_import
 from rekcurd.utils import RekcurdConfig, ModelModeEnum, EvaluateResultDetail, EvaluateResult
-from .data_handler import convert_to_valid_path
-from .local_handler import LocalHandler
-from .ceph_handler import CephHandler
-from .aws_s3_handler import AwsS3Handler
-from .gcs_handler import GcsHandler
+from rekcurd.utils.rekcurd_metrics import DATA_SERVER_BYTES, DATA_SERVER_DURATION
+from .data_handler import DataHandler, convert_to_valid_path
+
+if TYPE_CHECKING:
+    from rekcurd.protobuf import rekcurd_pb2
+
+# The handlers import the SDK of their storage (e.g. boto3). Import them on first access.
+__getattr__, __dir__ = lazy_import(__name__, {
+    'LocalHandler': '.local_handler',
+    'CephHandler': '.ceph_handler',
+    'AwsS3Handler': '.aws_s3_handler',
+    'GcsHandler': '.gcs_handler',
+})
+
+
+def get_handler_class(model_mode: ModelModeEnum) -> type:
+    """ Import the handler of ``model_mode`` only. e.g. boto3 is not imported in LOCAL mode.
+    """
+    if model_mode == ModelModeEnum.LOCAL:
+        from .local_handler import LocalHandler
+        return LocalHandler
+    elif model_mode == ModelModeEnum.CEPH_S3:
+        from .ceph_handler import CephHandler
+        return CephHandler
+    elif model_mode == ModelModeEnum.AWS_S3:
+        from .aws_s3_handler import AwsS3Handler
+        return AwsS3Handler
+    elif model_mode == ModelModeEnum.GCS:
+        from .gcs_handler import GcsHandler
+        return GcsHandler
+    else:
+        raise ValueError("Invalid ModelModeEnum value.")
 
 
 class DataServer(object):
@@ -22,37 +54,102 @@ class DataServer(object):
 
     def __init__(self, config: RekcurdConfig):
         self.config = config
-        if config.MODEL_MODE_ENUM == ModelModeEnum.LOCAL:
-            self._api_handler = LocalHandler(config)
-        elif config.MODEL_MODE_ENUM == ModelModeEnum.CEPH_S3:
-            self._api_handler = CephHandler(config)
-        elif config.MODEL_MODE_ENUM == ModelModeEnum.AWS_S3:
-            self._api_handler = AwsS3Handler(config)
-        elif config.MODEL_MODE_ENUM == ModelModeEnum.GCS:
-            self._api_handler = GcsHandler(config)
-        else:
-            raise ValueError("Invalid ModelModeEnum value.")
+        self._api_handler: DataHandler = get_handler_class(config.MODEL_MODE_ENUM)(config)
+        self._prefetches: Dict[str, Future] = dict()
+        self._prefetch_lock = threading.Lock()
 
     def get_model_path(self) -> str:
         local_filepath = Path(self._api_handler.LOCAL_MODEL_DIR, self._api_handler.MODEL_FILE_NAME)
         if not local_filepath.exists():
             local_filepath.parent.mkdir(parents=True, exist_ok=True)
-            self._api_handler.download(self.config.MODEL_FILE_PATH, str(local_filepath))
+            self._download(self.config.MODEL_FILE_PATH, str(local_filepath))
         return str(local_filepath)
 
-    def switch_model(self, filepath: str) -> str:
+    def _download(self, remote_filepath: str, local_filepath: str) -> None:
+        """ Download to a temporary file in the same directory, then rename it into place.
+
+        The file appears complete or not at all, so that an interrupted download is
+        not taken for a cached one, and a reader never sees a partial file.
+        """
+        local_dir, local_name = os.path.split(local_filepath)
+        fd, temp_filepath = tempfile.mkstemp(prefix='.{}.'.format(local_name), suffix='.tmp', dir=local_dir or None)
+        os.close(fd)
+        try:
+            start = time.monotonic()
+            self._api_handler.download(remote_filepath, temp_filepath)
+            DATA_SERVER_DURATION.labels('download').observe(time.monotonic() - start)
+            DATA_SERVER_BYTES.labels('download').inc(_get_size(temp_filepath))
+            os.replace(temp_filepath, local_filepath)
+        except BaseException:
+            try:
+                os.remove(temp_filepath)
+            except OSError:
+                pass
+            raise
+
+    def _upload(self, remote_filepath: str, local_filepath: str) -> None:
+        start = time.monotonic()
+        self._api_handler.upload(remote_filepath, local_filepath)
+        DATA_SERVER_DURATION.labels('upload').observe(time.monotonic() - start)
+        DATA_SERVER_BYTES.labels('upload').inc(_get_size(local_filepath))
+
+    def validate_path(self, filepath: str) -> Path:
         valid_path = convert_to_valid_path(filepath)
         if filepath != str(valid_path):
             raise Exception(f'Error: Invalid file path specified -> {filepath}')
-
-        local_filepath = Path(self._api_handler.LOCAL_MODEL_DIR, valid_path.name)
+        return valid_path
+
+    def download_model(self, filepath: str) -> str:
+        with self._prefetch_lock:
+            future = self._prefetches.get(filepath)
+        if future is not None:
+            # Don't read the file being prefetched.
+            return future.result()
+        return self._download_model(filepath)
+
+    def prefetch_model(self, filepath: str) -> Future:
+        """ Download a ML model file in background without switching to it.
+
+        :param filepath: ML model file path.
+        :return: Future of the local file path.
+        """
+        self.validate_path(filepath)
+        with self._prefetch_lock:
+            future = self._prefetches.get(filepath)
+            if future is None:
+                future = self._prefetches[filepath] = Future()
+                threading.Thread(target=self._prefetch_model, args=(filepath, future),
+                                 daemon=True, name='rekcurd-prefetch').start()
+        return future
+
+    def _prefetch_model(self, filepath: str, future: Future) -> None:
+        try:
+            future.set_result(self._download_model(filepath))
+        except Exception as e:
+            future.set_exception(e)
+        finally:
+            with self._prefetch_lock:
+                del self._prefetches[filepath]
+
+    def _download_model(self, filepath: str) -> str:
+        return self._get_local_path(filepath, self._api_handler.LOCAL_MODEL_DIR)
+
+    def _get_local_path(self, filepath: str, local_dir: str) -> str:
+        """ Local path of a file in ``local_dir``. Download it unless it is there.
+        """
+        valid_path = self.validate_path(filepath)
+        local_filepath = Path(local_dir, valid_path.name)
         if not local_filepath.exists():
             local_filepath.parent.mkdir(parents=True, exist_ok=True)
-            self._api_handler.download(filepath, str(local_filepath))
-        self._api_handler.MODEL_FILE_NAME = valid_path.name
+            self._download(filepath, str(local_filepath))
         return str(local_filepath)
 
-    def upload_model(self, request_iterator: Iterator[rekcurd_pb2.UploadModelRequest]) -> str:
+    def switch_model(self, filepath: str) -> str:
+        local_filepath = self.download_model(filepath)
+        self._api_handler.MODEL_FILE_NAME = Path(local_filepath).name
+        return local_filepath
+
+    def upload_model(self, request_iterator: Iterator['rekcurd_pb2.UploadModelRequest']) -> str:
         first_req = next(request_iterator)
         filepath = first_req.path
         valid_path = convert_to_valid_path(filepath)
@@ -66,32 +163,19 @@ class DataServer(object):
             for request in request_iterator:
                 f.write(request.data)
             del first_req
-        self._api_handler.upload(filepath, str(local_filepath))
+        self._upload(filepath, str(local_filepath))
         return str(local_filepath)
 
     def get_evaluation_data_path(self, filepath: str) -> str:
-        valid_path = convert_to_valid_path(filepath)
-        if filepath != str(valid_path):
-            raise Exception(f'Error: Invalid file path specified -> {filepath}')
+        return self._get_local_path(filepath, self._api_handler.LOCAL_EVAL_DIR)
 
-        local_filepath = Path(self._api_handler.LOCAL_EVAL_DIR, valid_path.name)
-        if not local_filepath.exists():
-            local_filepath.parent.mkdir(parents=True, exist_ok=True)
-            self._api_handler.download(filepath, str(local_filepath))
-        return str(local_filepath)
+    def get_warmup_data_path(self, filepath: str) -> str:
+        return self._get_local_path(filepath, self._api_handler.LOCAL_WARMUP_DIR)
 
     def get_eval_result_detail(self, filepath: str) -> str:
-        valid_path = convert_to_valid_path(filepath)
-        if filepath != str(valid_path):
-            raise Exception(f'Error: Invalid file path specified -> {filepath}')
+        return self._get_local_path(filepath, self._api_handler.LOCAL_EVAL_DIR)
 
-        local_filepath = Path(self._api_handler.LOCAL_EVAL_DIR, valid_path.name)
-        if not local_filepath.exists():
-            local_filepath.parent.mkdir(parents=True, exist_ok=True)
-            self._api_handler.download(filepath, str(local_filepath))
-        return str(local_filepath)
-
-    def upload_evaluation_data(self, request_iterator: Iterator[rekcurd_pb2.UploadEvaluationDataRequest]) -> str:
+    def upload_evaluation_data(self, request_iterator: Iterator['rekcurd_pb2.UploadEvaluationDataRequest']) -> str:
         first_req = next(request_iterator)
         filepath = first_req.data_path
         valid_path = convert_to_valid_path(filepath)
@@ -105,7 +189,7 @@ class DataServer(object):
             for request in request_iterator:
                 f.write(request.data)
             del first_req
-        self._api_handler.upload(filepath, str(local_filepath))
+        self._upload(filepath, str(local_filepath))
         return str(local_filepath)
 
     def upload_evaluation_result(self, data_gen: Generator[EvaluateResultDetail, None, EvaluateResult], filepath: str) -> EvaluateResult:
@@ -122,6 +206,13 @@ class DataServer(object):
                     pickle.dump(next(data_gen), detail_file)
             except StopIteration as e:
                 evaluate_result = e.value
-        self._api_handler.upload(filepath, str(local_filepath))
+        self._upload(filepath, str(local_filepath))
 
         return evaluate_result
+
+
+def _get_size(filepath: str) -> int:
+    try:
+        return os.path.getsize(filepath)
+    except OSError:
+        return 0
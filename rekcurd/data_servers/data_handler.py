@@ -23,12 +23,14 @@ class DataHandler(metaclass=ABCMeta):
     LOCAL_MODEL_DIR: str = None
     MODEL_FILE_NAME: str = None
     LOCAL_EVAL_DIR: str = None
+    LOCAL_WARMUP_DIR: str = None
 
     def __init__(self, config: RekcurdConfig):
         valid_model_path = convert_to_valid_path(config.MODEL_FILE_PATH)
         self.LOCAL_MODEL_DIR = str(Path("rekcurd-model", valid_model_path.parent))
         self.MODEL_FILE_NAME = valid_model_path.name
         self.LOCAL_EVAL_DIR = "rekcurd-eval"
+        self.LOCAL_WARMUP_DIR = "rekcurd-warmup"
 
     @abstractmethod
     def download(self, remote_filepath: str, local_filepath: str) -> None:
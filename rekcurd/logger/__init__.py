@@ -1,6 +1,13 @@
 # -*- coding: utf-8 -*-
 
 
+from rekcurd._lazy import lazy_import
 from .logger_interface import SystemLoggerInterface, ServiceLoggerInterface
-from .logger_jsonlogger import JsonSystemLogger, JsonServiceLogger
-from .logger_fluent import FluentSystemLogger, FluentServiceLogger
+
+# Import "pythonjsonlogger" and "fluent" only when the logger is used.
+__getattr__, __dir__ = lazy_import(__name__, {
+    'JsonSystemLogger': '.logger_jsonlogger',
+    'JsonServiceLogger': '.logger_jsonlogger',
+    'FluentSystemLogger': '.logger_fluent',
+    'FluentServiceLogger': '.logger_fluent',
+})
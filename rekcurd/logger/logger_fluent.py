@@ -84,6 +84,11 @@ class FluentSystemLogger(SystemLoggerInterface):
         """
         self.log.warning(message, extra={'loglevel': 4})
 
+    def flush(self) -> None:
+        # Fluent senders send the pending buffer on close.
+        for handler in self.log.handlers:
+            handler.close()
+
 
 class FluentServiceLogger(ServiceLoggerInterface):
 
@@ -129,10 +134,14 @@ class FluentServiceLogger(ServiceLoggerInterface):
                 'ml_service': self.ml_service,
                 'service_level': self.service_level,
                 'ml_input': ml_input,
-                'ml_output': ml_output
+                'ml_output': ml_output,
+                **self.get_trace_fields()
             })
         except:
             try:
                 FluentSystemLogger(self.logger_name, self.log_level, self.config).exception("can't write log")
             except:
                 pass
+
+    def flush(self) -> None:
+        self.logger.close()
@@ -4,6 +4,8 @@
 import json
 from abc import ABCMeta, abstractmethod
 
+from rekcurd.utils.rekcurd_tracing import get_current_trace
+
 
 class SystemLoggerInterface(metaclass=ABCMeta):
     @abstractmethod
@@ -26,12 +28,29 @@ class SystemLoggerInterface(metaclass=ABCMeta):
     def warn(self, message: str) -> None:
         raise NotImplemented()
 
+    def flush(self) -> None:
+        """ Write out buffered logs. Called on shutdown.
+        """
+        pass
+
 
 class ServiceLoggerInterface(metaclass=ABCMeta):
     @abstractmethod
     def emit(self, request, response, suppress_log_inout: bool = False) -> None:
         raise NotImplemented()
 
+    def flush(self) -> None:
+        """ Write out buffered logs. Called on shutdown.
+        """
+        pass
+
+    # noinspection PyMethodMayBeStatic
+    def get_trace_fields(self) -> dict:
+        """ "trace_id", "span_id" and "request_id" of the request being logged, if any.
+        """
+        trace = get_current_trace()
+        return trace.get_log_fields() if trace is not None else dict()
+
     # noinspection PyMethodMayBeStatic
     def to_str_from_request(self, request) -> str:
         tmp = {'option': request.option.val}
@@ -100,6 +100,10 @@ class JsonSystemLogger(SystemLoggerInterface):
                                          'ml_service': self.ml_service,
                                          'service_level': self.service_level})
 
+    def flush(self) -> None:
+        for handler in self.log.handlers:
+            handler.flush()
+
 
 class JsonServiceLogger(ServiceLoggerInterface):
     class JsonFormatter(jsonlogger.JsonFormatter):
@@ -162,9 +166,14 @@ class JsonServiceLogger(ServiceLoggerInterface):
                                           'level': 6, 'ml_service': self.ml_service,
                                           'service_level': self.service_level,
                                           'ml_input': ml_input,
-                                          'ml_output': ml_output})
+                                          'ml_output': ml_output,
+                                          **self.get_trace_fields()})
         except Exception:
             try:
                 JsonSystemLogger(self.logger_name, self.log_level, self.config).exception("can't write log")
             except:
                 pass
+
+    def flush(self) -> None:
+        for handler in self.log.handlers:
+            handler.flush()
@@ -5,6 +5,8 @@ import json
 from typing import Union, List, Dict, NamedTuple
 
 from .rekcurd_config import RekcurdConfig, ModelModeEnum
+from .rekcurd_metrics import RekcurdMetrics, metrics
+from .rekcurd_tracing import RekcurdTracer, tracer
 
 
 PredictInput = Union[str, bytes, List[str], List[int], List[float]]
@@ -1,9 +1,9 @@
 # coding: utf-8
 
 
+import json
 import os
 import uuid
-import yaml
 
 from enum import Enum
 
@@ -38,6 +38,25 @@ class RekcurdConfig:
     __SERVICE_DEFAULT_HOST = "127.0.0.1"
     __SERVICE_DEFAULT_PORT = 5000
     __CEPH_DEFAULT_PORT = 8773
+    __BATCHING_DEFAULT_MAX_SIZE = 1
+    __BATCHING_DEFAULT_MAX_WAIT_MS = 5.0
+    __STREAMING_DEFAULT_MAX_INFLIGHT = 1
+    __CACHE_DEFAULT_MAX_SIZE = 0
+    __CACHE_DEFAULT_TTL_SEC = 0.0
+    __ADMISSION_DEFAULT_MAX_INFLIGHT = 0
+    __ADMISSION_DEFAULT_MAX_QUEUE = 0
+    __WARMUP_DEFAULT_PASSES = 0
+    __MODEL_REGISTRY_DEFAULT_MAX_MODELS = 1
+    __MODEL_REGISTRY_DEFAULT_MAX_MEMORY_MB = 0.0
+    __SHADOW_DEFAULT_RATIO = 1.0
+    __SHADOW_DEFAULT_MAX_WORKERS = 1
+    __SHADOW_DEFAULT_MAX_QUEUE = 16
+    __GRPC_DEFAULT_MAX_WORKERS = 1
+    __SHUTDOWN_DEFAULT_GRACE_PERIOD_SEC = 20.0
+    __SHUTDOWN_DEFAULT_PRE_STOP_DELAY_SEC = 0.0
+    __METRICS_DEFAULT_HOST = "0.0.0.0"
+    __METRICS_DEFAULT_PORT = 0
+    __TRACING_DEFAULT_SAMPLE_RATIO = 1.0
     KUBERNETES_MODE: str = None
     DEBUG_MODE: bool = None
     APPLICATION_NAME: str = None
@@ -59,6 +78,43 @@ class RekcurdConfig:
     GCS_ACCESS_KEY: str = None
     GCS_SECRET_KEY: str = None
     GCS_BUCKET_NAME: str = None
+    BATCHING_MAX_SIZE: int = __BATCHING_DEFAULT_MAX_SIZE
+    BATCHING_MAX_WAIT_MS: float = __BATCHING_DEFAULT_MAX_WAIT_MS
+    STREAMING_MAX_INFLIGHT: int = __STREAMING_DEFAULT_MAX_INFLIGHT
+    CACHE_MAX_SIZE: int = __CACHE_DEFAULT_MAX_SIZE
+    CACHE_TTL_SEC: float = __CACHE_DEFAULT_TTL_SEC
+    NUMPY_MODE: bool = False
+    ADMISSION_MAX_INFLIGHT: int = __ADMISSION_DEFAULT_MAX_INFLIGHT
+    ADMISSION_MAX_QUEUE: int = __ADMISSION_DEFAULT_MAX_QUEUE
+    COALESCING_ENABLED: bool = False
+    WARMUP_PASSES: int = __WARMUP_DEFAULT_PASSES
+    WARMUP_INPUTS: list = None
+    WARMUP_FILE_PATH: str = None
+    SWITCH_MODEL_BACKGROUND: bool = False
+    MODEL_REGISTRY_MAX_MODELS: int = __MODEL_REGISTRY_DEFAULT_MAX_MODELS
+    MODEL_REGISTRY_MAX_MEMORY_MB: float = __MODEL_REGISTRY_DEFAULT_MAX_MEMORY_MB
+    SHADOW_FILE_PATH: str = None
+    SHADOW_RATIO: float = __SHADOW_DEFAULT_RATIO
+    SHADOW_MAX_WORKERS: int = __SHADOW_DEFAULT_MAX_WORKERS
+    SHADOW_MAX_QUEUE: int = __SHADOW_DEFAULT_MAX_QUEUE
+    GRPC_MAX_WORKERS: int = __GRPC_DEFAULT_MAX_WORKERS
+    GRPC_EXECUTOR_MAX_WORKERS: int = 0
+    GRPC_MAX_SEND_MESSAGE_LENGTH: int = 0
+    GRPC_MAX_RECEIVE_MESSAGE_LENGTH: int = 0
+    GRPC_MAX_CONCURRENT_STREAMS: int = 0
+    GRPC_KEEPALIVE_TIME_MS: int = 0
+    GRPC_KEEPALIVE_TIMEOUT_MS: int = 0
+    GRPC_KEEPALIVE_PERMIT_WITHOUT_CALLS: bool = False
+    GRPC_MIN_PING_INTERVAL_MS: int = 0
+    GRPC_COMPRESSION: str = None
+    GRPC_SO_REUSEPORT: bool = False
+    SHUTDOWN_GRACE_PERIOD_SEC: float = __SHUTDOWN_DEFAULT_GRACE_PERIOD_SEC
+    SHUTDOWN_PRE_STOP_DELAY_SEC: float = __SHUTDOWN_DEFAULT_PRE_STOP_DELAY_SEC
+    METRICS_HOST: str = __METRICS_DEFAULT_HOST
+    METRICS_PORT: int = __METRICS_DEFAULT_PORT
+    TRACING_FILE_PATH: str = None
+    TRACING_ENDPOINT: str = None
+    TRACING_SAMPLE_RATIO: float = __TRACING_DEFAULT_SAMPLE_RATIO
 
     def __init__(self, config_file: str = None):
         self.KUBERNETES_MODE = os.getenv("REKCURD_KUBERNETES_MODE")
@@ -77,6 +133,26 @@ class RekcurdConfig:
             ceph_bucket_name: str = None, aws_access_key: str = None,
             aws_secret_key: str = None, aws_bucket_name: str = None,
             gcs_access_key: str = None, gcs_secret_key: str = None, gcs_bucket_name: str = None,
+            batching_max_size: int = None, batching_max_wait_ms: float = None,
+            streaming_max_inflight: int = None,
+            cache_max_size: int = None, cache_ttl_sec: float = None,
+            numpy_mode: bool = None,
+            admission_max_inflight: int = None, admission_max_queue: int = None,
+            coalescing_enabled: bool = None,
+            warmup_passes: int = None, warmup_inputs: list = None, warmup_filepath: str = None,
+            switch_model_background: bool = None,
+            model_registry_max_models: int = None, model_registry_max_memory_mb: float = None,
+            shadow_filepath: str = None, shadow_ratio: float = None,
+            shadow_max_workers: int = None, shadow_max_queue: int = None,
+            grpc_max_workers: int = None, grpc_executor_max_workers: int = None,
+            grpc_max_send_message_length: int = None, grpc_max_receive_message_length: int = None,
+            grpc_max_concurrent_streams: int = None,
+            grpc_keepalive_time_ms: int = None, grpc_keepalive_timeout_ms: int = None,
+            grpc_keepalive_permit_without_calls: bool = None, grpc_min_ping_interval_ms: int = None,
+            grpc_compression: str = None, grpc_so_reuseport: bool = None,
+            shutdown_grace_period_sec: float = None, shutdown_pre_stop_delay_sec: float = None,
+            metrics_host: str = None, metrics_port: int = None,
+            tracing_filepath: str = None, tracing_endpoint: str = None, tracing_sample_ratio: float = None,
             **options):
         self.DEBUG_MODE = debug_mode if debug_mode is not None else self.DEBUG_MODE
         self.APPLICATION_NAME = application_name or self.APPLICATION_NAME
@@ -98,9 +174,70 @@ class RekcurdConfig:
         self.GCS_ACCESS_KEY = gcs_access_key or self.GCS_ACCESS_KEY
         self.GCS_SECRET_KEY = gcs_secret_key or self.GCS_SECRET_KEY
         self.GCS_BUCKET_NAME = gcs_bucket_name or self.GCS_BUCKET_NAME
+        self.BATCHING_MAX_SIZE = int(batching_max_size or self.BATCHING_MAX_SIZE)
+        self.BATCHING_MAX_WAIT_MS = float(
+            batching_max_wait_ms if batching_max_wait_ms is not None else self.BATCHING_MAX_WAIT_MS)
+        self.STREAMING_MAX_INFLIGHT = int(streaming_max_inflight or self.STREAMING_MAX_INFLIGHT)
+        self.CACHE_MAX_SIZE = int(cache_max_size if cache_max_size is not None else self.CACHE_MAX_SIZE)
+        self.CACHE_TTL_SEC = float(cache_ttl_sec if cache_ttl_sec is not None else self.CACHE_TTL_SEC)
+        self.NUMPY_MODE = numpy_mode if numpy_mode is not None else self.NUMPY_MODE
+        self.ADMISSION_MAX_INFLIGHT = int(
+            admission_max_inflight if admission_max_inflight is not None else self.ADMISSION_MAX_INFLIGHT)
+        self.ADMISSION_MAX_QUEUE = int(
+            admission_max_queue if admission_max_queue is not None else self.ADMISSION_MAX_QUEUE)
+        self.COALESCING_ENABLED = coalescing_enabled if coalescing_enabled is not None else self.COALESCING_ENABLED
+        self.WARMUP_PASSES = int(warmup_passes if warmup_passes is not None else self.WARMUP_PASSES)
+        self.WARMUP_INPUTS = warmup_inputs if warmup_inputs is not None else self.WARMUP_INPUTS
+        self.WARMUP_FILE_PATH = warmup_filepath or self.WARMUP_FILE_PATH
+        self.SWITCH_MODEL_BACKGROUND = (
+            switch_model_background if switch_model_background is not None else self.SWITCH_MODEL_BACKGROUND)
+        self.MODEL_REGISTRY_MAX_MODELS = (
+            model_registry_max_models if model_registry_max_models is not None else self.MODEL_REGISTRY_MAX_MODELS)
+        self.MODEL_REGISTRY_MAX_MEMORY_MB = (
+            model_registry_max_memory_mb if model_registry_max_memory_mb is not None
+            else self.MODEL_REGISTRY_MAX_MEMORY_MB)
+        self.SHADOW_FILE_PATH = shadow_filepath or self.SHADOW_FILE_PATH
+        self.SHADOW_RATIO = shadow_ratio if shadow_ratio is not None else self.SHADOW_RATIO
+        self.SHADOW_MAX_WORKERS = shadow_max_workers if shadow_max_workers is not None else self.SHADOW_MAX_WORKERS
+        self.SHADOW_MAX_QUEUE = shadow_max_queue if shadow_max_queue is not None else self.SHADOW_MAX_QUEUE
+        self.GRPC_MAX_WORKERS = int(grpc_max_workers or self.GRPC_MAX_WORKERS)
+        self.GRPC_EXECUTOR_MAX_WORKERS = int(
+            grpc_executor_max_workers if grpc_executor_max_workers is not None else self.GRPC_EXECUTOR_MAX_WORKERS)
+        self.GRPC_MAX_SEND_MESSAGE_LENGTH = int(
+            grpc_max_send_message_length if grpc_max_send_message_length is not None
+            else self.GRPC_MAX_SEND_MESSAGE_LENGTH)
+        self.GRPC_MAX_RECEIVE_MESSAGE_LENGTH = int(
+            grpc_max_receive_message_length if grpc_max_receive_message_length is not None
+            else self.GRPC_MAX_RECEIVE_MESSAGE_LENGTH)
+        self.GRPC_MAX_CONCURRENT_STREAMS = int(
+            grpc_max_concurrent_streams if grpc_max_concurrent_streams is not None
+            else self.GRPC_MAX_CONCURRENT_STREAMS)
+        self.GRPC_KEEPALIVE_TIME_MS = int(
+            grpc_keepalive_time_ms if grpc_keepalive_time_ms is not None else self.GRPC_KEEPALIVE_TIME_MS)
+        self.GRPC_KEEPALIVE_TIMEOUT_MS = int(
+            grpc_keepalive_timeout_ms if grpc_keepalive_timeout_ms is not None else self.GRPC_KEEPALIVE_TIMEOUT_MS)
+        self.GRPC_KEEPALIVE_PERMIT_WITHOUT_CALLS = (
+            grpc_keepalive_permit_without_calls if grpc_keepalive_permit_without_calls is not None
+            else self.GRPC_KEEPALIVE_PERMIT_WITHOUT_CALLS)
+        self.GRPC_MIN_PING_INTERVAL_MS = int(
+            grpc_min_ping_interval_ms if grpc_min_ping_interval_ms is not None else self.GRPC_MIN_PING_INTERVAL_MS)
+        self.GRPC_COMPRESSION = grpc_compression or self.GRPC_COMPRESSION
+        self.GRPC_SO_REUSEPORT = grpc_so_reuseport if grpc_so_reuseport is not None else self.GRPC_SO_REUSEPORT
+        self.SHUTDOWN_GRACE_PERIOD_SEC = float(
+            shutdown_grace_period_sec if shutdown_grace_period_sec is not None else self.SHUTDOWN_GRACE_PERIOD_SEC)
+        self.SHUTDOWN_PRE_STOP_DELAY_SEC = float(
+            shutdown_pre_stop_delay_sec if shutdown_pre_stop_delay_sec is not None
+            else self.SHUTDOWN_PRE_STOP_DELAY_SEC)
+        self.METRICS_HOST = metrics_host if metrics_host is not None else self.METRICS_HOST
+        self.METRICS_PORT = int(metrics_port if metrics_port is not None else self.METRICS_PORT)
+        self.TRACING_FILE_PATH = tracing_filepath or self.TRACING_FILE_PATH
+        self.TRACING_ENDPOINT = tracing_endpoint or self.TRACING_ENDPOINT
+        self.TRACING_SAMPLE_RATIO = float(
+            tracing_sample_ratio if tracing_sample_ratio is not None else self.TRACING_SAMPLE_RATIO)
 
     def __load_from_file(self, config_file: str):
         if config_file is not None:
+            import yaml
             with open(config_file, 'r') as f:
                 config = yaml.load(f)
         else:
@@ -141,6 +278,60 @@ class RekcurdConfig:
             self.GCS_BUCKET_NAME = config_model_mode.get("bucket")
         else:
             raise ValueError("'{}' is not supported as ModelModeEnum".format(model_mode))
+        config_batching = config.get("batching", dict())
+        self.BATCHING_MAX_SIZE = int(config_batching.get("max_size", self.__BATCHING_DEFAULT_MAX_SIZE))
+        self.BATCHING_MAX_WAIT_MS = float(config_batching.get("max_wait_ms", self.__BATCHING_DEFAULT_MAX_WAIT_MS))
+        config_streaming = config.get("streaming", dict())
+        self.STREAMING_MAX_INFLIGHT = int(config_streaming.get("max_inflight", self.__STREAMING_DEFAULT_MAX_INFLIGHT))
+        config_cache = config.get("cache", dict())
+        self.CACHE_MAX_SIZE = int(config_cache.get("max_size", self.__CACHE_DEFAULT_MAX_SIZE))
+        self.CACHE_TTL_SEC = float(config_cache.get("ttl_sec", self.__CACHE_DEFAULT_TTL_SEC))
+        self.NUMPY_MODE = config.get("numpy_mode", False)
+        config_admission = config.get("admission", dict())
+        self.ADMISSION_MAX_INFLIGHT = int(config_admission.get("max_inflight", self.__ADMISSION_DEFAULT_MAX_INFLIGHT))
+        self.ADMISSION_MAX_QUEUE = int(config_admission.get("max_queue", self.__ADMISSION_DEFAULT_MAX_QUEUE))
+        config_coalescing = config.get("coalescing", dict())
+        self.COALESCING_ENABLED = config_coalescing.get("enabled", False)
+        config_warmup = config.get("warmup", dict())
+        self.WARMUP_PASSES = int(config_warmup.get("passes", self.__WARMUP_DEFAULT_PASSES))
+        self.WARMUP_INPUTS = config_warmup.get("inputs")
+        self.WARMUP_FILE_PATH = config_warmup.get("filepath")
+        config_switch_model = config.get("switch_model", dict())
+        self.SWITCH_MODEL_BACKGROUND = config_switch_model.get("background", False)
+        config_model_registry = config.get("model_registry", dict())
+        self.MODEL_REGISTRY_MAX_MODELS = int(config_model_registry.get(
+            "max_models", self.__MODEL_REGISTRY_DEFAULT_MAX_MODELS))
+        self.MODEL_REGISTRY_MAX_MEMORY_MB = float(config_model_registry.get(
+            "max_memory_mb", self.__MODEL_REGISTRY_DEFAULT_MAX_MEMORY_MB))
+        config_shadow = config.get("shadow", dict())
+        self.SHADOW_FILE_PATH = config_shadow.get("filepath")
+        self.SHADOW_RATIO = float(config_shadow.get("ratio", self.__SHADOW_DEFAULT_RATIO))
+        self.SHADOW_MAX_WORKERS = int(config_shadow.get("max_workers", self.__SHADOW_DEFAULT_MAX_WORKERS))
+        self.SHADOW_MAX_QUEUE = int(config_shadow.get("max_queue", self.__SHADOW_DEFAULT_MAX_QUEUE))
+        config_grpc = config.get("grpc", dict())
+        self.GRPC_MAX_WORKERS = int(config_grpc.get("max_workers", self.__GRPC_DEFAULT_MAX_WORKERS))
+        self.GRPC_EXECUTOR_MAX_WORKERS = int(config_grpc.get("executor_max_workers", 0))
+        self.GRPC_MAX_SEND_MESSAGE_LENGTH = int(config_grpc.get("max_send_message_length", 0))
+        self.GRPC_MAX_RECEIVE_MESSAGE_LENGTH = int(config_grpc.get("max_receive_message_length", 0))
+        self.GRPC_MAX_CONCURRENT_STREAMS = int(config_grpc.get("max_concurrent_streams", 0))
+        self.GRPC_KEEPALIVE_TIME_MS = int(config_grpc.get("keepalive_time_ms", 0))
+        self.GRPC_KEEPALIVE_TIMEOUT_MS = int(config_grpc.get("keepalive_timeout_ms", 0))
+        self.GRPC_KEEPALIVE_PERMIT_WITHOUT_CALLS = config_grpc.get("keepalive_permit_without_calls", False)
+        self.GRPC_MIN_PING_INTERVAL_MS = int(config_grpc.get("min_ping_interval_ms", 0))
+        self.GRPC_COMPRESSION = config_grpc.get("compression")
+        self.GRPC_SO_REUSEPORT = config_grpc.get("so_reuseport", False)
+        config_shutdown = config.get("shutdown", dict())
+        self.SHUTDOWN_GRACE_PERIOD_SEC = float(config_shutdown.get(
+            "grace_period_sec", self.__SHUTDOWN_DEFAULT_GRACE_PERIOD_SEC))
+        self.SHUTDOWN_PRE_STOP_DELAY_SEC = float(config_shutdown.get(
+            "pre_stop_delay_sec", self.__SHUTDOWN_DEFAULT_PRE_STOP_DELAY_SEC))
+        config_metrics = config.get("metrics", dict())
+        self.METRICS_HOST = config_metrics.get("host", self.__METRICS_DEFAULT_HOST)
+        self.METRICS_PORT = int(config_metrics.get("port", self.__METRICS_DEFAULT_PORT))
+        config_tracing = config.get("tracing", dict())
+        self.TRACING_FILE_PATH = config_tracing.get("filepath")
+        self.TRACING_ENDPOINT = config_tracing.get("endpoint")
+        self.TRACING_SAMPLE_RATIO = float(config_tracing.get("sample_ratio", self.__TRACING_DEFAULT_SAMPLE_RATIO))
 
     def __load_from_env(self):
         self.DEBUG_MODE = os.getenv("REKCURD_DEBUG_MODE", "True").lower() == 'true'
@@ -164,3 +355,46 @@ class RekcurdConfig:
         self.GCS_ACCESS_KEY = os.getenv("REKCURD_GCS_ACCESS_KEY")
         self.GCS_SECRET_KEY = os.getenv("REKCURD_GCS_SECRET_KEY")
         self.GCS_BUCKET_NAME = os.getenv("REKCURD_GCS_BUCKET_NAME")
+        self.BATCHING_MAX_SIZE = int(os.getenv("REKCURD_BATCHING_MAX_SIZE", str(self.__BATCHING_DEFAULT_MAX_SIZE)))
+        self.BATCHING_MAX_WAIT_MS = float(os.getenv("REKCURD_BATCHING_MAX_WAIT_MS", str(self.__BATCHING_DEFAULT_MAX_WAIT_MS)))
+        self.STREAMING_MAX_INFLIGHT = int(os.getenv("REKCURD_STREAMING_MAX_INFLIGHT", str(self.__STREAMING_DEFAULT_MAX_INFLIGHT)))
+        self.CACHE_MAX_SIZE = int(os.getenv("REKCURD_CACHE_MAX_SIZE", str(self.__CACHE_DEFAULT_MAX_SIZE)))
+        self.CACHE_TTL_SEC = float(os.getenv("REKCURD_CACHE_TTL_SEC", str(self.__CACHE_DEFAULT_TTL_SEC)))
+        self.NUMPY_MODE = os.getenv("REKCURD_NUMPY_MODE", "False").lower() == 'true'
+        self.ADMISSION_MAX_INFLIGHT = int(os.getenv("REKCURD_ADMISSION_MAX_INFLIGHT", str(self.__ADMISSION_DEFAULT_MAX_INFLIGHT)))
+        self.ADMISSION_MAX_QUEUE = int(os.getenv("REKCURD_ADMISSION_MAX_QUEUE", str(self.__ADMISSION_DEFAULT_MAX_QUEUE)))
+        self.COALESCING_ENABLED = os.getenv("REKCURD_COALESCING_ENABLED", "False").lower() == 'true'
+        self.WARMUP_PASSES = int(os.getenv("REKCURD_WARMUP_PASSES", str(self.__WARMUP_DEFAULT_PASSES)))
+        self.WARMUP_INPUTS = json.loads(os.getenv("REKCURD_WARMUP_INPUTS", "null"))
+        self.WARMUP_FILE_PATH = os.getenv("REKCURD_WARMUP_FILE_PATH")
+        self.SWITCH_MODEL_BACKGROUND = os.getenv("REKCURD_SWITCH_MODEL_BACKGROUND", "False").lower() == 'true'
+        self.MODEL_REGISTRY_MAX_MODELS = int(os.getenv(
+            "REKCURD_MODEL_REGISTRY_MAX_MODELS", str(self.__MODEL_REGISTRY_DEFAULT_MAX_MODELS)))
+        self.MODEL_REGISTRY_MAX_MEMORY_MB = float(os.getenv(
+            "REKCURD_MODEL_REGISTRY_MAX_MEMORY_MB", str(self.__MODEL_REGISTRY_DEFAULT_MAX_MEMORY_MB)))
+        self.SHADOW_FILE_PATH = os.getenv("REKCURD_SHADOW_FILE_PATH")
+        self.SHADOW_RATIO = float(os.getenv("REKCURD_SHADOW_RATIO", str(self.__SHADOW_DEFAULT_RATIO)))
+        self.SHADOW_MAX_WORKERS = int(os.getenv("REKCURD_SHADOW_MAX_WORKERS", str(self.__SHADOW_DEFAULT_MAX_WORKERS)))
+        self.SHADOW_MAX_QUEUE = int(os.getenv("REKCURD_SHADOW_MAX_QUEUE", str(self.__SHADOW_DEFAULT_MAX_QUEUE)))
+        self.GRPC_MAX_WORKERS = int(os.getenv("REKCURD_GRPC_MAX_WORKERS", str(self.__GRPC_DEFAULT_MAX_WORKERS)))
+        self.GRPC_EXECUTOR_MAX_WORKERS = int(os.getenv("REKCURD_GRPC_EXECUTOR_MAX_WORKERS", "0"))
+        self.GRPC_MAX_SEND_MESSAGE_LENGTH = int(os.getenv("REKCURD_GRPC_MAX_SEND_MESSAGE_LENGTH", "0"))
+        self.GRPC_MAX_RECEIVE_MESSAGE_LENGTH = int(os.getenv("REKCURD_GRPC_MAX_RECEIVE_MESSAGE_LENGTH", "0"))
+        self.GRPC_MAX_CONCURRENT_STREAMS = int(os.getenv("REKCURD_GRPC_MAX_CONCURRENT_STREAMS", "0"))
+        self.GRPC_KEEPALIVE_TIME_MS = int(os.getenv("REKCURD_GRPC_KEEPALIVE_TIME_MS", "0"))
+        self.GRPC_KEEPALIVE_TIMEOUT_MS = int(os.getenv("REKCURD_GRPC_KEEPALIVE_TIMEOUT_MS", "0"))
+        self.GRPC_KEEPALIVE_PERMIT_WITHOUT_CALLS = os.getenv(
+            "REKCURD_GRPC_KEEPALIVE_PERMIT_WITHOUT_CALLS", "False").lower() == 'true'
+        self.GRPC_MIN_PING_INTERVAL_MS = int(os.getenv("REKCURD_GRPC_MIN_PING_INTERVAL_MS", "0"))
+        self.GRPC_COMPRESSION = os.getenv("REKCURD_GRPC_COMPRESSION")
+        self.GRPC_SO_REUSEPORT = os.getenv("REKCURD_GRPC_SO_REUSEPORT", "False").lower() == 'true'
+        self.SHUTDOWN_GRACE_PERIOD_SEC = float(os.getenv(
+            "REKCURD_SHUTDOWN_GRACE_PERIOD_SEC", str(self.__SHUTDOWN_DEFAULT_GRACE_PERIOD_SEC)))
+        self.SHUTDOWN_PRE_STOP_DELAY_SEC = float(os.getenv(
+            "REKCURD_SHUTDOWN_PRE_STOP_DELAY_SEC", str(self.__SHUTDOWN_DEFAULT_PRE_STOP_DELAY_SEC)))
+        self.METRICS_HOST = os.getenv("REKCURD_METRICS_HOST", self.__METRICS_DEFAULT_HOST)
+        self.METRICS_PORT = int(os.getenv("REKCURD_METRICS_PORT", str(self.__METRICS_DEFAULT_PORT)))
+        self.TRACING_FILE_PATH = os.getenv("REKCURD_TRACING_FILE_PATH")
+        self.TRACING_ENDPOINT = os.getenv("REKCURD_TRACING_ENDPOINT")
+        self.TRACING_SAMPLE_RATIO = float(os.getenv(
+            "REKCURD_TRACING_SAMPLE_RATIO", str(self.__TRACING_DEFAULT_SAMPLE_RATIO)))
@@ -0,0 +1,333 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+
+import math
+import threading
+import time
+
+from typing import Callable, Dict, List, Sequence, Tuple
+
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LOAD_BUCKETS = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+Sample = Tuple[str, Dict[str, str], float]
+
+
+class _Metric:
+    """ Base class of metrics. A metric with ``labelnames`` holds one child per label values.
+    """
+    TYPE = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = dict()
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+
+    def labels(self, *labelvalues):
+        """ Child of the label values. Created on the first call.
+        """
+        child = self._children.get(labelvalues)
+        if child is None:
+            if len(labelvalues) != len(self.labelnames):
+                raise ValueError("{0} requires labels {1}".format(self.name, self.labelnames))
+            with self._lock:
+                child = self._children.setdefault(labelvalues, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplemented()
+
+    def _items(self) -> List[Tuple[Dict[str, str], object]]:
+        with self._lock:
+            items = list(self._children.items())
+        return [(dict(zip(self.labelnames, (str(v) for v in labelvalues))), child) for labelvalues, child in items]
+
+    def collect(self) -> List[Sample]:
+        return [(self.name, labels, child.get()) for labels, child in self._items()]
+
+
+class _Value:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = float(value)
+
+    def get(self) -> float:
+        return self.value
+
+
+class Counter(_Metric):
+    """ Monotonically increasing value. e.g. number of errors
+    """
+    TYPE = 'counter'
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._children[()].inc(amount)
+
+    def get(self) -> float:
+        return self._children[()].get()
+
+
+class Gauge(Counter):
+    """ Value going up and down. e.g. number of in-flight requests
+    """
+    TYPE = 'gauge'
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._children[()].dec(amount)
+
+    def set(self, value: float) -> None:
+        self._children[()].set(value)
+
+
+class _HistogramValue:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def time(self) -> '_Timer':
+        """ Context manager observing the seconds taken in the ``with`` block.
+        """
+        return _Timer(self)
+
+
+class _Timer:
+    def __init__(self, histogram: _HistogramValue):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.monotonic()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.histogram.observe(time.monotonic() - self.start)
+
+
+class Histogram(_Metric):
+    """ Distribution of values in cumulative buckets. e.g. latency
+    """
+    TYPE = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self._children[()].observe(value)
+
+    def time(self) -> _Timer:
+        return self._children[()].time()
+
+    def collect(self) -> List[Sample]:
+        samples = []
+        for labels, child in self._items():
+            with child._lock:
+                counts, total, count = list(child.counts), child.sum, child.count
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                samples.append((self.name + '_bucket', dict(labels, le=_format_value(bound)), cumulative))
+            samples.append((self.name + '_sum', labels, total))
+            samples.append((self.name + '_count', labels, count))
+        return samples
+
+
+class _Callback(_Metric):
+    """ Value read by ``func`` when collected. e.g. counters kept by other classes
+    """
+
+    def __init__(self, name: str, documentation: str, func: Callable[[], float], metric_type: str):
+        self.func = func
+        self.TYPE = metric_type
+        super().__init__(name, documentation)
+
+    def _new_child(self):
+        return None
+
+    def collect(self) -> List[Sample]:
+        return [(self.name, {}, self.func())]
+
+
+class RekcurdMetrics:
+    """ Registry of metrics exported in the Prometheus text format
+
+    Metrics are registered once by name; registering the same name again
+    returns the existing metric, so that modules can declare the metrics
+    they update at import time.
+    """
+
+    CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = dict()
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric, replace: bool = False) -> _Metric:
+        with self._lock:
+            if replace or metric.name not in self._metrics:
+                self._metrics[metric.name] = metric
+            return self._metrics[metric.name]
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def callback(self, name: str, documentation: str, func: Callable[[], float],
+                 metric_type: str = Counter.TYPE) -> None:
+        """ Export a value kept elsewhere. Replaces the callback of the same name.
+
+        :param name: Metric name.
+        :param documentation: Help text.
+        :param func: Function returning the current value.
+        :param metric_type: "counter" or "gauge".
+        """
+        self._register(_Callback(name, documentation, func, metric_type), replace=True)
+
+    def get(self, name: str) -> _Metric:
+        return self._metrics[name]
+
+    def render(self) -> str:
+        """ All the metrics in the Prometheus text format.
+        """
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        lines = []
+        for metric in metrics:
+            try:
+                samples = metric.collect()
+            except Exception:
+                # A broken callback must not hide the other metrics.
+                continue
+            lines.append('# HELP {0} {1}'.format(metric.name, _escape(metric.documentation, help_text=True)))
+            lines.append('# TYPE {0} {1}'.format(metric.name, metric.TYPE))
+            for name, labels, value in samples:
+                if labels:
+                    name += '{' + ','.join('{0}="{1}"'.format(k, _escape(v)) for k, v in labels.items()) + '}'
+                lines.append('{0} {1}'.format(name, _format_value(value)))
+        return '\n'.join(lines) + '\n'
+
+    def start_http_server(self, port: int, host: str = '') -> 'ThreadingHTTPServer':
+        """ Serve the metrics on "http://{host}:{port}/metrics" on a daemon thread.
+
+        :return: The server. Call ``shutdown`` to stop it.
+        """
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        registry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', registry.CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True, name='rekcurd-metrics').start()
+        return server
+
+
+def _escape(value: str, help_text: bool = False) -> str:
+    value = str(value).replace('\\', '\\\\').replace('\n', '\\n')
+    return value if help_text else value.replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    if value == -math.inf:
+        return '-Inf'
+    if isinstance(value, int) or float(value).is_integer():
+        return '{:.1f}'.format(value)
+    return repr(float(value))
+
+
+metrics = RekcurdMetrics()
+
+RPC_DURATION = metrics.histogram(
+    'rekcurd_rpc_duration_seconds', 'Time to handle a gRPC call, from the start of the handler.',
+    ['service', 'method'])
+RPC_INFLIGHT = metrics.gauge(
+    'rekcurd_rpc_inflight', 'gRPC calls being handled.', ['service', 'method'])
+RPC_ERRORS = metrics.counter(
+    'rekcurd_rpc_errors_total', 'gRPC calls ended by an exception, including aborts.', ['service', 'method'])
+QUEUE_WAIT = metrics.histogram(
+    'rekcurd_queue_wait_seconds',
+    'Time waiting before work starts. "executor": gRPC thread pool, "admission": admission control, '
+    '"batch": micro-batching.', ['queue'])
+PREDICT_DURATION = metrics.histogram(
+    'rekcurd_predict_duration_seconds', 'Time spent in "predict" or "predict_async" per input.', ['method'])
+PREDICT_BATCH_DURATION = metrics.histogram(
+    'rekcurd_predict_batch_duration_seconds', 'Time spent in "predict_batch" per batch.')
+PREDICT_BATCH_SIZE = metrics.histogram(
+    'rekcurd_predict_batch_size', 'Number of inputs passed to "predict_batch".', buckets=SIZE_BUCKETS)
+PREDICT_ERRORS = metrics.counter(
+    'rekcurd_predict_errors_total', 'Predictions failed and answered with the default result.', ['method'])
+SERVICE_LOG_DURATION = metrics.histogram(
+    'rekcurd_service_log_duration_seconds', 'Time spent in writing the service log per request.')
+SHADOW_PREDICT_DURATION = metrics.histogram(
+    'rekcurd_shadow_predict_duration_seconds',
+    'Time of the predictions compared by shadow traffic, by the model. "live" or "shadow".', ['model'])
+MODEL_LOAD_DURATION = metrics.histogram(
+    'rekcurd_model_load_duration_seconds', 'Time to download, load and warm up a ML model.', buckets=LOAD_BUCKETS)
+MODEL_SWITCH_DURATION = metrics.histogram(
+    'rekcurd_model_switch_duration_seconds', 'Time of "SwitchModel" by the result. "success" or "failure".',
+    ['result'], buckets=LOAD_BUCKETS)
+DATA_SERVER_BYTES = metrics.counter(
+    'rekcurd_data_server_bytes_total', 'Bytes transferred by the data server. "download" or "upload".',
+    ['operation'])
+DATA_SERVER_DURATION = metrics.histogram(
+    'rekcurd_data_server_duration_seconds', 'Time of transfers by the data server. "download" or "upload".',
+    ['operation'], buckets=LOAD_BUCKETS)
@@ -0,0 +1,327 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+
+import contextlib
+import contextvars
+import json
+import queue
+import random
+import re
+import threading
+import time
+
+from socket import gethostname
+from typing import Dict, List, Optional
+
+from .rekcurd_metrics import metrics
+
+
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+STATUS_CODE_ERROR = 2
+
+_HEX_ID = re.compile(r'^[0-9a-f]{16}([0-9a-f]{16})?$')
+_current_trace = contextvars.ContextVar('rekcurd_trace', default=None)
+
+
+def _new_id(bits: int) -> str:
+    return '{0:0{1}x}'.format(random.getrandbits(bits), bits // 4)
+
+
+def _parse_id(value: Optional[str], width: int) -> Optional[str]:
+    """ B3 ID in lower hex padded to ``width`` digits. 64 bit trace IDs are padded to 128 bit. None if invalid.
+    """
+    if not value:
+        return None
+    value = value.lower()
+    if not _HEX_ID.match(value) or len(value) > width or int(value, 16) == 0:
+        return None
+    return value.rjust(width, '0')
+
+
+class RekcurdSpan:
+    """ Timed operation of a trace
+    """
+    __slots__ = ('name', 'span_id', 'parent_span_id', 'kind', 'attributes', 'start_ns', 'end_ns', 'error')
+
+    def __init__(self, name: str, span_id: str, parent_span_id: Optional[str], kind: int = SPAN_KIND_INTERNAL,
+                 attributes: dict = None):
+        self.name = name
+        self.span_id = span_id
+        self.parent_span_id = parent_span_id
+        self.kind = kind
+        self.attributes = attributes or dict()
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.error = None
+
+    def end(self, error: Exception = None) -> None:
+        self.end_ns = time.time_ns()
+        if error is not None:
+            self.error = str(error) or type(error).__name__
+
+    def to_otlp(self, trace_id: str) -> dict:
+        """ Span in the OTLP/JSON encoding of OpenTelemetry.
+        """
+        span = {
+            'traceId': trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': self.kind,
+            'startTimeUnixNano': str(self.start_ns),
+            'endTimeUnixNano': str(self.end_ns),
+            'attributes': _to_attributes(self.attributes),
+        }
+        if self.parent_span_id:
+            span['parentSpanId'] = self.parent_span_id
+        if self.error is not None:
+            span['status'] = {'code': STATUS_CODE_ERROR, 'message': self.error}
+        return span
+
+
+class RekcurdTrace:
+    """ Spans recorded while a worker handles a request
+
+    ``trace_id`` and the parent span come from the B3 headers forwarded by
+    the mesh, so that the spans of the worker nest under the span of the
+    caller. ``span_id`` is the root span of the worker. Nothing is recorded
+    unless ``sampled``, but the IDs are still written to the service log.
+    """
+
+    def __init__(self, name: str, trace_id: str, span_id: str, parent_span_id: Optional[str],
+                 sampled: bool, request_id: Optional[str] = None):
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.sampled = sampled
+        self.request_id = request_id
+        self.spans: List[RekcurdSpan] = list()
+        if sampled:
+            attributes = {'rpc.system': 'grpc', 'rpc.method': name}
+            if request_id:
+                attributes['rekcurd.request_id'] = request_id
+            self.root = RekcurdSpan(name, span_id, parent_span_id, SPAN_KIND_SERVER, attributes)
+        else:
+            self.root = None
+
+    @contextlib.contextmanager
+    def span(self, name: str, **attributes):
+        """ Record the ``with`` block as a child span of the root span. The exception raised in it is recorded.
+        """
+        if not self.sampled:
+            yield None
+            return
+        span = RekcurdSpan(name, _new_id(64), self.span_id, attributes=attributes)
+        try:
+            yield span
+        except BaseException as e:
+            span.end(e)
+            raise
+        else:
+            span.end()
+        finally:
+            self.spans.append(span)
+
+    def get_log_fields(self) -> Dict[str, str]:
+        """ IDs added to the service log.
+        """
+        fields = dict()
+        if self.trace_id:
+            fields['trace_id'] = self.trace_id
+        if self.span_id:
+            fields['span_id'] = self.span_id
+        if self.request_id:
+            fields['request_id'] = self.request_id
+        return fields
+
+
+class RekcurdSpanExporter:
+    """ Export spans in the OTLP/JSON encoding on a background thread
+
+    Spans are appended to ``filepath`` (one "ExportTraceServiceRequest" per
+    line) and/or posted to ``endpoint``, the OTLP/HTTP traces endpoint of a
+    collector (e.g. "http://otel-collector:4318/v1/traces"). Spans are
+    dropped while ``max_queue`` traces are pending, so that a slow sink
+    never blocks requests.
+    """
+
+    TIMEOUT_SEC = 10.0
+
+    def __init__(self, service_name: str, filepath: str = None, endpoint: str = None,
+                 max_queue: int = 2048, max_batch: int = 512):
+        self.resource = {'attributes': _to_attributes({'service.name': service_name, 'host.name': gethostname()})}
+        self.filepath = filepath
+        self.endpoint = endpoint
+        self.max_batch = max_batch
+        self.exported = 0
+        self.dropped = 0
+        self.failed = 0
+        self._queue = queue.Queue(max_queue)
+        self._thread = threading.Thread(target=self._run, daemon=True, name='rekcurd-tracing')
+        self._thread.start()
+
+    def export(self, trace: RekcurdTrace) -> None:
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            self.dropped += len(trace.spans) + 1
+
+    def flush(self, timeout: float = None) -> bool:
+        """ Wait until the pending spans are written.
+        """
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def shutdown(self, timeout: float = None) -> None:
+        self.flush(timeout)
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        stopped = False
+        while not stopped:
+            items = [self._queue.get()]
+            while len(items) < self.max_batch:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            traces = [item for item in items if isinstance(item, RekcurdTrace)]
+            if traces:
+                self._write(traces)
+            for item in items:
+                if item is None:
+                    stopped = True
+                elif isinstance(item, threading.Event):
+                    item.set()
+
+    def _write(self, traces: List[RekcurdTrace]) -> None:
+        spans = [span.to_otlp(trace.trace_id) for trace in traces for span in [trace.root] + trace.spans]
+        body = json.dumps({'resourceSpans': [{
+            'resource': self.resource,
+            'scopeSpans': [{'scope': {'name': 'rekcurd'}, 'spans': spans}],
+        }]}, separators=(',', ':'))
+        try:
+            if self.filepath:
+                with open(self.filepath, 'a') as f:
+                    f.write(body + '\n')
+            if self.endpoint:
+                import urllib.request
+                request = urllib.request.Request(
+                    self.endpoint, data=body.encode('utf-8'), headers={'Content-Type': 'application/json'})
+                urllib.request.urlopen(request, timeout=self.TIMEOUT_SEC).close()
+            self.exported += len(spans)
+        except Exception:
+            self.failed += len(spans)
+
+
+class RekcurdTracer:
+    """ Tracer of the "Predict_*" RPCs
+
+    Disabled until :func:``start`` is called with a sink. While disabled,
+    only the IDs forwarded by the caller are passed to the service log.
+    """
+
+    def __init__(self):
+        self.exporter: RekcurdSpanExporter = None
+        self.sample_ratio = 1.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def start(self, service_name: str, filepath: str = None, endpoint: str = None,
+              sample_ratio: float = 1.0) -> None:
+        """ Start exporting spans. Call it in every worker process, since the exporting thread doesn't survive fork.
+
+        :param service_name: "service.name" of the spans.
+        :param filepath: File the spans are appended to.
+        :param endpoint: OTLP/HTTP traces endpoint of a collector.
+        :param sample_ratio: Fraction of the traces recorded when the caller doesn't decide it by "x-b3-sampled".
+        """
+        self.shutdown()
+        self.sample_ratio = sample_ratio
+        exporter = self.exporter = RekcurdSpanExporter(service_name, filepath, endpoint)
+        metrics.callback('rekcurd_tracing_spans_exported_total', 'Spans exported.', lambda: exporter.exported)
+        metrics.callback('rekcurd_tracing_spans_dropped_total', 'Spans dropped by the exporting queue limit.',
+                         lambda: exporter.dropped)
+        metrics.callback('rekcurd_tracing_spans_failed_total', 'Spans failed to be written to the sink.',
+                         lambda: exporter.failed)
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """ Write out the pending spans and stop exporting.
+        """
+        exporter, self.exporter = self.exporter, None
+        if exporter is not None:
+            exporter.shutdown(timeout)
+
+    def is_sampled(self, headers: Dict[str, str]) -> bool:
+        if headers.get('x-b3-flags') == '1':
+            return True
+        sampled = headers.get('x-b3-sampled', '').lower()
+        if sampled in ('1', 'true', 'd'):
+            return True
+        if sampled in ('0', 'false'):
+            return False
+        return random.random() < self.sample_ratio
+
+    @contextlib.contextmanager
+    def trace(self, name: str, headers: Dict[str, str]):
+        """ Trace the ``with`` block as a request of the worker, and make it the current trace.
+
+        :param name: Name of the root span. e.g. "Predict_String_String"
+        :param headers: B3 headers and "x-request-id" of the request.
+        """
+        trace_id = _parse_id(headers.get('x-b3-traceid'), 32)
+        parent_span_id = _parse_id(headers.get('x-b3-spanid'), 16) if trace_id else None
+        request_id = headers.get('x-request-id')
+        if self.enabled:
+            trace = RekcurdTrace(name, trace_id or _new_id(128), _new_id(64), parent_span_id,
+                                 self.is_sampled(headers), request_id)
+        else:
+            # The worker has no span of its own. Log the span of the caller.
+            trace = RekcurdTrace(name, trace_id, parent_span_id, None, False, request_id)
+        token = _current_trace.set(trace)
+        error = None
+        try:
+            yield trace
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            _current_trace.reset(token)
+            if trace.sampled:
+                trace.root.end(error)
+                exporter = self.exporter
+                if exporter is not None:
+                    exporter.export(trace)
+
+
+def get_current_trace() -> Optional[RekcurdTrace]:
+    """ Trace of the request handled on the current thread or asyncio task.
+    """
+    return _current_trace.get()
+
+
+def _to_attributes(attributes: dict) -> List[dict]:
+    result = list()
+    for key, value in attributes.items():
+        if isinstance(value, bool):
+            result.append({'key': key, 'value': {'boolValue': value}})
+        elif isinstance(value, int):
+            result.append({'key': key, 'value': {'intValue': str(value)}})
+        elif isinstance(value, float):
+            result.append({'key': key, 'value': {'doubleValue': value}})
+        else:
+            result.append({'key': key, 'value': {'stringValue': str(value)}})
+    return result
+
+
+tracer = RekcurdTracer()
@@ -43,6 +43,8 @@ with open('requirements.txt') as f:
         else:
             REQUIRES.append(line)
 
+EXTRAS['numpy'] = ['numpy>=1.14.0']
+
 with open('test-requirements.txt') as f:
     TESTS_REQUIRES = f.readlines()
 
@@ -59,6 +61,7 @@ setup(
     license="Apache License Version 2.0",
     url="https://github.com/rekcurd/rekcurd-python",
     keywords=["Rekcurd", "Kubernetes"],
+    python_requires='>=3.7',
     install_requires=REQUIRES,
     tests_require=TESTS_REQUIRES,
     extras_require=EXTRAS,
@@ -87,7 +90,6 @@ setup(
         "Operating System :: OS Independent",
         "Programming Language :: Python",
         "Programming Language :: Python :: 3",
-        "Programming Language :: Python :: 3.6",
         "Programming Language :: Python :: 3.7",
         ],
 )
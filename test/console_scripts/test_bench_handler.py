@@ -0,0 +1,127 @@
+import json
+import os
+import tempfile
+import unittest
+from concurrent import futures
+
+import grpc
+
+from rekcurd.console_scripts import create_parser
+from rekcurd.console_scripts.bench_handler import (
+    SERVICE_NAME, BenchRecorder, get_methods, load_inputs, percentile, run_open_loop, summarize
+)
+from rekcurd.console_scripts.errors import CommandError
+
+
+def fake_handler(method):
+    def respond(request, context):
+        return method.response_class()
+
+    def respond_stream(request, context):
+        yield method.response_class()
+
+    def consume(request_iterator, context):
+        return [method.response_class() for _ in request_iterator][-1]
+
+    def consume_stream(request_iterator, context):
+        for _ in request_iterator:
+            yield method.response_class()
+    behaviors = {
+        (False, False): (grpc.unary_unary_rpc_method_handler, respond),
+        (False, True): (grpc.unary_stream_rpc_method_handler, respond_stream),
+        (True, False): (grpc.stream_unary_rpc_method_handler, consume),
+        (True, True): (grpc.stream_stream_rpc_method_handler, consume_stream),
+    }
+    make_handler, behavior = behaviors[(method.client_streaming, method.server_streaming)]
+    return make_handler(behavior, request_deserializer=method.request_class.FromString,
+                        response_serializer=method.response_class.SerializeToString)
+
+
+class BenchHandlerTest(unittest.TestCase):
+    """Tests for bench_handler.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = grpc.server(futures.ThreadPoolExecutor(max_workers=4))
+        handlers = {name: fake_handler(method) for name, method in get_methods().items()}
+        cls.server.add_generic_rpc_handlers((grpc.method_handlers_generic_handler(SERVICE_NAME, handlers),))
+        cls.port = cls.server.add_insecure_port('127.0.0.1:0')
+        cls.server.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop(None)
+
+    def bench(self, *argv):
+        args = create_parser().parse_args(
+            ['bench', '--target', '127.0.0.1:{}'.format(self.port), '--format', 'json'] + list(argv))
+        return args.handler(args)
+
+    def test_methods(self):
+        methods = get_methods()
+        self.assertEqual(len(methods), 25)
+        self.assertTrue(methods['Predict_Bytes_Bytes'].client_streaming)
+        self.assertTrue(methods['Predict_Bytes_Bytes'].server_streaming)
+
+    def test_closed_loop(self):
+        for method in ['Predict_String_String', 'Predict_String_Bytes', 'Predict_Bytes_String',
+                       'Predict_Bytes_Bytes', 'Predict_ArrFloat_ArrString']:
+            summary = self.bench('--method', method, '--duration', '0.2', '--concurrency', '2', '--channels', '2')
+            self.assertEqual(summary['mode'], 'closed')
+            self.assertGreater(summary['succeeded'], 0)
+            self.assertEqual(summary['errors'], {})
+            self.assertGreater(summary['throughput_rps'], 0)
+            self.assertLessEqual(summary['latency_ms']['p50'], summary['latency_ms']['p999'])
+
+    def test_open_loop(self):
+        summary = self.bench('--duration', '0.5', '--rps', '100', '--warmup', '0.1')
+        self.assertEqual(summary['mode'], 'open')
+        self.assertEqual(summary['concurrency'], 64)
+        self.assertAlmostEqual(summary['requests'], 50, delta=2)
+        self.assertEqual(summary['succeeded'], summary['requests'])
+
+    def test_open_loop_errors(self):
+        def call(request, **kwargs):
+            raise ValueError()
+        recorder, elapsed = run_open_loop([call], [None], 100, 2, 0.1)
+        self.assertEqual(recorder.codes['CLIENT_ERROR'], 10)
+        self.assertEqual(recorder.latencies, [])
+
+    def test_payload_file(self):
+        fd, filepath = tempfile.mkstemp(suffix='.jsonl')
+        with os.fdopen(fd, 'w') as f:
+            f.write('[1, 2, 3]\n\n{"input": [4], "option": {"suppress_log_inout": true}}\n')
+        try:
+            self.assertEqual(load_inputs(filepath, 'ArrInt'),
+                             [([1, 2, 3], None), ([4], {'suppress_log_inout': True})])
+            summary = self.bench('--method', 'Predict_ArrInt_String', '--duration', '0.1',
+                                 '--payload-file', filepath)
+            self.assertEqual(summary['payloads'], 2)
+            with self.assertRaises(CommandError):
+                load_inputs(filepath, 'String')
+        finally:
+            os.remove(filepath)
+
+    def test_invalid_args(self):
+        with self.assertRaises(CommandError):
+            self.bench('--duration', '0')
+        with self.assertRaises(CommandError):
+            self.bench('--option', 'invalid')
+        with self.assertRaises(CommandError):
+            self.bench('--metadata', 'invalid')
+
+    def test_summarize(self):
+        recorder = BenchRecorder()
+        for i in range(1, 1001):
+            recorder.record(i / 1000.0, 'OK')
+        recorder.record(0.0, 'UNAVAILABLE')
+        summary = summarize(recorder, 2.0, method='Predict_String_String')
+        self.assertEqual(summary['requests'], 1001)
+        self.assertEqual(summary['errors'], {'UNAVAILABLE': 1})
+        self.assertEqual(summary['throughput_rps'], 500.0)
+        self.assertAlmostEqual(summary['latency_ms']['p50'], 500.0)
+        self.assertAlmostEqual(summary['latency_ms']['p999'], 999.0)
+        self.assertAlmostEqual(summary['latency_ms']['max'], 1000.0)
+        self.assertEqual(percentile([], 50), 0.0)
+        json.dumps(summary)
@@ -0,0 +1,152 @@
+import asyncio
+import unittest
+from unittest.mock import patch, AsyncMock, Mock
+
+import grpc
+
+from rekcurd.protobuf import rekcurd_pb2
+from rekcurd import RekcurdPack, RekcurdAsyncWorkerServicer
+from rekcurd.core.rekcurd_batch_messages import BatchStringInput
+from rekcurd.data_servers import DataServer
+from rekcurd.logger import JsonSystemLogger, JsonServiceLogger
+from rekcurd.utils import PredictResult
+from test import app
+
+
+def fake_context():
+    return Mock(cancelled=Mock(return_value=False), time_remaining=Mock(return_value=None),
+                invocation_metadata=Mock(return_value=()))
+
+
+async def async_iter(items):
+    for item in items:
+        yield item
+
+
+class RekcurdAsyncWorkerServicerTest(unittest.TestCase):
+    """Tests for RekcurdAsyncWorkerServicer."""
+
+    def fake_string_request(self):
+        request = rekcurd_pb2.StringInput()
+        request.input = 'Rekcurd'
+        request.option.val = '{}'
+        return request
+
+    def fake_bytes_request(self):
+        request = rekcurd_pb2.BytesInput()
+        request.input = b'\x9cT\xee\xca\x19\xbb\xa44\xfcS'
+        request.option.val = '{}'
+        return request
+
+    def setUp(self):
+        app.load_config_file("./test/test-settings.yml")
+        app.data_server = DataServer(app.config)
+        app.system_logger = JsonSystemLogger(config=app.config)
+        app.service_logger = JsonServiceLogger(config=app.config)
+        self.servicer = RekcurdAsyncWorkerServicer(RekcurdPack(app, None))
+
+    @patch('test.RekcurdAppTemplateApp.predict', new=Mock(return_value=PredictResult('Rekcurd', 1.0, option={})))
+    def test_sync_predict(self):
+        response = asyncio.run(self.servicer.Predict_String_String(self.fake_string_request(), fake_context()))
+        self.assertIsInstance(response, rekcurd_pb2.StringOutput)
+        self.assertEqual(response.output, 'Rekcurd')
+
+    def test_predict_async(self):
+        async def predict_async(predictor, idata, option=None):
+            await asyncio.sleep(0)
+            return PredictResult([2, 3], [1.0, 1.0], option={})
+        with patch('test.RekcurdAppTemplateApp.predict_async', new=Mock(side_effect=predict_async)) as _:
+            response = asyncio.run(self.servicer.Predict_String_ArrInt(self.fake_string_request(), fake_context()))
+        self.assertIsInstance(response, rekcurd_pb2.ArrIntOutput)
+        self.assertEqual(list(response.output), [2, 3])
+
+    def test_model_routing(self):
+        app.config.MODEL_REGISTRY_MAX_MODELS = 2
+        servicer = RekcurdAsyncWorkerServicer(RekcurdPack(app, 'default'))
+        context = fake_context()
+        context.invocation_metadata.return_value = (('x-rekcurd-model-path', 'tenant/a.model'),)
+        with patch.object(app.data_server, 'download_model', new=Mock(side_effect=lambda filepath: filepath)), \
+                patch('test.RekcurdAppTemplateApp.load_model',
+                      new=Mock(side_effect=lambda filepath: 'predictor:' + filepath)) as _, \
+                patch('test.RekcurdAppTemplateApp.predict',
+                      new=Mock(side_effect=lambda p, i, o: PredictResult(p, 1.0, option={}))) as _:
+            response = asyncio.run(servicer.Predict_String_String(self.fake_string_request(), context))
+        self.assertEqual(response.output, 'predictor:tenant/a.model')
+
+    def test_cancelled(self):
+        async def abort(code, details):
+            raise Exception(details)
+        context = fake_context()
+        context.cancelled.return_value = True
+        context.abort = Mock(side_effect=abort)
+        with self.assertRaises(Exception):
+            asyncio.run(self.servicer.Predict_String_String(self.fake_string_request(), context))
+        self.assertEqual(self.servicer.cancelled, 1)
+
+    @patch('test.RekcurdAppTemplateApp.predict', new=Mock(side_effect=Exception('error')))
+    def test_predict_error(self):
+        response = asyncio.run(self.servicer.Predict_String_ArrFloat(self.fake_string_request(), fake_context()))
+        self.assertEqual(list(response.output), [0.0])
+
+    @patch('test.RekcurdAppTemplateApp.predict', new=Mock(return_value=PredictResult(b'Rekcurd', 1.0, option={})))
+    def test_streaming(self):
+        async def collect(agen):
+            return [r async for r in agen]
+
+        responses = asyncio.run(collect(self.servicer.Predict_String_Bytes(self.fake_string_request(), fake_context())))
+        self.assertEqual(len(responses), 1)
+        self.assertIsInstance(responses[0], rekcurd_pb2.BytesOutput)
+
+        requests = [self.fake_bytes_request() for _ in range(3)]
+        responses = asyncio.run(collect(self.servicer.Predict_Bytes_Bytes(async_iter(requests), fake_context())))
+        self.assertEqual(len(responses), 3)
+
+        response = asyncio.run(self.servicer.Predict_Bytes_String(async_iter(requests[:1]), fake_context()))
+        self.assertIsInstance(response, rekcurd_pb2.StringOutput)
+
+        for stream in [[], requests]:
+            context = fake_context()
+            context.abort = AsyncMock(side_effect=Exception('aborted'))
+            with self.assertRaises(Exception):
+                asyncio.run(self.servicer.Predict_Bytes_String(async_iter(stream), context))
+            self.assertIs(context.abort.call_args[0][0], grpc.StatusCode.INVALID_ARGUMENT)
+
+    def test_process_stream(self):
+        async def predict_async(predictor, idata, option=None):
+            await asyncio.sleep(0.01 * (5 - option['idx']))
+            return PredictResult(str(option['idx']), 1.0, option={})
+
+        async def collect(agen):
+            return [r async for r in agen]
+        requests = []
+        for i in range(5):
+            request = self.fake_bytes_request()
+            request.option.val = '{"idx": %d}' % i
+            requests.append(request)
+        with patch('test.RekcurdAppTemplateApp.predict_async', new=Mock(side_effect=predict_async)) as _:
+            responses = asyncio.run(collect(self.servicer.process_stream(
+                async_iter(requests), fake_context(), self.servicer.rpcs['Predict_Bytes_String'])))
+        self.assertEqual([r.output for r in responses], ['0', '1', '2', '3', '4'])
+
+    def test_time_remaining(self):
+        budgets = []
+
+        def predict_batch(predictor, idata, option):
+            budgets.append(app.get_time_remaining())
+            return [PredictResult('Rekcurd', 1.0, option={}) for _ in idata]
+        context = fake_context()
+        context.time_remaining = Mock(return_value=3.0)
+        request = BatchStringInput()
+        request.inputs.add().input = 'Rekcurd'
+        with patch('test.RekcurdAppTemplateApp.predict_batch', new=Mock(side_effect=predict_batch)) as _:
+            asyncio.run(self.servicer.process_batch(request, context, self.servicer.rpcs['Predict_String_String']))
+        self.assertTrue(2.0 < budgets[0] <= 3.0)
+
+    @patch('test.RekcurdAppTemplateApp.predict', new=Mock(return_value=PredictResult('Rekcurd', 1.0, option={})))
+    def test_process_batch(self):
+        request = BatchStringInput()
+        for _ in range(3):
+            request.inputs.add().input = 'Rekcurd'
+        response = asyncio.run(self.servicer.process_batch(
+            request, fake_context(), self.servicer.rpcs['Predict_String_String']))
+        self.assertEqual([o.output for o in response.outputs], ['Rekcurd'] * 3)
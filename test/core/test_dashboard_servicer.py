@@ -1,16 +1,22 @@
+import threading
 import unittest
 import time
+from concurrent import futures
+from concurrent.futures import Future
 from functools import wraps
 from unittest.mock import patch, Mock, mock_open
+import grpc
 import grpc_testing
 from grpc import StatusCode
 
-from rekcurd import RekcurdPack, RekcurdDashboardServicer
-from rekcurd.protobuf import rekcurd_pb2
+from rekcurd import RekcurdPack, RekcurdDashboardServicer, RekcurdWorkerServicer
+from rekcurd.core.rekcurd_dashboard_servicer import add_RekcurdDashboardServicer_extensions_to_server
+from rekcurd.protobuf import rekcurd_pb2, rekcurd_pb2_grpc
+from rekcurd.core.rekcurd_profiler import ProfileRequest, ProfileResponse
 from rekcurd.data_servers import DataServer
 from rekcurd.logger import JsonSystemLogger, JsonServiceLogger
 from rekcurd.utils import EvaluateResult, EvaluateResultDetail, PredictResult, EvaluateDetail
-from test import app
+from test import app, Type
 
 
 target_service = rekcurd_pb2.DESCRIPTOR.services_by_name['RekcurdDashboard']
@@ -119,6 +125,137 @@ class RekcurdWorkerServicerTest(unittest.TestCase):
         self.assertIs(code, StatusCode.OK)
         self.assertEqual(response.status, 1)
 
+    @patch_predictor()
+    def test_SwitchModel_clear_cache(self):
+        app.config.CACHE_MAX_SIZE = 4
+        rekcurd_pack = RekcurdPack(app, None)
+        rekcurd_pack.cache.put('key', 'result')
+        servicer = RekcurdDashboardServicer(rekcurd_pack)
+        response = servicer.SwitchModel(rekcurd_pb2.SwitchModelRequest(path='my_path'), None)
+        self.assertEqual(response.status, 1)
+        self.assertEqual(len(rekcurd_pack.cache), 0)
+
+    @patch_predictor()
+    def test_SwitchModel_warmup(self):
+        servicer = RekcurdDashboardServicer(RekcurdPack(app, None))
+        with patch.object(app, 'run_warmup') as run_warmup, \
+                patch.object(app, 'load_model', new=Mock(return_value='new')):
+            response = servicer.SwitchModel(rekcurd_pb2.SwitchModelRequest(path='my_path'), None)
+        self.assertEqual(response.status, 1)
+        run_warmup.assert_called_once()
+
+    @patch_predictor()
+    def test_SwitchModel_foreground(self):
+        rekcurd_pack = RekcurdPack(app, None)
+        servicer = RekcurdDashboardServicer(rekcurd_pack)
+        with patch.object(app, 'load_model', new=Mock(return_value='new')):
+            response = servicer.SwitchModel(rekcurd_pb2.SwitchModelRequest(path='my_path'), None)
+        self.assertEqual(response.status, 1)
+        self.assertEqual(response.message, 'Success: Switching model file.')
+        self.assertEqual(rekcurd_pack.predictor, 'new')
+
+    @patch_predictor()
+    def test_SwitchModel_background(self):
+        app.config.SWITCH_MODEL_BACKGROUND = True
+        rekcurd_pack = RekcurdPack(app, None)
+        servicer = RekcurdDashboardServicer(rekcurd_pack)
+        loading = threading.Event()
+        try:
+            with patch.object(app, 'load_model', new=Mock(side_effect=lambda filepath: loading.wait(1) and 'new')):
+                response = servicer.SwitchModel(rekcurd_pb2.SwitchModelRequest(path='my_path'), None)
+                self.assertEqual(servicer.SwitchModelStatus(rekcurd_pb2.SwitchModelRequest(), None).status, 2)
+                loading.set()
+                servicer.model_switcher.join()
+        finally:
+            app.config.SWITCH_MODEL_BACKGROUND = False
+        self.assertEqual(response.status, 1)
+        self.assertEqual(response.message, 'Success: Switching model file in background.')
+        self.assertEqual(rekcurd_pack.predictor, 'new')
+        self.assertEqual(servicer.SwitchModelStatus(rekcurd_pb2.SwitchModelRequest(), None).status, 1)
+
+    @patch_predictor()
+    def test_SwitchModelStatus(self):
+        servicer = RekcurdDashboardServicer(RekcurdPack(app, None))
+        request = rekcurd_pb2.SwitchModelRequest()
+        self.assertEqual(servicer.SwitchModelStatus(request, None).status, 1)
+        servicer.SwitchModel(rekcurd_pb2.SwitchModelRequest(path='my_path'), None)
+        response = servicer.SwitchModelStatus(request, None)
+        self.assertEqual(response.status, 1)
+        self.assertEqual(response.message, 'Success: my_path')
+        with patch.object(app, 'load_model', new=Mock(side_effect=Exception('broken'))):
+            self.assertEqual(servicer.SwitchModel(rekcurd_pb2.SwitchModelRequest(path='my_path'), Mock()).status, 0)
+        response = servicer.SwitchModelStatus(request, None)
+        self.assertEqual(response.status, 0)
+        self.assertEqual(response.message, 'Error: broken')
+
+    @patch_predictor()
+    def test_PrefetchModel(self):
+        servicer = RekcurdDashboardServicer(RekcurdPack(app, None))
+        future = Future()
+        future.set_exception(Exception('error'))
+        with patch.object(app.data_server, 'prefetch_model', new=Mock(return_value=future)) as prefetch_model, \
+                patch.object(app.system_logger, 'error') as error:
+            response = servicer.PrefetchModel(rekcurd_pb2.SwitchModelRequest(path='my_path'), None)
+        self.assertEqual(response.status, 1)
+        prefetch_model.assert_called_once_with('my_path')
+        error.assert_called_once_with('Prefetching my_path failed. error')
+
+    @patch_predictor()
+    def test_Profile(self):
+        servicer = RekcurdDashboardServicer(RekcurdPack(app, None))
+        response = servicer.ProfileResult(ProfileRequest(), None)
+        self.assertEqual(response.status, 0)
+        self.assertEqual(response.message, 'Idle: 0 samples')
+
+        with patch.object(servicer.profiler, 'start') as start:
+            response = servicer.Profile(ProfileRequest(seconds=1.0, interval_ms=5), None)
+        self.assertEqual(response.status, 2)
+        start.assert_called_once_with(1.0, 0.005, False)
+
+        response = servicer.Profile(ProfileRequest(seconds=0.05, interval_ms=5), None)
+        self.assertEqual(response.status, 2)
+        servicer.profiler.join()
+        response = servicer.ProfileResult(ProfileRequest(), None)
+        self.assertEqual(response.status, 1)
+        self.assertGreater(response.samples, 0)
+
+        context = Mock()
+        response = servicer.Profile(ProfileRequest(seconds=0), context)
+        self.assertEqual(response.status, 0)
+        context.set_code.assert_called_once_with(StatusCode.UNKNOWN)
+
+    def test_Predict_while_profiling(self):
+        """ Profiling doesn't hold the only gRPC thread. """
+        pack = RekcurdPack(app, None)
+        dashboard = RekcurdDashboardServicer(pack)
+        server = grpc.server(futures.ThreadPoolExecutor(max_workers=1))
+        rekcurd_pb2_grpc.add_RekcurdWorkerServicer_to_server(RekcurdWorkerServicer(pack), server)
+        rekcurd_pb2_grpc.add_RekcurdDashboardServicer_to_server(dashboard, server)
+        add_RekcurdDashboardServicer_extensions_to_server(dashboard, server)
+        port = server.add_insecure_port('127.0.0.1:0')
+        server.start()
+        channel = grpc.insecure_channel('127.0.0.1:{}'.format(port))
+        try:
+            profile = channel.unary_unary('/rekcurd.RekcurdDashboard/Profile',
+                                          ProfileRequest.SerializeToString, ProfileResponse.FromString)
+            profile_result = channel.unary_unary('/rekcurd.RekcurdDashboard/ProfileResult',
+                                                 ProfileRequest.SerializeToString, ProfileResponse.FromString)
+            predict = rekcurd_pb2_grpc.RekcurdWorkerStub(channel).Predict_String_String
+            with patch('test.RekcurdAppTemplateApp.get_type_input', new=Mock(return_value=Type.STRING)), \
+                    patch('test.RekcurdAppTemplateApp.get_type_output', new=Mock(return_value=Type.STRING)), \
+                    patch('test.RekcurdAppTemplateApp.predict', new=Mock(return_value=PredictResult('label', 1.0))):
+                self.assertEqual(profile(ProfileRequest(seconds=1.0), timeout=5).status, 2)
+                request = rekcurd_pb2.StringInput(input='input', option=rekcurd_pb2.Option(val='{}'))
+                self.assertEqual(predict(request, timeout=0.5).output, 'label')
+                self.assertEqual(profile_result(ProfileRequest(), timeout=0.5).status, 2)
+                dashboard.profiler.join()
+            response = profile_result(ProfileRequest(), timeout=5)
+            self.assertEqual(response.status, 1)
+            self.assertGreater(response.samples, 0)
+        finally:
+            channel.close()
+            server.stop(None)
+
     @patch_predictor()
     def test_InvalidSwitchModel(self):
         rpc = self._real_time_server.invoke_unary_unary(
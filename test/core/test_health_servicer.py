@@ -0,0 +1,50 @@
+import unittest
+from unittest.mock import Mock
+
+from grpc import StatusCode
+
+from rekcurd import RekcurdPack, RekcurdHealthServicer
+from rekcurd.core.rekcurd_health_servicer import HealthCheckRequest, HealthCheckResponse
+from rekcurd.data_servers import DataServer
+from rekcurd.logger import JsonSystemLogger, JsonServiceLogger
+from test import app
+
+
+class RekcurdHealthServicerTest(unittest.TestCase):
+    """Tests for RekcurdHealthServicer."""
+
+    def setUp(self):
+        app.load_config_file("./test/test-settings.yml")
+        app.data_server = DataServer(app.config)
+        app.system_logger = JsonSystemLogger(config=app.config)
+        app.service_logger = JsonServiceLogger(config=app.config)
+        self.rekcurd_pack = RekcurdPack(app, None)
+        self.servicer = RekcurdHealthServicer(self.rekcurd_pack)
+
+    def check(self, service=''):
+        return self.servicer.Check(HealthCheckRequest(service=service), Mock()).status
+
+    def test_Check(self):
+        self.assertEqual(self.check(), HealthCheckResponse.SERVING)
+        self.assertEqual(self.check('rekcurd.RekcurdWorker'), HealthCheckResponse.SERVING)
+        self.rekcurd_pack.loaded = False
+        self.assertEqual(self.check(), HealthCheckResponse.NOT_SERVING)
+        self.assertEqual(self.check('rekcurd.RekcurdWorker'), HealthCheckResponse.NOT_SERVING)
+        self.assertEqual(self.check('rekcurd.RekcurdDashboard'), HealthCheckResponse.SERVING)
+        self.rekcurd_pack.loaded = True
+        self.rekcurd_pack.stopping = True
+        self.assertEqual(self.check(), HealthCheckResponse.NOT_SERVING)
+
+    def test_Check_unknown(self):
+        context = Mock(abort=Mock(side_effect=Exception('aborted')))
+        with self.assertRaises(Exception):
+            self.servicer.Check(HealthCheckRequest(service='unknown'), context)
+        self.assertIs(context.abort.call_args[0][0], StatusCode.NOT_FOUND)
+
+    def test_Watch(self):
+        self.rekcurd_pack.loaded = False
+        responses = self.servicer.Watch(HealthCheckRequest(), Mock())
+        self.assertEqual([r.status for r in responses], [HealthCheckResponse.NOT_SERVING])
+        self.rekcurd_pack.loaded = True
+        responses = self.servicer.Watch(HealthCheckRequest(service='rekcurd.RekcurdWorker'), Mock())
+        self.assertEqual([r.status for r in responses], [HealthCheckResponse.SERVING])
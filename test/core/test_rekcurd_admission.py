@@ -0,0 +1,108 @@
+import asyncio
+import threading
+import unittest
+from unittest.mock import Mock
+
+import grpc
+
+from rekcurd.core.rekcurd_admission import RekcurdAdmissionController
+
+
+class Aborted(Exception):
+    pass
+
+
+def fake_context(time_remaining=None):
+    context = Mock()
+    context.time_remaining.return_value = time_remaining
+    context.abort.side_effect = Aborted()
+    return context
+
+
+class RekcurdAdmissionControllerTest(unittest.TestCase):
+    """Tests for RekcurdAdmissionController.
+    """
+
+    def test_admit(self):
+        admission = RekcurdAdmissionController(max_inflight=2)
+        with admission.admit(fake_context()):
+            self.assertEqual(admission.inflight, 1)
+        self.assertEqual((admission.inflight, admission.admitted), (0, 1))
+
+    def test_reject(self):
+        admission = RekcurdAdmissionController(max_inflight=1, max_queue=0)
+        context = fake_context()
+        with admission.admit(fake_context()):
+            with self.assertRaises(Aborted):
+                with admission.admit(context):
+                    pass
+        context.abort.assert_called_once()
+        self.assertIs(context.abort.call_args[0][0], grpc.StatusCode.RESOURCE_EXHAUSTED)
+        self.assertEqual(admission.rejected, 1)
+
+    def test_queue(self):
+        admission = RekcurdAdmissionController(max_inflight=1, max_queue=1)
+        release = threading.Event()
+        started = threading.Event()
+
+        def hold():
+            with admission.admit(fake_context()):
+                started.set()
+                release.wait(timeout=5)
+        thread = threading.Thread(target=hold)
+        thread.start()
+        started.wait(timeout=5)
+
+        # Waits in the queue until its deadline expires.
+        context = fake_context(time_remaining=0.05)
+        with self.assertRaises(Aborted):
+            with admission.admit(context):
+                pass
+        self.assertIs(context.abort.call_args[0][0], grpc.StatusCode.DEADLINE_EXCEEDED)
+        self.assertEqual(admission.expired, 1)
+
+        # Admitted after the first request finishes.
+        timer = threading.Timer(0.05, release.set)
+        timer.start()
+        with admission.admit(fake_context(time_remaining=5)):
+            self.assertEqual(admission.inflight, 1)
+        thread.join()
+        self.assertEqual((admission.admitted, admission.waiting, admission.inflight), (2, 0, 0))
+
+    def test_expired_before_start(self):
+        admission = RekcurdAdmissionController(max_inflight=1)
+        context = fake_context(time_remaining=-1.0)
+        with self.assertRaises(Aborted):
+            with admission.admit(context):
+                pass
+        self.assertEqual((admission.expired, admission.inflight), (1, 0))
+        with admission.admit(fake_context()):
+            pass
+
+    def test_admit_without_context(self):
+        admission = RekcurdAdmissionController(max_inflight=1)
+        with admission.admit(None):
+            self.assertEqual(admission.inflight, 1)
+        self.assertEqual((admission.admitted, admission.inflight), (1, 0))
+
+    def test_admit_async(self):
+        admission = RekcurdAdmissionController(max_inflight=1, max_queue=0)
+
+        async def abort(code, details):
+            raise Aborted()
+
+        async def run():
+            context = fake_context()
+            context.abort = Mock(side_effect=abort)
+            async with admission.admit_async(fake_context()):
+                with self.assertRaises(Aborted):
+                    async with admission.admit_async(context):
+                        pass
+            async with admission.admit_async(fake_context()):
+                pass
+        asyncio.run(run())
+        self.assertEqual((admission.admitted, admission.rejected, admission.inflight), (2, 1, 0))
+
+    def test_invalid_size(self):
+        with self.assertRaises(ValueError):
+            RekcurdAdmissionController(max_inflight=0)
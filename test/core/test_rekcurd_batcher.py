@@ -0,0 +1,108 @@
+import contextvars
+import threading
+import unittest
+from unittest.mock import Mock
+
+from rekcurd import RekcurdPack
+from rekcurd.core.rekcurd_batcher import RekcurdBatcher
+from rekcurd.utils import PredictResult
+from test import app, Type
+
+
+class RekcurdBatcherTest(unittest.TestCase):
+    """Tests for RekcurdBatcher.
+    """
+
+    def setUp(self):
+        app.load_config_file("./test/test-settings.yml")
+        self.calls = []
+
+        def predict_batch(predictor, idata, option):
+            self.calls.append(list(idata))
+            return [PredictResult(label=i, score=1.0, option=o) for i, o in zip(idata, option)]
+        app.predict_batch = Mock(side_effect=predict_batch)
+
+    def tearDown(self):
+        del app.predict_batch
+
+    def __predict_concurrently(self, batcher, key, inputs):
+        results = [None] * len(inputs)
+
+        def run(idx):
+            results[idx] = batcher.predict(key, inputs[idx], {'idx': idx})
+        threads = [threading.Thread(target=run, args=(i,)) for i in range(len(inputs))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_predict_batch(self):
+        batcher = RekcurdBatcher(RekcurdPack(app, None), max_batch_size=4, max_wait_ms=200)
+        results = self.__predict_concurrently(batcher, 'key', ['a', 'b', 'c', 'd'])
+        batcher.close()
+        self.assertEqual([r.label for r in results], ['a', 'b', 'c', 'd'])
+        self.assertEqual([r.option for r in results], ['{"idx": 0}', '{"idx": 1}', '{"idx": 2}', '{"idx": 3}'])
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(sorted(self.calls[0]), ['a', 'b', 'c', 'd'])
+
+    def test_max_batch_size(self):
+        batcher = RekcurdBatcher(RekcurdPack(app, None), max_batch_size=2, max_wait_ms=200)
+        results = self.__predict_concurrently(batcher, 'key', ['a', 'b', 'c', 'd'])
+        batcher.close()
+        self.assertEqual([r.label for r in results], ['a', 'b', 'c', 'd'])
+        self.assertTrue(all(len(call) <= 2 for call in self.calls))
+
+    def test_separate_keys(self):
+        batcher = RekcurdBatcher(RekcurdPack(app, None), max_batch_size=8, max_wait_ms=0)
+        self.assertEqual(batcher.predict('key1', 'a').label, 'a')
+        self.assertEqual(batcher.predict('key2', 'b').label, 'b')
+        batcher.close()
+        self.assertEqual(self.calls, [['a'], ['b']])
+
+    def test_invalid_result(self):
+        app.predict_batch = Mock(return_value=[])
+        batcher = RekcurdBatcher(RekcurdPack(app, None), max_batch_size=8, max_wait_ms=0)
+        with self.assertRaises(Exception):
+            batcher.predict('key', 'a')
+        batcher.close()
+
+    def test_types(self):
+        types = []
+
+        def predict_batch(predictor, idata, option):
+            types.append((app.get_type_input(), app.get_type_output()))
+            return [PredictResult(label=i, score=1.0) for i in idata]
+        app.predict_batch = Mock(side_effect=predict_batch)
+        batcher = RekcurdBatcher(RekcurdPack(app, None), max_batch_size=8, max_wait_ms=200)
+
+        def submit():
+            app.set_type(Type.STRING, Type.ARRAY_INT)
+            return batcher.submit((Type.STRING, Type.ARRAY_INT), 'a')
+        future = contextvars.Context().run(submit)
+        # Another request sets the types before the batch runs.
+        app.set_type(Type.BYTES, Type.BYTES)
+        self.assertEqual(future.result().label, 'a')
+        batcher.close()
+        self.assertEqual(types, [(Type.STRING, Type.ARRAY_INT)])
+
+    def test_time_remaining(self):
+        budgets = []
+
+        def predict_batch(predictor, idata, option):
+            budgets.append(app.get_time_remaining())
+            return [PredictResult(label=i, score=1.0) for i in idata]
+        app.predict_batch = Mock(side_effect=predict_batch)
+        batcher = RekcurdBatcher(RekcurdPack(app, None), max_batch_size=3, max_wait_ms=1000)
+
+        def submit(idata, time_remaining):
+            app.set_time_remaining(time_remaining)
+            return batcher.submit('key', idata)
+        futures = [contextvars.Context().run(submit, i, t) for i, t in [('a', 10.0), ('b', 3.0), ('c', None)]]
+        self.assertEqual([f.result().label for f in futures], ['a', 'b', 'c'])
+        batcher.close()
+        self.assertTrue(2.0 < budgets[0] <= 3.0)
+
+    def test_invalid_max_batch_size(self):
+        with self.assertRaises(ValueError):
+            RekcurdBatcher(RekcurdPack(app, None), max_batch_size=0)
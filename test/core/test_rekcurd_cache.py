@@ -0,0 +1,67 @@
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+from rekcurd import RekcurdPack
+from rekcurd.core.rekcurd_cache import RekcurdCache
+from rekcurd.utils import PredictResult
+from test import app, Type
+
+
+class RekcurdCacheTest(unittest.TestCase):
+    """Tests for RekcurdCache.
+    """
+
+    def test_get_put(self):
+        cache = RekcurdCache(max_size=2)
+        key = RekcurdCache.make_key('default.model', Type.STRING, Type.STRING, 'Rekcurd', {'a': 1, 'b': 2})
+        self.assertIsNone(cache.get(key))
+        result = PredictResult('Rekcurd', 1.0, option={})
+        cache.put(key, result)
+        same_key = RekcurdCache.make_key('default.model', Type.STRING, Type.STRING, 'Rekcurd', {'b': 2, 'a': 1})
+        self.assertIs(cache.get(same_key), result)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        self.assertEqual(cache.hit_ratio, 0.5)
+
+    def test_make_key(self):
+        key = RekcurdCache.make_key('default.model', Type.ARRAY_INT, Type.STRING, [1, 2], {})
+        self.assertEqual(key, RekcurdCache.make_key('default.model', Type.ARRAY_INT, Type.STRING, (1, 2), {}))
+        self.assertNotEqual(key, RekcurdCache.make_key('new.model', Type.ARRAY_INT, Type.STRING, [1, 2], {}))
+        self.assertNotEqual(key, RekcurdCache.make_key('default.model', Type.ARRAY_INT, Type.BYTES, [1, 2], {}))
+        hash(RekcurdCache.make_key('default.model', Type.BYTES, Type.BYTES, b'\x9cT', {}))
+        self.assertEqual(RekcurdCache.make_key('default.model', Type.ARRAY_INT, Type.STRING, np.array([1, 2]), {}),
+                         RekcurdCache.make_key('default.model', Type.ARRAY_INT, Type.STRING, np.array([1, 2]), {}))
+
+    def test_lru(self):
+        cache = RekcurdCache(max_size=2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.get('a')
+        cache.put('c', 3)
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 1)
+
+    def test_ttl(self):
+        cache = RekcurdCache(max_size=2, ttl_sec=10)
+        with patch('rekcurd.core.rekcurd_cache.time.monotonic', return_value=100.0):
+            cache.put('a', 1)
+        with patch('rekcurd.core.rekcurd_cache.time.monotonic', return_value=105.0):
+            self.assertEqual(cache.get('a'), 1)
+        with patch('rekcurd.core.rekcurd_cache.time.monotonic', return_value=111.0):
+            self.assertIsNone(cache.get('a'))
+        self.assertEqual(len(cache), 0)
+
+    def test_invalid_size(self):
+        with self.assertRaises(ValueError):
+            RekcurdCache(max_size=0)
+
+    def test_switch_predictor(self):
+        app.load_config_file("./test/test-settings.yml")
+        self.assertIsNone(RekcurdPack(app, None).cache)
+        app.config.CACHE_MAX_SIZE = 4
+        rekcurd_pack = RekcurdPack(app, None)
+        rekcurd_pack.cache.put('a', 1)
+        rekcurd_pack.predictor = object()
+        self.assertEqual(len(rekcurd_pack.cache), 0)
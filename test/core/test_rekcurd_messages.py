@@ -0,0 +1,26 @@
+import unittest
+
+from rekcurd.core.rekcurd_messages import FieldSpec, FieldType, MessageSpec, build_messages
+
+
+class RekcurdMessagesTest(unittest.TestCase):
+    """Tests for build_messages.
+    """
+
+    def test_build_messages(self):
+        message_specs = [
+            MessageSpec('Item', [FieldSpec('name', FieldType.TYPE_STRING),
+                                 FieldSpec('color', FieldType.TYPE_ENUM, '.rekcurd.test.Item.Color')],
+                        {'Color': ['RED', 'BLUE']}),
+            MessageSpec('Items', [FieldSpec('items', FieldType.TYPE_MESSAGE, '.rekcurd.test.Item', repeated=True),
+                                  FieldSpec('total', FieldType.TYPE_INT64)]),
+        ]
+        messages = build_messages('rekcurd_test_messages.proto', 'rekcurd.test', message_specs)
+        self.assertEqual(sorted(messages), ['Item', 'Items'])
+        Item, Items = messages['Item'], messages['Items']
+        items = Items(items=[Item(name='a', color=Item.BLUE)], total=1)
+        self.assertEqual(Items.FromString(items.SerializeToString()), items)
+        self.assertEqual([f.number for f in Items.DESCRIPTOR.fields], [1, 2])
+
+        # Built once. The same classes are returned.
+        self.assertIs(build_messages('rekcurd_test_messages.proto', 'rekcurd.test', message_specs)['Item'], Item)
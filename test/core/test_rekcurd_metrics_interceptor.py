@@ -0,0 +1,79 @@
+import asyncio
+import unittest
+from unittest.mock import Mock
+
+import grpc
+
+from rekcurd.core.rekcurd_metrics_interceptor import (
+    RekcurdMetricsInterceptor, RekcurdAsyncMetricsInterceptor, RekcurdThreadPoolExecutor
+)
+from rekcurd.utils.rekcurd_metrics import RPC_DURATION, RPC_ERRORS, RPC_INFLIGHT, QUEUE_WAIT
+
+
+class RekcurdMetricsInterceptorTest(unittest.TestCase):
+    """Tests for RekcurdMetricsInterceptor.
+    """
+
+    def intercept(self, handler, method):
+        return RekcurdMetricsInterceptor().intercept_service(Mock(return_value=handler), Mock(method=method))
+
+    def test_unary(self):
+        method = '/test.Service/Unary'
+        count = RPC_DURATION.labels('test.Service', 'Unary').count
+        handler = self.intercept(grpc.unary_unary_rpc_method_handler(lambda request, context: request * 2), method)
+        self.assertEqual(handler.unary_unary(2, None), 4)
+        self.assertEqual(RPC_DURATION.labels('test.Service', 'Unary').count, count + 1)
+        self.assertEqual(RPC_INFLIGHT.labels('test.Service', 'Unary').get(), 0)
+
+    def test_error(self):
+        def fail(request, context):
+            raise Exception('error')
+        errors = RPC_ERRORS.labels('test.Service', 'Error').get()
+        handler = self.intercept(grpc.unary_unary_rpc_method_handler(fail), '/test.Service/Error')
+        with self.assertRaises(Exception):
+            handler.unary_unary(None, None)
+        self.assertEqual(RPC_ERRORS.labels('test.Service', 'Error').get(), errors + 1)
+        self.assertEqual(RPC_INFLIGHT.labels('test.Service', 'Error').get(), 0)
+
+    def test_stream(self):
+        def stream(request_iterator, context):
+            for request in request_iterator:
+                yield request
+        handler = self.intercept(grpc.stream_stream_rpc_method_handler(stream), '/test.Service/Stream')
+        responses = handler.stream_stream(iter([1, 2]), None)
+        self.assertEqual(next(responses), 1)
+        self.assertEqual(RPC_INFLIGHT.labels('test.Service', 'Stream').get(), 1)
+        self.assertEqual(list(responses), [2])
+        self.assertEqual(RPC_INFLIGHT.labels('test.Service', 'Stream').get(), 0)
+
+    def test_unknown_method(self):
+        self.assertIsNone(self.intercept(None, '/test.Service/Unknown'))
+
+    def test_async(self):
+        async def unary(request, context):
+            return request * 2
+
+        async def stream(request, context):
+            for i in range(request):
+                yield i
+
+        async def run():
+            interceptor = RekcurdAsyncMetricsInterceptor()
+
+            async def continuation(handler_call_details):
+                if handler_call_details.method.endswith('AsyncUnary'):
+                    return grpc.unary_unary_rpc_method_handler(unary)
+                return grpc.unary_stream_rpc_method_handler(stream)
+            unary_handler = await interceptor.intercept_service(continuation, Mock(method='/test.Service/AsyncUnary'))
+            stream_handler = await interceptor.intercept_service(continuation, Mock(method='/test.Service/AsyncStream'))
+            return await unary_handler.unary_unary(2, None), [i async for i in stream_handler.unary_stream(3, None)]
+
+        count = RPC_DURATION.labels('test.Service', 'AsyncStream').count
+        self.assertEqual(asyncio.run(run()), (4, [0, 1, 2]))
+        self.assertEqual(RPC_DURATION.labels('test.Service', 'AsyncStream').count, count + 1)
+
+    def test_executor(self):
+        count = QUEUE_WAIT.labels('executor').count
+        with RekcurdThreadPoolExecutor(max_workers=1) as executor:
+            self.assertEqual(executor.submit(lambda x: x + 1, 1).result(), 2)
+        self.assertEqual(QUEUE_WAIT.labels('executor').count, count + 1)
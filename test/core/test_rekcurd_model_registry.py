@@ -0,0 +1,89 @@
+import unittest
+from unittest.mock import Mock
+
+from rekcurd import RekcurdPack
+from rekcurd.core.rekcurd_model_registry import RekcurdModelRegistry
+
+
+class RekcurdModelRegistryTest(unittest.TestCase):
+    """Tests for RekcurdModelRegistry.
+    """
+
+    def test_lru(self):
+        registry = RekcurdModelRegistry(max_models=2)
+        registry.put('a', 'A')
+        registry.put('b', 'B')
+        self.assertEqual(registry.get('a'), 'A')
+        registry.put('c', 'C')
+        self.assertEqual(registry.evict(), [('b', 'B')])
+        self.assertEqual(registry.names(), ['a', 'c'])
+        self.assertIsNone(registry.get('b'))
+        self.assertEqual(registry.evictions, 1)
+
+    def test_keep(self):
+        registry = RekcurdModelRegistry(max_models=1)
+        registry.put('a', 'A')
+        registry.put('b', 'B')
+        self.assertEqual(registry.evict('a', 'b'), [])
+        self.assertEqual(registry.evict('a'), [('b', 'B')])
+        self.assertIn('a', registry)
+
+    def test_memory(self):
+        registry = RekcurdModelRegistry(max_models=8, max_memory_bytes=100)
+        registry.put('a', 'A', 60)
+        registry.put('b', 'B', 30)
+        self.assertEqual(registry.evict(), [])
+        self.assertEqual(registry.put('b', 'B2', 50), 'B')
+        self.assertEqual(registry.memory_bytes, 110)
+        self.assertEqual(registry.evict(), [('a', 'A')])
+        self.assertEqual(registry.memory_bytes, 50)
+        self.assertEqual(registry.remove('b'), 'B2')
+        self.assertEqual((len(registry), registry.memory_bytes), (0, 0))
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            RekcurdModelRegistry(max_models=0)
+
+
+class RekcurdPackModelsTest(unittest.TestCase):
+    """Tests for the resident models of RekcurdPack.
+    """
+
+    def setUp(self):
+        self.app = Mock()
+        self.app.config = None
+        self.app.data_server.download_model.side_effect = lambda filepath: filepath
+        self.app.load_model.side_effect = lambda filepath: 'predictor:' + filepath
+        self.app.estimate_model_size.return_value = 0
+        self.rekcurd_pack = RekcurdPack(self.app, 'default', 'model/default.model')
+        self.rekcurd_pack.registry.max_models = 2
+
+    def test_use_predictor(self):
+        with self.rekcurd_pack.use_predictor() as predictor:
+            self.assertEqual(predictor, 'default')
+        with self.rekcurd_pack.use_predictor('model/a.model') as predictor:
+            self.assertEqual(predictor, 'predictor:model/a.model')
+        with self.rekcurd_pack.use_predictor('model/a.model') as predictor:
+            self.assertEqual(predictor, 'predictor:model/a.model')
+        self.app.load_model.assert_called_once_with('model/a.model')
+        self.app.run_warmup.assert_called_once_with('predictor:model/a.model')
+
+    def test_evict_in_use(self):
+        with self.rekcurd_pack.use_predictor('model/a.model') as predictor:
+            self.rekcurd_pack.get_model('model/b.model')
+            self.assertNotIn('model/a.model', self.rekcurd_pack.registry)
+            self.app.unload_model.assert_not_called()
+        self.app.unload_model.assert_called_once_with(predictor)
+        self.assertEqual(self.rekcurd_pack.registry.names(), ['model/default.model', 'model/b.model'])
+
+    def test_set_default_model(self):
+        self.assertEqual(self.rekcurd_pack.set_default_model('model/a.model'), 'default')
+        self.assertEqual(self.rekcurd_pack.predictor, 'predictor:model/a.model')
+        self.app.unload_model.assert_not_called()
+        # Rollback to the resident one without loading.
+        self.assertEqual(self.rekcurd_pack.set_default_model('model/default.model'), 'predictor:model/a.model')
+        self.assertEqual(self.rekcurd_pack.predictor, 'default')
+        self.app.load_model.assert_called_once_with('model/a.model')
+        self.rekcurd_pack.set_default_model('model/b.model')
+        self.app.unload_model.assert_called_once_with('predictor:model/a.model')
+        self.assertEqual(self.rekcurd_pack.registry.names(), ['model/default.model', 'model/b.model'])
@@ -0,0 +1,61 @@
+import threading
+import unittest
+from unittest.mock import Mock
+
+from rekcurd import RekcurdPack
+from rekcurd.core.rekcurd_model_switcher import RekcurdModelSwitcher
+
+
+class RekcurdModelSwitcherTest(unittest.TestCase):
+    """Tests for RekcurdModelSwitcher.
+    """
+
+    def setUp(self):
+        self.app = Mock()
+        self.app.config = None
+        self.app.data_server.download_model.side_effect = lambda filepath: 'local/' + filepath
+        self.app.estimate_model_size.return_value = 0
+        self.app.load_model.side_effect = lambda filepath: 'predictor:' + filepath
+        self.rekcurd_pack = RekcurdPack(self.app, 'old')
+
+    def test_switch(self):
+        self.rekcurd_pack.loaded = False
+        switcher = RekcurdModelSwitcher(self.rekcurd_pack)
+        self.assertEqual(switcher.get_status(), (RekcurdModelSwitcher.Status.IDLE, None, ''))
+        switcher.start('new')
+        switcher.join()
+        self.assertEqual(self.rekcurd_pack.predictor, 'predictor:local/new')
+        self.app.run_warmup.assert_called_once_with('predictor:local/new')
+        self.app.unload_model.assert_called_once_with('old')
+        self.assertTrue(self.rekcurd_pack.loaded)
+        self.assertEqual(switcher.get_status(), (RekcurdModelSwitcher.Status.SUCCEEDED, 'new', ''))
+
+    def test_switch_error(self):
+        self.app.load_model.side_effect = Exception('broken')
+        switcher = RekcurdModelSwitcher(self.rekcurd_pack)
+        switcher.start('new')
+        switcher.join()
+        self.assertEqual(self.rekcurd_pack.predictor, 'old')
+        self.app.unload_model.assert_not_called()
+        self.assertEqual(switcher.get_status(), (RekcurdModelSwitcher.Status.FAILED, 'new', 'broken'))
+
+    def test_switch_foreground(self):
+        switcher = RekcurdModelSwitcher(self.rekcurd_pack)
+        switcher.switch('new')
+        self.assertEqual(self.rekcurd_pack.predictor, 'predictor:local/new')
+        self.assertEqual(switcher.get_status(), (RekcurdModelSwitcher.Status.SUCCEEDED, 'new', ''))
+        self.app.load_model.side_effect = Exception('broken')
+        with self.assertRaises(Exception):
+            switcher.switch('broken')
+        self.assertEqual(switcher.get_status(), (RekcurdModelSwitcher.Status.FAILED, 'broken', 'broken'))
+
+    def test_switch_twice(self):
+        loading = threading.Event()
+        self.app.load_model.side_effect = lambda filepath: loading.wait(1) and 'new'
+        switcher = RekcurdModelSwitcher(self.rekcurd_pack)
+        switcher.start('new')
+        with self.assertRaises(Exception):
+            switcher.start('new')
+        loading.set()
+        switcher.join()
+        self.assertEqual(switcher.get_status()[0], RekcurdModelSwitcher.Status.SUCCEEDED)
@@ -0,0 +1,85 @@
+import threading
+import time
+import unittest
+
+from rekcurd.core.rekcurd_profiler import RekcurdProfiler, ProfileRequest, ProfileResponse
+
+
+def busy_function(stop: threading.Event):
+    while not stop.is_set():
+        sum(i * i for i in range(1000))
+
+
+class RekcurdProfilerTest(unittest.TestCase):
+    """Tests for RekcurdProfiler.
+    """
+
+    def test_profile(self):
+        stop = threading.Event()
+        thread = threading.Thread(target=busy_function, args=(stop,), name='busy_1')
+        thread.start()
+        try:
+            stacks, samples = RekcurdProfiler().profile(0.2, 0.005)
+        finally:
+            stop.set()
+            thread.join()
+        self.assertGreater(samples, 0)
+        lines = [line for line in stacks.splitlines() if 'busy_function' in line]
+        self.assertTrue(lines)
+        stack, count = lines[0].rsplit(' ', 1)
+        self.assertTrue(stack.startswith('busy;'))
+        self.assertGreater(int(count), 0)
+        self.assertNotIn('test_profile', stacks)
+
+    def test_profile_idle(self):
+        stop = threading.Event()
+        thread = threading.Thread(target=stop.wait, name='idle')
+        thread.start()
+        try:
+            profiler = RekcurdProfiler()
+            stacks, _ = profiler.profile(0.05, 0.005)
+            self.assertNotIn('idle;', stacks)
+            stacks, _ = profiler.profile(0.05, 0.005, include_idle=True)
+            self.assertIn('idle;', stacks)
+        finally:
+            stop.set()
+            thread.join()
+
+    def test_start(self):
+        profiler = RekcurdProfiler()
+        start = time.monotonic()
+        profiler.start(0.2, 0.005)
+        self.assertLess(time.monotonic() - start, 0.1)
+        self.assertIs(profiler.get_result()[0], RekcurdProfiler.Status.PROFILING)
+        profiler.join()
+        status, stacks, samples, message = profiler.get_result()
+        self.assertIs(status, RekcurdProfiler.Status.SUCCEEDED)
+        self.assertGreater(samples, 0)
+        self.assertEqual(message, '')
+
+    def test_invalid_seconds(self):
+        profiler = RekcurdProfiler()
+        for seconds in [0, -1, RekcurdProfiler.MAX_SECONDS + 1]:
+            with self.assertRaises(ValueError):
+                profiler.profile(seconds)
+
+    def test_one_at_a_time(self):
+        profiler = RekcurdProfiler()
+        thread = threading.Thread(target=profiler.profile, args=(0.5,))
+        thread.start()
+        time.sleep(0.1)
+        try:
+            with self.assertRaises(Exception):
+                profiler.profile(0.1)
+        finally:
+            thread.join()
+        self.assertGreater(profiler.profile(0.01)[1], 0)
+
+    def test_messages(self):
+        request = ProfileRequest.FromString(
+            ProfileRequest(seconds=1.5, interval_ms=5, include_idle=True).SerializeToString())
+        self.assertEqual(request.seconds, 1.5)
+        self.assertEqual(request.interval_ms, 5)
+        self.assertTrue(request.include_idle)
+        response = ProfileResponse(status=1, stacks='a;b 1', samples=1)
+        self.assertEqual(ProfileResponse.FromString(response.SerializeToString()), response)
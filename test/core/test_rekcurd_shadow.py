@@ -0,0 +1,97 @@
+import threading
+import unittest
+from unittest.mock import Mock
+
+from rekcurd import RekcurdPack
+from rekcurd.core.rekcurd_shadow import RekcurdShadow
+from rekcurd.utils import PredictResult
+from rekcurd.utils.rekcurd_metrics import SHADOW_PREDICT_DURATION
+
+
+class RekcurdShadowTest(unittest.TestCase):
+    """Tests for RekcurdShadow.
+    """
+
+    def setUp(self):
+        self.app = Mock()
+        self.app.config = None
+        self.app.data_server.download_model.side_effect = lambda filepath: 'local/' + filepath
+        self.app.load_model.side_effect = lambda filepath: 'predictor:' + filepath
+        self.app.predict.side_effect = lambda predictor, idata, option: PredictResult(idata.upper(), 1.0)
+        self.rekcurd_pack = RekcurdPack(self.app, 'live')
+
+    def test_mirror(self):
+        live_count = SHADOW_PREDICT_DURATION.labels('live').count
+        live_sum = SHADOW_PREDICT_DURATION.labels('live').sum
+        shadow_count = SHADOW_PREDICT_DURATION.labels('shadow').count
+        shadow = RekcurdShadow(self.rekcurd_pack, 'candidate.model')
+        self.assertTrue(shadow.mirror('a', {}, PredictResult('A', 1.0), 0.2))
+        self.assertTrue(shadow.mirror('b', {}, PredictResult('x', 1.0), 0.4))
+        shadow._executor.shutdown(wait=True)
+        self.app.load_model.assert_called_once_with('local/candidate.model')
+        self.assertEqual(self.app.predict.call_args[0][0], 'predictor:local/candidate.model')
+        stats = shadow.get_stats()
+        self.assertEqual((stats['mirrored'], stats['agreed'], stats['errors']), (2, 1, 0))
+        self.assertEqual(stats['agreement_rate'], 0.5)
+        self.assertAlmostEqual(stats['live_latency_avg'], 0.3)
+        self.assertEqual(SHADOW_PREDICT_DURATION.labels('live').count, live_count + 2)
+        self.assertAlmostEqual(SHADOW_PREDICT_DURATION.labels('live').sum, live_sum + 0.6)
+        self.assertEqual(SHADOW_PREDICT_DURATION.labels('shadow').count, shadow_count + 2)
+
+    def test_close(self):
+        shadow = RekcurdShadow(self.rekcurd_pack, 'candidate.model')
+        shadow.close()
+        with self.assertRaises(RuntimeError):
+            shadow._executor.submit(print)
+        self.app.unload_model.assert_not_called()
+
+    def test_close_unload(self):
+        shadow = RekcurdShadow(self.rekcurd_pack, 'candidate.model')
+        shadow.mirror('a', {}, PredictResult('A', 1.0), 0.1)
+        shadow._executor.shutdown(wait=True)
+        shadow.close()
+        self.app.unload_model.assert_called_once_with('predictor:local/candidate.model')
+
+    def test_close_in_use(self):
+        started, release = threading.Event(), threading.Event()
+
+        def predict(predictor, idata, option):
+            started.set()
+            release.wait(1)
+            return PredictResult('A', 1.0)
+        self.app.predict.side_effect = predict
+        shadow = RekcurdShadow(self.rekcurd_pack, 'candidate.model')
+        shadow.mirror('a', {}, PredictResult('A', 1.0), 0.1)
+        shadow.mirror('b', {}, PredictResult('B', 1.0), 0.1)
+        started.wait(1)
+        shadow.close()
+        # Unloaded when the running mirror finishes. The pending one is skipped.
+        self.app.unload_model.assert_not_called()
+        release.set()
+        shadow._executor.shutdown(wait=True)
+        self.app.unload_model.assert_called_once_with('predictor:local/candidate.model')
+        self.assertEqual(self.app.predict.call_count, 1)
+        self.assertEqual(shadow.get_stats()['errors'], 1)
+
+    def test_ratio(self):
+        shadow = RekcurdShadow(self.rekcurd_pack, 'candidate.model', ratio=0.0001)
+        mirrored = sum(shadow.mirror('a', {}, PredictResult('A', 1.0), 0.1) for _ in range(100))
+        self.assertLess(mirrored, 10)
+
+    def test_drop(self):
+        release = threading.Event()
+        self.app.load_model.side_effect = lambda filepath: release.wait(1)
+        shadow = RekcurdShadow(self.rekcurd_pack, 'candidate.model', max_queue=2)
+        results = [shadow.mirror('a', {}, PredictResult('A', 1.0), 0.1) for _ in range(4)]
+        release.set()
+        shadow._executor.shutdown(wait=True)
+        self.assertEqual(results, [True, True, False, False])
+        self.assertEqual(shadow.get_stats()['dropped'], 2)
+
+    def test_error(self):
+        self.app.predict.side_effect = Exception('error')
+        shadow = RekcurdShadow(self.rekcurd_pack, 'candidate.model')
+        shadow.mirror('a', {}, PredictResult('A', 1.0), 0.1)
+        shadow._executor.shutdown(wait=True)
+        stats = shadow.get_stats()
+        self.assertEqual((stats['mirrored'], stats['errors'], stats['agreement_rate']), (1, 1, 0.0))
@@ -0,0 +1,85 @@
+import asyncio
+import threading
+import time
+import unittest
+
+from rekcurd.core.rekcurd_singleflight import RekcurdSingleFlight
+
+
+class RekcurdSingleFlightTest(unittest.TestCase):
+    """Tests for RekcurdSingleFlight.
+    """
+
+    def test_do(self):
+        singleflight = RekcurdSingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def func(value):
+            calls.append(value)
+            started.set()
+            release.wait(timeout=5)
+            return value * 2
+        results = []
+        leader = threading.Thread(target=lambda: results.append(singleflight.do('key', func, 1)))
+        leader.start()
+        started.wait(timeout=5)
+        followers = [threading.Thread(target=lambda: results.append(singleflight.do('key', func, 1)))
+                     for _ in range(3)]
+        for thread in followers:
+            thread.start()
+        while singleflight.calls < 4:
+            time.sleep(0.001)
+        release.set()
+        for thread in [leader] + followers:
+            thread.join()
+        self.assertEqual(calls, [1])
+        self.assertEqual(results, [2, 2, 2, 2])
+        self.assertEqual((singleflight.calls, singleflight.coalesced), (4, 3))
+        self.assertEqual(singleflight.coalescing_ratio, 0.75)
+
+        # Nothing is kept after the call.
+        self.assertEqual(singleflight.do('key', func, 2), 4)
+        self.assertEqual(calls, [1, 2])
+
+    def test_do_error(self):
+        singleflight = RekcurdSingleFlight()
+
+        def func():
+            raise ValueError('error')
+        with self.assertRaises(ValueError):
+            singleflight.do('key', func)
+        self.assertEqual(singleflight.do('key', lambda: 1), 1)
+
+    def test_do_async(self):
+        singleflight = RekcurdSingleFlight()
+        calls = []
+
+        async def func(value):
+            calls.append(value)
+            await asyncio.sleep(0.01)
+            return value * 2
+
+        async def run():
+            return await asyncio.gather(*[singleflight.do_async('key', func, 1) for _ in range(4)],
+                                        singleflight.do_async('other', func, 2))
+        self.assertEqual(asyncio.run(run()), [2, 2, 2, 2, 4])
+        self.assertEqual(calls, [1, 2])
+        self.assertEqual(singleflight.coalesced, 3)
+
+    def test_do_async_leader_cancelled(self):
+        singleflight = RekcurdSingleFlight()
+
+        async def func():
+            await asyncio.sleep(0.05)
+            return 1
+
+        async def run():
+            leader = asyncio.ensure_future(singleflight.do_async('key', func))
+            await asyncio.sleep(0)
+            follower = asyncio.ensure_future(singleflight.do_async('key', func))
+            await asyncio.sleep(0)
+            leader.cancel()
+            return await follower
+        self.assertEqual(asyncio.run(run()), 1)
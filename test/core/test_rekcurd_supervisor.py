@@ -0,0 +1,47 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import Mock
+
+from rekcurd.core.rekcurd_supervisor import RekcurdSupervisor
+
+
+class RekcurdSupervisorTest(unittest.TestCase):
+    """Tests for RekcurdSupervisor.
+    """
+
+    def setUp(self):
+        RekcurdSupervisor.RESTART_DELAY = 0
+        self.logger = Mock()
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_run(self):
+        def target():
+            open(os.path.join(self.tmpdir.name, str(os.getpid())), 'w').close()
+        RekcurdSupervisor(target, 3, self.logger).run()
+        self.assertEqual(len(os.listdir(self.tmpdir.name)), 3)
+
+    def test_restart(self):
+        crashed = os.path.join(self.tmpdir.name, 'crashed')
+
+        def target():
+            if not os.path.exists(crashed):
+                open(crashed, 'w').close()
+                raise Exception('crash')
+        RekcurdSupervisor(target, 1, self.logger).run()
+        self.assertTrue(os.path.exists(crashed))
+        self.assertEqual(self.logger.error.call_count, 1)
+
+    def test_worker_index(self):
+        supervisor = RekcurdSupervisor(
+            lambda: open(os.path.join(self.tmpdir.name, str(supervisor.worker_index)), 'w').close(), 2, self.logger)
+        supervisor.run()
+        self.assertEqual(sorted(os.listdir(self.tmpdir.name)), ['0', '1'])
+        self.assertIsNone(supervisor.worker_index)
+
+    def test_invalid_processes(self):
+        with self.assertRaises(ValueError):
+            RekcurdSupervisor(lambda: None, 0, self.logger)
@@ -1,8 +1,13 @@
+import grpc
 import os
+import tempfile
+import threading
 import unittest
 from functools import wraps
 from unittest.mock import Mock, patch
 
+from rekcurd import RekcurdPack
+from rekcurd.core.rekcurd_model_switcher import RekcurdModelSwitcher
 from rekcurd.data_servers import DataServer
 from rekcurd.logger import JsonSystemLogger, JsonServiceLogger
 from test import app, Type
@@ -51,3 +56,207 @@ class RekcurdWorkerTest(unittest.TestCase):
         self.assertIsNone(app.set_type(Type.STRING, Type.ARRAY_INT))
         self.assertEqual(app.get_type_input(), Type.STRING)
         self.assertEqual(app.get_type_output(), Type.ARRAY_INT)
+        types = []
+
+        def run():
+            # Another request doesn't overwrite the types of this one.
+            app.set_type(Type.BYTES, Type.BYTES)
+            types.append(app.get_type_input())
+        thread = threading.Thread(target=run)
+        thread.start()
+        thread.join()
+        self.assertEqual(types, [Type.BYTES])
+        self.assertEqual(app.get_type_input(), Type.STRING)
+        # Code running outside a request gets the last types set.
+        thread = threading.Thread(target=lambda: types.append(app.get_type_input()))
+        thread.start()
+        thread.join()
+        self.assertEqual(types, [Type.BYTES, Type.BYTES])
+
+    def test_time_remaining(self):
+        app.set_time_remaining(10.0)
+        self.assertTrue(9.0 < app.get_time_remaining() <= 10.0)
+        app.set_time_remaining(None)
+        self.assertIsNone(app.get_time_remaining())
+
+    def test_run_warmup(self):
+        app.config.WARMUP_PASSES = 2
+        app.config.WARMUP_INPUTS = ['a', 'b']
+        with patch('test.RekcurdAppTemplateApp.predict') as predict, \
+                patch.object(app.system_logger, 'info') as info:
+            app.run_warmup('predictor')
+        self.assertEqual(predict.call_count, 4)
+        predict.assert_called_with('predictor', 'b', {})
+        self.assertIn('2 passes of 2 inputs', info.call_args[0][0])
+
+    def test_run_warmup_file(self):
+        app.config.WARMUP_PASSES = 1
+        app.config.WARMUP_FILE_PATH = 'warmup.json'
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = os.path.join(tmpdir, 'warmup.json')
+            with open(filepath, 'w') as f:
+                f.write('[[1, 2], [3, 4]]')
+            with patch.object(app.data_server, 'get_warmup_data_path', new=Mock(return_value=filepath)), \
+                    patch('test.RekcurdAppTemplateApp.predict') as predict:
+                app.run_warmup('predictor')
+        self.assertEqual([c[0][1] for c in predict.call_args_list], [[1, 2], [3, 4]])
+
+    def test_run_warmup_numpy(self):
+        import numpy as np
+        app.config.WARMUP_PASSES = 1
+        app.config.WARMUP_INPUTS = [[1, 2], [1.5, 2], ['a'], 'a']
+        app.config.NUMPY_MODE = True
+        try:
+            with patch('test.RekcurdAppTemplateApp.predict') as predict:
+                app.run_warmup('predictor')
+        finally:
+            app.config.NUMPY_MODE = False
+        idata = [c[0][1] for c in predict.call_args_list]
+        self.assertEqual(idata[0].dtype, np.int64)
+        self.assertEqual(idata[1].dtype, np.float64)
+        self.assertEqual(idata[1].tolist(), [1.5, 2.0])
+        self.assertEqual(idata[2:], [['a'], 'a'])
+
+    def test_run_warmup_error(self):
+        app.config.WARMUP_PASSES = 1
+        app.config.WARMUP_INPUTS = ['a']
+        with patch('test.RekcurdAppTemplateApp.predict', new=Mock(side_effect=Exception('error'))), \
+                patch.object(app.system_logger, 'error') as error:
+            app.run_warmup('predictor')
+        error.assert_called_once()
+        with patch('test.RekcurdAppTemplateApp.predict') as predict:
+            app.config.WARMUP_PASSES = 0
+            app.run_warmup('predictor')
+        predict.assert_not_called()
+
+    def test_predict_batch(self):
+        with patch('test.RekcurdAppTemplateApp.predict',
+                   new=Mock(side_effect=lambda p, i, o: (i, o))) as _:
+            self.assertEqual(app.predict_batch(None, ['a', 'b'], [{}, {'k': 1}]), [('a', {}), ('b', {'k': 1})])
+            self.assertEqual(app.predict_batch(None, ['a']), [('a', None)])
+
+    def test_server_options(self):
+        self.assertEqual(app._get_server_options(), [("grpc.so_reuseport", 0)])
+        self.assertEqual(app._get_server_options(reuse_port=True), [("grpc.so_reuseport", 1)])
+        app.config.set_configurations(grpc_max_send_message_length=-1, grpc_max_receive_message_length=64 * 1024 * 1024,
+                                      grpc_max_concurrent_streams=100, grpc_keepalive_time_ms=30000,
+                                      grpc_keepalive_permit_without_calls=True, grpc_so_reuseport=True)
+        self.assertEqual(app._get_server_options(), [
+            ("grpc.so_reuseport", 1),
+            ("grpc.max_send_message_length", -1),
+            ("grpc.max_receive_message_length", 64 * 1024 * 1024),
+            ("grpc.max_concurrent_streams", 100),
+            ("grpc.keepalive_time_ms", 30000),
+            ("grpc.keepalive_permit_without_calls", 1),
+        ])
+
+    def test_compression(self):
+        self.assertIsNone(app._get_compression())
+        app.config.GRPC_COMPRESSION = "GZIP"
+        self.assertEqual(app._get_compression(), grpc.Compression.Gzip)
+        app.config.GRPC_COMPRESSION = "brotli"
+        with self.assertRaises(ValueError):
+            app._get_compression()
+
+    def test_fit_max_workers(self):
+        self.assertEqual(app._fit_max_workers(1), 1)
+        app.config.ADMISSION_MAX_INFLIGHT = 4
+        app.config.ADMISSION_MAX_QUEUE = 8
+        self.assertEqual(app._fit_max_workers(1), 12)
+        self.assertEqual(app._fit_max_workers(16), 16)
+
+    @patch_predictor()
+    def test_run_grpc_options(self):
+        with patch('test.RekcurdAppTemplateApp.load_model', new=Mock(return_value=object())) as _, \
+                patch('grpc.server', wraps=grpc.server) as server:
+            self.assertIsNone(app.run(port=5103, grpc_max_workers=4, grpc_max_receive_message_length=-1,
+                                      grpc_compression="gzip"))
+        self.assertEqual(server.call_args[0][0]._max_workers, 4)
+        self.assertEqual(server.call_args[1]["options"],
+                         [("grpc.so_reuseport", 0), ("grpc.max_receive_message_length", -1)])
+        self.assertEqual(server.call_args[1]["compression"], grpc.Compression.Gzip)
+
+    @patch_predictor()
+    def test_run_shutdown(self):
+        with patch('test.RekcurdAppTemplateApp.load_model', new=Mock(return_value=object())) as _, \
+                patch('grpc.server') as server, \
+                patch('rekcurd.RekcurdWorkerServicer.close') as close, \
+                patch.object(app.system_logger, 'flush') as system_flush, \
+                patch.object(app.service_logger, 'flush') as service_flush:
+            self.assertIsNone(app.run(port=5104, shutdown_grace_period_sec=3))
+        server.return_value.stop.assert_called_once_with(3.0)
+        server.return_value.stop.return_value.wait.assert_called_once_with()
+        close.assert_called_once_with()
+        system_flush.assert_called_once_with()
+        service_flush.assert_called_once_with()
+
+    def test_shutdown_handlers(self):
+        import signal
+        callback = Mock()
+        handlers = app._set_shutdown_handlers(callback)
+        try:
+            signal.getsignal(signal.SIGTERM)(signal.SIGTERM, None)
+        finally:
+            app._restore_signal_handlers(handlers)
+        callback.assert_called_once_with()
+        self.assertEqual(signal.getsignal(signal.SIGTERM), handlers[signal.SIGTERM])
+
+    def test_start_initializer(self):
+        rekcurd_pack = RekcurdPack(app, None)
+        with patch('test.RekcurdAppTemplateApp.load_model', new=Mock(return_value='predictor')) as _, \
+                patch.object(app.data_server, 'get_model_path', new=Mock(return_value='model')), \
+                patch.object(app, 'run_warmup') as run_warmup:
+            thread = app.start_initializer(rekcurd_pack)
+            self.assertFalse(rekcurd_pack.loaded)
+            thread.join()
+        run_warmup.assert_called_once_with('predictor')
+        self.assertTrue(rekcurd_pack.ready)
+        self.assertEqual(rekcurd_pack.predictor, 'predictor')
+
+    def test_start_initializer_switched(self):
+        rekcurd_pack = RekcurdPack(app, None)
+        loading = threading.Event()
+
+        def load_model(filepath):
+            if filepath == 'model':
+                return loading.wait(1) and 'initial'
+            return 'switched'
+        with patch('test.RekcurdAppTemplateApp.load_model', new=Mock(side_effect=load_model)) as _, \
+                patch.object(app.data_server, 'get_model_path', new=Mock(return_value='model')), \
+                patch.object(app.data_server, 'download_model', new=Mock(return_value='local/my_path')), \
+                patch.object(app, 'run_warmup'), \
+                patch.object(app, 'unload_model') as unload_model:
+            thread = app.start_initializer(rekcurd_pack)
+            RekcurdModelSwitcher(rekcurd_pack).switch('my_path')
+            loading.set()
+            thread.join()
+        self.assertEqual((rekcurd_pack.model_name, rekcurd_pack.predictor), ('my_path', 'switched'))
+        unload_model.assert_called_once_with('initial')
+        self.assertTrue(rekcurd_pack.ready)
+
+    def test_start_initializer_error(self):
+        rekcurd_pack = RekcurdPack(app, None)
+        with patch('test.RekcurdAppTemplateApp.load_model', new=Mock(return_value=None)) as _, \
+                patch.object(app.data_server, 'get_model_path', new=Mock(return_value='model')), \
+                patch.object(app.system_logger, 'error') as error:
+            app.start_initializer(rekcurd_pack).join()
+        error.assert_called_once()
+        self.assertFalse(rekcurd_pack.ready)
+
+    @patch_predictor()
+    def test_run_processes(self):
+        with patch('rekcurd.core.rekcurd_worker.RekcurdSupervisor') as supervisor, \
+                patch('test.RekcurdAppTemplateApp.load_model', new=Mock(return_value=object())) as _:
+            self.assertIsNone(app.run(processes=2))
+            self.assertEqual(supervisor.call_args[0][1], 2)
+            supervisor.return_value.run.assert_called_once_with()
+
+    @patch_predictor()
+    def test_run_serve(self):
+        with patch('test.RekcurdAppTemplateApp.load_model', new=Mock(return_value=object())) as _:
+            self.assertIsNone(app.run(port=5101))
+
+    @patch_predictor()
+    def test_run_async_mode(self):
+        with patch('test.RekcurdAppTemplateApp.load_model', new=Mock(return_value=object())) as _:
+            self.assertIsNone(app.run(port=5102, async_mode=True))
@@ -1,17 +1,24 @@
 from test import app, Type
 
+import contextlib
+import threading
 import unittest
 import time
 from functools import wraps
 from unittest.mock import patch, Mock
 import grpc_testing
+import numpy as np
 from grpc import StatusCode
 
 from rekcurd.protobuf import rekcurd_pb2
 from rekcurd import RekcurdPack, RekcurdWorkerServicer
+from rekcurd.core.rekcurd_worker_servicer import add_RekcurdWorkerServicer_extensions_to_server
+from rekcurd.core.rekcurd_batch_messages import BatchArrFloatInput, BatchArrFloatOutput, BatchStringInput
 from rekcurd.data_servers import DataServer
 from rekcurd.logger import JsonSystemLogger, JsonServiceLogger
-from rekcurd.utils import PredictResult
+from rekcurd.utils import PredictResult, metrics
+from rekcurd.utils.rekcurd_metrics import PREDICT_DURATION, PREDICT_ERRORS
+from rekcurd.utils.rekcurd_tracing import tracer
 
 
 target_service = rekcurd_pb2.DESCRIPTOR.services_by_name['RekcurdWorker']
@@ -174,14 +181,25 @@ class RekcurdWorkerServicerTest(unittest.TestCase):
         rpc = self._real_time_server.invoke_stream_unary(
             target_service.methods_by_name['Predict_Bytes_String'], (), None)
         rpc.send_request(self.fake_bytes_request())
-        rpc.send_request(self.fake_bytes_request())
-        rpc.send_request(self.fake_bytes_request())
         rpc.requests_closed()
         initial_metadata = rpc.initial_metadata()
         response, trailing_metadata, code, details = rpc.termination()
         self.assertIs(code, StatusCode.OK)
         self.assertStringResponse(response)
 
+    @patch_predictor(Type.BYTES, Type.STRING)
+    def test_Bytes_String_invalid_stream(self):
+        methods = ['Predict_Bytes_String', 'Predict_Bytes_ArrInt', 'Predict_Bytes_ArrFloat', 'Predict_Bytes_ArrString']
+        for method in methods:
+            for count in [0, 3]:
+                rpc = self._real_time_server.invoke_stream_unary(target_service.methods_by_name[method], (), None)
+                for _ in range(count):
+                    rpc.send_request(self.fake_bytes_request())
+                rpc.requests_closed()
+                response, trailing_metadata, code, details = rpc.termination()
+                self.assertIs(code, StatusCode.INVALID_ARGUMENT)
+                self.assertIn('Stream' + method, details)
+
     @patch_predictor(Type.BYTES, Type.BYTES)
     def test_Bytes_Bytes(self):
         rpc = self._real_time_server.invoke_stream_stream(
@@ -208,8 +226,6 @@ class RekcurdWorkerServicerTest(unittest.TestCase):
         rpc = self._real_time_server.invoke_stream_unary(
             target_service.methods_by_name['Predict_Bytes_ArrInt'], (), None)
         rpc.send_request(self.fake_bytes_request())
-        rpc.send_request(self.fake_bytes_request())
-        rpc.send_request(self.fake_bytes_request())
         rpc.requests_closed()
         initial_metadata = rpc.initial_metadata()
         response, trailing_metadata, code, details = rpc.termination()
@@ -221,8 +237,6 @@ class RekcurdWorkerServicerTest(unittest.TestCase):
         rpc = self._real_time_server.invoke_stream_unary(
             target_service.methods_by_name['Predict_Bytes_ArrFloat'], (), None)
         rpc.send_request(self.fake_bytes_request())
-        rpc.send_request(self.fake_bytes_request())
-        rpc.send_request(self.fake_bytes_request())
         rpc.requests_closed()
         initial_metadata = rpc.initial_metadata()
         response, trailing_metadata, code, details = rpc.termination()
@@ -234,8 +248,6 @@ class RekcurdWorkerServicerTest(unittest.TestCase):
         rpc = self._real_time_server.invoke_stream_unary(
             target_service.methods_by_name['Predict_Bytes_ArrString'], (), None)
         rpc.send_request(self.fake_bytes_request())
-        rpc.send_request(self.fake_bytes_request())
-        rpc.send_request(self.fake_bytes_request())
         rpc.requests_closed()
         initial_metadata = rpc.initial_metadata()
         response, trailing_metadata, code, details = rpc.termination()
@@ -388,3 +400,385 @@ class RekcurdWorkerServicerTest(unittest.TestCase):
         response, trailing_metadata, code, details = rpc.termination()
         self.assertIs(code, StatusCode.OK)
         self.assertArrStringResponse(response)
+
+    @patch_predictor(Type.ARRAY_FLOAT, Type.ARRAY_FLOAT)
+    def test_batching(self):
+        app.config.BATCHING_MAX_SIZE = 4
+        app.config.BATCHING_MAX_WAIT_MS = 0
+        servicer = RekcurdWorkerServicer(RekcurdPack(app, None))
+        self.assertIsNotNone(servicer.batcher)
+        server = grpc_testing.server_from_dictionary({target_service: servicer}, self._real_time)
+        rpc = server.invoke_unary_unary(
+            target_service.methods_by_name['Predict_ArrFloat_ArrFloat'], (),
+            self.fake_arrfloat_request(), None)
+        response, trailing_metadata, code, details = rpc.termination()
+        servicer.batcher.close()
+        self.assertIs(code, StatusCode.OK)
+        self.assertArrFloatResponse(response)
+        self.assertEqual(len(response.output), 3)
+
+    def test_cache(self):
+        app.config.CACHE_MAX_SIZE = 8
+        servicer = RekcurdWorkerServicer(RekcurdPack(app, None))
+        with patch('test.RekcurdAppTemplateApp.predict',
+                   new=Mock(return_value=PredictResult('Rekcurd', 1.0, option={}))) as predict:
+            for _ in range(3):
+                response = servicer.Predict_String_String(self.fake_string_request(), None)
+                self.assertEqual(response.output, 'Rekcurd')
+            servicer.Predict_String_Bytes(self.fake_string_request(), None).__next__()
+        self.assertEqual(predict.call_count, 2)
+        self.assertEqual((servicer.rekcurd_pack.cache.hits, servicer.rekcurd_pack.cache.misses), (2, 2))
+
+    def test_model_routing(self):
+        app.config.MODEL_REGISTRY_MAX_MODELS = 2
+        servicer = RekcurdWorkerServicer(RekcurdPack(app, 'default'))
+        request = self.fake_string_request()
+        request.option.val = '{"model_path": "tenant/a.model"}'
+        context = Mock(is_active=Mock(return_value=True), time_remaining=Mock(return_value=None),
+                       invocation_metadata=Mock(return_value=()))
+        with patch.object(app.data_server, 'download_model', new=Mock(side_effect=lambda filepath: filepath)), \
+                patch('test.RekcurdAppTemplateApp.load_model',
+                      new=Mock(side_effect=lambda filepath: 'predictor:' + filepath)) as load_model, \
+                patch('test.RekcurdAppTemplateApp.predict',
+                      new=Mock(side_effect=lambda p, i, o: PredictResult(p, 1.0, option={}))) as _:
+            self.assertEqual(servicer.Predict_String_String(request, None).output, 'predictor:tenant/a.model')
+            self.assertEqual(servicer.Predict_String_String(self.fake_string_request(), context).output, 'default')
+            context.invocation_metadata.return_value = (('x-rekcurd-model-path', 'tenant/a.model'),)
+            self.assertEqual(servicer.Predict_String_String(self.fake_string_request(), context).output,
+                             'predictor:tenant/a.model')
+        load_model.assert_called_once_with('tenant/a.model')
+
+    def test_model_routing_disabled(self):
+        servicer = RekcurdWorkerServicer(RekcurdPack(app, 'default'))
+        request = self.fake_string_request()
+        request.option.val = '{"model_path": "tenant/a.model"}'
+        with patch('test.RekcurdAppTemplateApp.predict') as predict:
+            servicer.Predict_String_String(request, None)
+        predict.assert_not_called()
+
+    def test_shadow(self):
+        app.config.SHADOW_FILE_PATH = 'candidate.model'
+        servicer = RekcurdWorkerServicer(RekcurdPack(app, 'live'))
+        with patch.object(app.data_server, 'download_model', new=Mock(side_effect=lambda filepath: filepath)), \
+                patch('test.RekcurdAppTemplateApp.load_model', new=Mock(return_value='candidate')) as _, \
+                patch('test.RekcurdAppTemplateApp.predict',
+                      new=Mock(side_effect=lambda p, i, o: PredictResult(p, 1.0, option={}))) as predict:
+            response = servicer.Predict_String_String(self.fake_string_request(), None)
+            servicer.shadow._executor.shutdown(wait=True)
+        self.assertEqual(response.output, 'live')
+        self.assertEqual([c[0][0] for c in predict.call_args_list], ['live', 'candidate'])
+        self.assertEqual(servicer.shadow.get_stats()['agreed'], 0)
+        with patch('test.RekcurdAppTemplateApp.unload_model') as unload_model:
+            servicer.close()
+        unload_model.assert_called_once_with('candidate')
+
+    def test_shadow_error(self):
+        app.config.SHADOW_FILE_PATH = 'candidate.model'
+        servicer = RekcurdWorkerServicer(RekcurdPack(app, 'live'))
+        errors = PREDICT_ERRORS.labels('Predict_String_String').get()
+        with patch.object(servicer.shadow, 'mirror', new=Mock(side_effect=Exception('error'))), \
+                patch('test.RekcurdAppTemplateApp.predict',
+                      new=Mock(side_effect=lambda p, i, o: PredictResult(p, 1.0, option={}))) as _:
+            response = servicer.Predict_String_String(self.fake_string_request(), None)
+        # The live result is kept and not counted as a prediction error.
+        self.assertEqual(response.output, 'live')
+        self.assertEqual(PREDICT_ERRORS.labels('Predict_String_String').get(), errors)
+        servicer.close()
+
+    def test_metrics(self):
+        app.config.CACHE_MAX_SIZE = 8
+        servicer = RekcurdWorkerServicer(RekcurdPack(app, None))
+        predictions = PREDICT_DURATION.labels('Predict_String_String').count
+        errors = PREDICT_ERRORS.labels('Predict_String_String').get()
+        with patch('test.RekcurdAppTemplateApp.predict', new=Mock(side_effect=Exception('error'))) as _:
+            servicer.Predict_String_String(self.fake_string_request(), None)
+        self.assertEqual(PREDICT_DURATION.labels('Predict_String_String').count, predictions + 1)
+        self.assertEqual(PREDICT_ERRORS.labels('Predict_String_String').get(), errors + 1)
+        text = metrics.render()
+        self.assertIn('rekcurd_cancelled_total 0.0', text)
+        self.assertIn('rekcurd_cache_misses_total 1.0', text)
+
+    @patch_predictor(Type.STRING, Type.STRING)
+    def test_trace(self):
+        servicer = RekcurdWorkerServicer(RekcurdPack(app, None))
+        context = Mock(is_active=Mock(return_value=True), time_remaining=Mock(return_value=None))
+        context.invocation_metadata.return_value = (
+            ('x-request-id', 'req-1'), ('x-b3-traceid', '463ac35c9f6413ad48485a3953bb6124'),
+            ('x-b3-spanid', 'a2fb4a1d1a96d312'), ('x-b3-sampled', '1'), ('user-agent', 'test'))
+        exporter = Mock()
+        logged = []
+        tracer.exporter = exporter
+        try:
+            with patch.object(servicer.service_logger, 'emit', new=Mock(
+                    side_effect=lambda *args: logged.append(servicer.service_logger.get_trace_fields()))) as _:
+                servicer.Predict_String_String(self.fake_string_request(), context)
+        finally:
+            tracer.exporter = None
+        trace = exporter.export.call_args[0][0]
+        self.assertEqual(trace.root.name, 'Predict_String_String')
+        self.assertEqual(trace.root.parent_span_id, 'a2fb4a1d1a96d312')
+        self.assertEqual([span.name for span in trace.spans],
+                         ['parse_option', 'predict', 'encode_response', 'service_log'])
+        self.assertEqual(logged, [{
+            'trace_id': '463ac35c9f6413ad48485a3953bb6124', 'span_id': trace.span_id, 'request_id': 'req-1'}])
+
+    def test_numpy_mode(self):
+        app.config.NUMPY_MODE = True
+        servicer = RekcurdWorkerServicer(RekcurdPack(app, None))
+
+        def predict(predictor, idata, option):
+            self.assertIsInstance(idata, np.ndarray)
+            self.assertEqual(idata.dtype, np.float64)
+            return PredictResult(idata * 2, np.ones(len(idata), dtype=np.float32), option={})
+        with patch('test.RekcurdAppTemplateApp.predict', new=Mock(side_effect=predict)) as _:
+            response = servicer.Predict_ArrFloat_ArrFloat(self.fake_arrfloat_request(), None)
+        self.assertEqual(list(response.output), [v * 2 for v in self.fake_arrfloat_request().input])
+        self.assertEqual(list(response.score), [1.0] * 5)
+
+        def predict(predictor, idata, option):
+            self.assertEqual(idata.dtype, np.int64)
+            return PredictResult(str(idata.sum()), np.float64(0.5), option={})
+        with patch('test.RekcurdAppTemplateApp.predict', new=Mock(side_effect=predict)) as _:
+            response = servicer.Predict_ArrInt_String(self.fake_arrint_request(), None)
+        self.assertEqual(response.output, '544')
+        self.assertEqual(response.score, 0.5)
+
+    @patch_predictor(Type.STRING, Type.STRING)
+    def test_admission(self):
+        app.config.ADMISSION_MAX_INFLIGHT = 1
+        servicer = RekcurdWorkerServicer(RekcurdPack(app, None))
+        server = grpc_testing.server_from_dictionary({target_service: servicer}, self._real_time)
+        with servicer.admission.admit(Mock(time_remaining=Mock(return_value=None))):
+            rpc = server.invoke_unary_unary(
+                target_service.methods_by_name['Predict_String_String'], (),
+                self.fake_string_request(), None)
+            response, trailing_metadata, code, details = rpc.termination()
+        self.assertIs(code, StatusCode.RESOURCE_EXHAUSTED)
+        rpc = server.invoke_unary_unary(
+            target_service.methods_by_name['Predict_String_String'], (),
+            self.fake_string_request(), None)
+        response, trailing_metadata, code, details = rpc.termination()
+        self.assertIs(code, StatusCode.OK)
+        self.assertEqual(servicer.admission.rejected, 1)
+
+    def test_expired(self):
+        servicer = RekcurdWorkerServicer(RekcurdPack(app, None))
+        context = Mock(is_active=Mock(return_value=True), time_remaining=Mock(return_value=-0.1),
+                       abort=Mock(side_effect=Exception('aborted')))
+        with patch('test.RekcurdAppTemplateApp.predict') as predict:
+            with self.assertRaises(Exception):
+                servicer.Predict_String_String(self.fake_string_request(), context)
+        predict.assert_not_called()
+        self.assertIs(context.abort.call_args[0][0], StatusCode.DEADLINE_EXCEEDED)
+        self.assertEqual(servicer.expired, 1)
+
+    def test_cancelled(self):
+        servicer = RekcurdWorkerServicer(RekcurdPack(app, None))
+        context = Mock(is_active=Mock(return_value=False), abort=Mock(side_effect=Exception('aborted')))
+        with patch('test.RekcurdAppTemplateApp.predict') as predict:
+            with self.assertRaises(Exception):
+                servicer.Predict_String_String(self.fake_string_request(), context)
+        predict.assert_not_called()
+        self.assertIs(context.abort.call_args[0][0], StatusCode.CANCELLED)
+        self.assertEqual(servicer.cancelled, 1)
+
+    def test_not_loaded(self):
+        rekcurd_pack = RekcurdPack(app, None)
+        rekcurd_pack.loaded = False
+        servicer = RekcurdWorkerServicer(rekcurd_pack)
+        context = Mock(is_active=Mock(return_value=True), time_remaining=Mock(return_value=None),
+                       abort=Mock(side_effect=Exception('aborted')))
+        with patch('test.RekcurdAppTemplateApp.predict') as predict:
+            with self.assertRaises(Exception):
+                servicer.Predict_String_String(self.fake_string_request(), context)
+        predict.assert_not_called()
+        self.assertIs(context.abort.call_args[0][0], StatusCode.UNAVAILABLE)
+
+    def test_time_remaining(self):
+        servicer = RekcurdWorkerServicer(RekcurdPack(app, None))
+        context = Mock(is_active=Mock(return_value=True), time_remaining=Mock(return_value=3.0),
+                       invocation_metadata=Mock(return_value=()))
+        budgets = []
+
+        def predict(predictor, idata, option):
+            budgets.append(app.get_time_remaining())
+            return PredictResult('Rekcurd', 1.0, option={})
+        with patch('test.RekcurdAppTemplateApp.predict', new=Mock(side_effect=predict)) as _:
+            servicer.Predict_String_String(self.fake_string_request(), context)
+        self.assertTrue(2.0 < budgets[0] <= 3.0)
+        # The deadline doesn't leak into the next call on this thread.
+        self.assertIsNone(app.get_time_remaining())
+
+        def predict_batch(predictor, idata, option):
+            budgets.append(app.get_time_remaining())
+            return [PredictResult('Rekcurd', 1.0, option={}) for _ in idata]
+        request = BatchStringInput()
+        request.inputs.add().input = 'Rekcurd'
+        with patch('test.RekcurdAppTemplateApp.predict_batch', new=Mock(side_effect=predict_batch)) as _:
+            servicer.process_batch(request, context, servicer.rpcs['Predict_String_String'])
+        self.assertTrue(2.0 < budgets[1] <= 3.0)
+        self.assertIsNone(app.get_time_remaining())
+
+    def test_time_remaining_after_admission(self):
+        servicer = RekcurdWorkerServicer(RekcurdPack(app, None))
+        admitted = []
+
+        @contextlib.contextmanager
+        def admit(context):
+            admitted.append(True)
+            yield
+        # The deadline is nearer once the request leaves the queue.
+        context = Mock(is_active=Mock(return_value=True),
+                       time_remaining=Mock(side_effect=lambda: 1.0 if admitted else 3.0),
+                       invocation_metadata=Mock(return_value=()))
+        budgets = []
+
+        def predict(predictor, idata, option):
+            budgets.append(app.get_time_remaining())
+            return PredictResult('Rekcurd', 1.0, option={})
+        with patch.object(servicer, 'admit', new=admit), \
+                patch('test.RekcurdAppTemplateApp.predict', new=Mock(side_effect=predict)) as _:
+            servicer.Predict_String_String(self.fake_string_request(), context)
+        self.assertTrue(0.0 < budgets[0] <= 1.0)
+
+    def test_coalescing(self):
+        app.config.COALESCING_ENABLED = True
+        servicer = RekcurdWorkerServicer(RekcurdPack(app, None))
+        barrier = threading.Barrier(2)
+        release = threading.Event()
+
+        def predict(predictor, idata, option):
+            barrier.wait(timeout=5)
+            release.wait(timeout=5)
+            return PredictResult(idata, 1.0, option={})
+        responses = []
+
+        def run(value):
+            request = self.fake_string_request()
+            request.input = value
+            responses.append(servicer.Predict_String_String(request, None).output)
+        with patch('test.RekcurdAppTemplateApp.predict', new=Mock(side_effect=predict)) as mock:
+            threads = [threading.Thread(target=run, args=(v,)) for v in ['a', 'b', 'a', 'a']]
+            for thread in threads:
+                thread.start()
+            while servicer.singleflight.calls < 4:
+                time.sleep(0.001)
+            release.set()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(mock.call_count, 2)
+        self.assertEqual(sorted(responses), ['a', 'a', 'a', 'b'])
+        self.assertEqual(servicer.singleflight.coalesced, 2)
+        text = metrics.render()
+        self.assertIn('rekcurd_coalescing_calls_total 4.0', text)
+        self.assertIn('rekcurd_coalescing_ratio 0.5', text)
+
+    def test_concurrent_types(self):
+        results = {
+            Type.STRING: PredictResult('Rekcurd', 1.0, option={}),
+            Type.ARRAY_STRING: PredictResult(['Rekcurd', 'is', 'awesome'], [1.0, 1.0, 1.0], option={}),
+        }
+        barrier = threading.Barrier(2)
+
+        def predict(predictor, idata, option):
+            type_output = app.get_type_output()
+            barrier.wait(timeout=5)
+            self.assertIs(app.get_type_output(), type_output)
+            return results[type_output]
+        servicer = RekcurdWorkerServicer(RekcurdPack(app, None))
+        responses = {}
+
+        def run(method):
+            responses[method] = getattr(servicer, method)(self.fake_string_request(), None)
+        with patch('test.RekcurdAppTemplateApp.predict', new=Mock(side_effect=predict)) as _:
+            threads = [threading.Thread(target=run, args=(m,))
+                       for m in ['Predict_String_String', 'Predict_String_ArrString']]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(responses['Predict_String_String'].output, 'Rekcurd')
+        self.assertEqual(list(responses['Predict_String_ArrString'].output), ['Rekcurd', 'is', 'awesome'])
+
+    def test_rpcs(self):
+        rpcs = RekcurdWorkerServicer.build_rpcs()
+        self.assertEqual(len(rpcs), 25)
+        rpc = rpcs['Predict_Bytes_ArrInt']
+        self.assertEqual((rpc.type_input, rpc.type_output), (Type.BYTES, Type.ARRAY_INT))
+        self.assertIs(rpc.response_class, rekcurd_pb2.ArrIntOutput)
+        self.assertEqual((rpc.client_streaming, rpc.server_streaming), (True, False))
+        self.assertIs(rpcs['Predict_ArrFloat_ArrFloat'].batch_request_class, BatchArrFloatInput)
+        self.assertIs(rpcs['Predict_ArrFloat_ArrFloat'].batch_response_class, BatchArrFloatOutput)
+
+    def test_process_batch(self):
+        def predict_batch(predictor, idata, option):
+            return [PredictResult([sum(i)], [1.0], option={'idx': o.get('idx')}) for i, o in zip(idata, option)]
+        servicer = RekcurdWorkerServicer(RekcurdPack(app, None))
+        request = BatchArrFloatInput()
+        request.option.val = '{"idx": 0}'
+        request.inputs.add().input.extend([1.0, 2.0])
+        item = request.inputs.add()
+        item.input.extend([3.0])
+        item.option.val = '{"idx": 1}'
+        with patch('test.RekcurdAppTemplateApp.predict_batch', new=Mock(side_effect=predict_batch)) as mock:
+            response = servicer.process_batch(request, None, servicer.rpcs['Predict_ArrFloat_ArrFloat'])
+        self.assertEqual(mock.call_count, 1)
+        self.assertIsInstance(response, BatchArrFloatOutput)
+        self.assertEqual([list(o.output) for o in response.outputs], [[3.0], [3.0]])
+        self.assertEqual([o.option.val for o in response.outputs], ['{"idx": 0}', '{"idx": 1}'])
+
+    @patch('test.RekcurdAppTemplateApp.predict_batch', new=Mock(return_value=[]))
+    def test_process_batch_error(self):
+        servicer = RekcurdWorkerServicer(RekcurdPack(app, None))
+        request = BatchArrFloatInput()
+        request.inputs.add().input.extend([1.0, 2.0])
+        response = servicer.process_batch(request, None, servicer.rpcs['Predict_ArrFloat_ArrFloat'])
+        self.assertEqual([list(o.output) for o in response.outputs], [[0.0]])
+
+    def test_process_stream(self):
+        def predict(predictor, idata, option):
+            time.sleep(0.01 * (5 - option['idx']))
+            return PredictResult(str(option['idx']), 1.0, option={})
+        requests = []
+        for i in range(5):
+            request = self.fake_bytes_request()
+            request.option.val = '{"idx": %d}' % i
+            requests.append(request)
+        for max_inflight in [1, 4]:
+            app.config.STREAMING_MAX_INFLIGHT = max_inflight
+            servicer = RekcurdWorkerServicer(RekcurdPack(app, None))
+            with patch('test.RekcurdAppTemplateApp.predict', new=Mock(side_effect=predict)) as _:
+                responses = list(servicer.process_stream(iter(requests), None, servicer.rpcs['Predict_Bytes_String']))
+            self.assertEqual([r.output for r in responses], ['0', '1', '2', '3', '4'])
+
+    def test_process_stream_concurrent_streams(self):
+        def predict(predictor, idata, option):
+            time.sleep(0.2)
+            return PredictResult('a', 1.0, option={})
+        for max_inflight in [1, 2]:
+            app.config.STREAMING_MAX_INFLIGHT = max_inflight
+            app.config.GRPC_MAX_WORKERS = 4
+            servicer = RekcurdWorkerServicer(RekcurdPack(app, None))
+            rpc = servicer.rpcs['Predict_Bytes_String']
+
+            def run():
+                list(servicer.process_stream(iter([self.fake_bytes_request()] * 2), None, rpc))
+            threads = [threading.Thread(target=run) for _ in range(4)]
+            start = time.monotonic()
+            with patch('test.RekcurdAppTemplateApp.predict', new=Mock(side_effect=predict)) as _:
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+            # Streams don't wait for each other.
+            self.assertLess(time.monotonic() - start, 0.2 * 2 * 2)
+
+    def test_add_extensions_to_server(self):
+        server = Mock()
+        servicer = RekcurdWorkerServicer(RekcurdPack(app, None))
+        add_RekcurdWorkerServicer_extensions_to_server(servicer, server)
+        generic_handler = server.add_generic_rpc_handlers.call_args[0][0][0]
+        handler_call_details = Mock(method='/rekcurd.RekcurdWorker/StreamPredict_Bytes_String')
+        self.assertIsNotNone(generic_handler.service(handler_call_details))
+        handler_call_details = Mock(method='/rekcurd.RekcurdWorker/BatchPredict_ArrFloat_ArrFloat')
+        self.assertIsNotNone(generic_handler.service(handler_call_details))
@@ -1,8 +1,13 @@
+import os
+import tempfile
+import threading
 import unittest
+from unittest.mock import patch
 
 from rekcurd.protobuf import rekcurd_pb2
 from rekcurd.utils import RekcurdConfig, ModelModeEnum, EvaluateResultDetail, EvaluateResult, PredictResult
 from rekcurd.data_servers import DataServer
+from rekcurd.utils.rekcurd_metrics import DATA_SERVER_DURATION
 
 from . import patch_predictor
 
@@ -18,6 +23,11 @@ class DataServerTest(unittest.TestCase):
             ceph_secret_key="xxx", ceph_host="127.0.0.1", ceph_port=443,
             ceph_is_secure=True, ceph_bucket_name="xxx")
         self.data_server = DataServer(config)
+        # Downloaded files are kept. Don't leave them for the next run.
+        workdir = tempfile.TemporaryDirectory()
+        self.addCleanup(workdir.cleanup)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(workdir.name)
 
     @patch_predictor()
     def test_get_model_path(self):
@@ -27,6 +37,32 @@ class DataServerTest(unittest.TestCase):
     def test_get_model_path(self):
         self.assertEqual(self.data_server.switch_model("test/model/switch.model"), "rekcurd-model/test/model/switch.model")
 
+    @patch_predictor()
+    def test_download_metrics(self):
+        count = DATA_SERVER_DURATION.labels('download').count
+        self.data_server.download_model("test/model/metrics.model")
+        self.assertEqual(DATA_SERVER_DURATION.labels('download').count, count + 1)
+
+    def test_download_atomic(self):
+        def download(remote_filepath, local_filepath):
+            with open(local_filepath, 'wb') as f:
+                f.write(b'partial')
+            raise Exception('connection reset')
+        with patch('rekcurd.data_servers.CephHandler.download', side_effect=download) as _:
+            with self.assertRaises(Exception):
+                self.data_server.download_model("test/model/atomic.model")
+        self.assertEqual(os.listdir("rekcurd-model/test/model"), [])
+
+        def download(remote_filepath, local_filepath):
+            self.assertNotEqual(local_filepath, "rekcurd-model/test/model/atomic.model")
+            with open(local_filepath, 'wb') as f:
+                f.write(b'model')
+        with patch('rekcurd.data_servers.CephHandler.download', side_effect=download) as _:
+            local_filepath = self.data_server.download_model("test/model/atomic.model")
+        self.assertEqual(os.listdir("rekcurd-model/test/model"), ["atomic.model"])
+        with open(local_filepath, 'rb') as f:
+            self.assertEqual(f.read(), b'model')
+
     def __get_UploadModelRequest(self, path: str):
         yield rekcurd_pb2.UploadModelRequest(path=path, data=b'data')
 
@@ -45,6 +81,36 @@ class DataServerTest(unittest.TestCase):
     def test_get_evaluation_data_path(self):
         self.assertEqual(self.data_server.get_evaluation_data_path("test/eval/data"), "rekcurd-eval/data")
 
+    @patch_predictor()
+    def test_get_warmup_data_path(self):
+        self.assertEqual(self.data_server.get_warmup_data_path("test/warmup/inputs.json"), "rekcurd-warmup/inputs.json")
+        with self.assertRaises(Exception):
+            self.data_server.get_warmup_data_path("../warmup/inputs.json")
+
+    def test_prefetch_model(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def download(remote_filepath, local_filepath):
+            started.set()
+            release.wait(1)
+        with patch('rekcurd.data_servers.CephHandler.download', side_effect=download) as mock:
+            future = self.data_server.prefetch_model("test/model/prefetch.model")
+            self.assertIs(self.data_server.prefetch_model("test/model/prefetch.model"), future)
+            started.wait(1)
+            self.assertFalse(future.done())
+            release.set()
+            # Waits for the prefetch instead of downloading again.
+            self.assertEqual(self.data_server.download_model("test/model/prefetch.model"),
+                             "rekcurd-model/test/model/prefetch.model")
+        self.assertEqual(future.result(), "rekcurd-model/test/model/prefetch.model")
+        mock.assert_called_once()
+        self.assertEqual(mock.call_args[0][0], "test/model/prefetch.model")
+        self.assertTrue(os.path.basename(mock.call_args[0][1]).startswith(".prefetch.model."))
+        self.assertEqual(os.listdir("rekcurd-model/test/model"), ["prefetch.model"])
+        with self.assertRaises(Exception):
+            self.data_server.prefetch_model("../model/prefetch.model")
+
     @patch_predictor()
     def test_get_eval_result_detail(self):
         self.assertEqual(self.data_server.get_eval_result_detail("test/eval/detail.pkl"), "rekcurd-eval/detail.pkl")
@@ -0,0 +1,43 @@
+import json
+import unittest
+from pathlib import Path
+
+from benchmarks import load_benchmarks
+from benchmarks.runner import Result, compare, get_benchmarks, run, time_operation
+
+
+BASELINE = Path(__file__).resolve().parent.parent / 'benchmarks' / 'baseline.json'
+
+
+class BenchmarksTest(unittest.TestCase):
+    """Run every benchmark once so that they don't rot between baseline updates."""
+
+    @classmethod
+    def setUpClass(cls):
+        load_benchmarks()
+
+    def test_quick(self):
+        benchmarks = get_benchmarks()
+        results = run(benchmarks, quick=True)
+        self.assertEqual([r.name for r in results], [b.name for b in benchmarks])
+
+    def test_baseline(self):
+        with open(str(BASELINE), 'r') as f:
+            baseline = json.load(f)
+        self.assertEqual(set(baseline['benchmarks']), {b.name for b in get_benchmarks()})
+
+    def test_get_benchmarks(self):
+        names = [b.name for b in get_benchmarks(r'^worker\.Process\.String_')]
+        self.assertEqual(len(names), 5)
+        self.assertIn('worker.Process.String_String', names)
+
+    def test_time_operation(self):
+        self.assertGreater(time_operation(lambda: None, repeat=2, min_time=0.001), 0.0)
+        self.assertEqual(time_operation(lambda: 0.5, measured=True, repeat=2), 0.5)
+
+    def test_compare(self):
+        baseline = {'benchmarks': {'a': {'sec': 1.0, 'normalized': 1.0}, 'b': {'sec': 1.0, 'normalized': 1.0}}}
+        results = [Result('a', 1.0, 1.2), Result('b', 2.0, 2.0), Result('c', 1.0, 1.0)]
+        rows = compare(results, baseline, threshold=1.5)
+        self.assertEqual([(r.name, ratio, regressed) for r, ratio, regressed in rows],
+                         [('a', 1.2, False), ('b', 2.0, True), ('c', None, False)])
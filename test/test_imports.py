@@ -0,0 +1,58 @@
+import json
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+
+import rekcurd
+from rekcurd import data_servers, logger
+
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+SDKS = ['boto', 'boto3', 'botocore', 'fluent', 'pythonjsonlogger']
+
+
+def imported_after(code: str) -> set:
+    """Top level packages imported in a fresh interpreter by running ``code``."""
+    code += '\nimport json, sys; print(json.dumps(sorted(sys.modules)))'
+    output = subprocess.run([sys.executable, '-c', code], cwd=str(ROOT_DIR), check=True,
+                            stdout=subprocess.PIPE).stdout
+    return set(json.loads(output.decode().splitlines()[-1]))
+
+
+class ImportTest(unittest.TestCase):
+    """Lock in the startup time: nothing heavy is imported until it is used."""
+
+    def assertNotImported(self, modules: set, names: list):
+        self.assertEqual(sorted(name for name in names if name in modules), [])
+
+    def test_import_rekcurd(self):
+        modules = imported_after('import rekcurd')
+        self.assertNotImported(modules, SDKS + ['grpc', 'yaml', 'rekcurd.core', 'rekcurd.protobuf'])
+
+    def test_local_worker(self):
+        modules = imported_after(
+            'from rekcurd import Rekcurd\n'
+            'from rekcurd.utils import RekcurdConfig\n'
+            'from rekcurd.data_servers import DataServer\n'
+            'config = RekcurdConfig()\n'
+            'config.set_configurations(model_mode="local", model_filepath="test/model/dummy.model")\n'
+            'DataServer(config)')
+        self.assertIn('rekcurd.data_servers.local_handler', modules)
+        self.assertNotImported(modules, SDKS + ['grpc', 'rekcurd.protobuf'])
+
+    def test_console_scripts(self):
+        modules = imported_after('from rekcurd.console_scripts import create_parser\ncreate_parser()')
+        self.assertNotImported(modules, SDKS + ['grpc', 'rekcurd.core', 'rekcurd.protobuf'])
+
+    def test_lazy_attributes(self):
+        from rekcurd.core.rekcurd_worker import Rekcurd
+        from rekcurd.data_servers.aws_s3_handler import AwsS3Handler
+        from rekcurd.logger.logger_fluent import FluentServiceLogger
+        self.assertIs(rekcurd.Rekcurd, Rekcurd)
+        self.assertIs(data_servers.AwsS3Handler, AwsS3Handler)
+        self.assertIs(logger.FluentServiceLogger, FluentServiceLogger)
+        self.assertIn('RekcurdWorkerServicer', dir(rekcurd))
+        self.assertIn('GcsHandler', dir(data_servers))
+        with self.assertRaises(AttributeError):
+            rekcurd.Unknown
@@ -13,6 +13,21 @@ class RekcurdConfigTest(unittest.TestCase):
         self.assertEqual(config.DEBUG_MODE, True)
         self.assertEqual(config.APPLICATION_NAME, "test")
         self.assertEqual(config.MODEL_MODE_ENUM, ModelModeEnum.LOCAL)
+        self.assertEqual(config.BATCHING_MAX_SIZE, 1)
+        self.assertEqual(config.STREAMING_MAX_INFLIGHT, 1)
+        self.assertEqual(config.CACHE_MAX_SIZE, 0)
+        self.assertEqual(config.NUMPY_MODE, False)
+        self.assertEqual(config.ADMISSION_MAX_INFLIGHT, 0)
+        self.assertEqual(config.COALESCING_ENABLED, False)
+        self.assertEqual(config.SWITCH_MODEL_BACKGROUND, False)
+        self.assertEqual(config.MODEL_REGISTRY_MAX_MODELS, 1)
+        self.assertIsNone(config.SHADOW_FILE_PATH)
+        self.assertEqual(config.GRPC_MAX_WORKERS, 1)
+        self.assertEqual(config.SHUTDOWN_GRACE_PERIOD_SEC, 20.0)
+        self.assertEqual(config.SHUTDOWN_PRE_STOP_DELAY_SEC, 0.0)
+        self.assertEqual(config.METRICS_PORT, 0)
+        self.assertIsNone(config.TRACING_FILE_PATH)
+        self.assertEqual(config.TRACING_SAMPLE_RATIO, 1.0)
 
     def test_load_from_env(self):
         os.environ["REKCURD_KUBERNETES_MODE"] = "True"
@@ -30,7 +45,18 @@ class RekcurdConfigTest(unittest.TestCase):
 
     def test_set_configurations(self):
         config = RekcurdConfig("./test/test-settings.yml")
-        config.set_configurations(debug_mode=False, application_name="test3", model_mode=ModelModeEnum.AWS_S3.value)
+        config.set_configurations(debug_mode=False, application_name="test3", model_mode=ModelModeEnum.AWS_S3.value,
+                                  batching_max_size=16, batching_max_wait_ms=0,
+                                  cache_max_size=128, cache_ttl_sec=60,
+                                  grpc_max_workers=8, grpc_max_receive_message_length=-1, grpc_compression="gzip")
         self.assertEqual(config.DEBUG_MODE, False)
+        self.assertEqual(config.BATCHING_MAX_SIZE, 16)
+        self.assertEqual(config.BATCHING_MAX_WAIT_MS, 0)
+        self.assertEqual(config.CACHE_MAX_SIZE, 128)
+        self.assertEqual(config.CACHE_TTL_SEC, 60)
+        self.assertEqual(config.GRPC_MAX_WORKERS, 8)
+        self.assertEqual(config.GRPC_MAX_RECEIVE_MESSAGE_LENGTH, -1)
+        self.assertEqual(config.GRPC_MAX_SEND_MESSAGE_LENGTH, 0)
+        self.assertEqual(config.GRPC_COMPRESSION, "gzip")
         self.assertEqual(config.APPLICATION_NAME, "test3")
         self.assertEqual(config.MODEL_MODE_ENUM, ModelModeEnum.AWS_S3)
@@ -0,0 +1,67 @@
+import unittest
+import urllib.request
+
+from rekcurd.utils import RekcurdMetrics
+
+
+class RekcurdMetricsTest(unittest.TestCase):
+    """Tests for RekcurdMetrics.
+    """
+
+    def setUp(self):
+        self.metrics = RekcurdMetrics()
+
+    def test_counter(self):
+        counter = self.metrics.counter('test_total', 'Test counter.', ['method'])
+        counter.labels('a').inc()
+        counter.labels('a').inc(2)
+        counter.labels('b"\n').inc()
+        self.assertIs(self.metrics.counter('test_total', 'Test counter.', ['method']), counter)
+        self.assertEqual(counter.labels('a').get(), 3)
+        text = self.metrics.render()
+        self.assertIn('# HELP test_total Test counter.\n# TYPE test_total counter\n', text)
+        self.assertIn('test_total{method="a"} 3.0\n', text)
+        self.assertIn('test_total{method="b\\"\\n"} 1.0\n', text)
+        with self.assertRaises(ValueError):
+            counter.labels('a', 'b')
+
+    def test_gauge(self):
+        gauge = self.metrics.gauge('test_inflight', 'Test gauge.')
+        gauge.inc(3)
+        gauge.dec()
+        self.assertIn('test_inflight 2.0\n', self.metrics.render())
+        gauge.set(0.5)
+        self.assertIn('test_inflight 0.5\n', self.metrics.render())
+
+    def test_histogram(self):
+        histogram = self.metrics.histogram('test_seconds', 'Test histogram.', buckets=[0.1, 1.0])
+        histogram.observe(0.05)
+        histogram.observe(0.5)
+        histogram.observe(5)
+        with histogram.time():
+            pass
+        text = self.metrics.render()
+        self.assertIn('test_seconds_bucket{le="0.1"} 2.0\n', text)
+        self.assertIn('test_seconds_bucket{le="1.0"} 3.0\n', text)
+        self.assertIn('test_seconds_bucket{le="+Inf"} 4.0\n', text)
+        self.assertIn('test_seconds_count 4.0\n', text)
+
+    def test_callback(self):
+        self.metrics.callback('test_callback_total', 'Test callback.', lambda: 1)
+        self.metrics.callback('test_callback_total', 'Test callback.', lambda: 2)
+        self.metrics.callback('test_broken', 'Test broken callback.', lambda: 1 / 0, 'gauge')
+        text = self.metrics.render()
+        self.assertIn('test_callback_total 2.0\n', text)
+        self.assertNotIn('test_broken', text)
+
+    def test_start_http_server(self):
+        self.metrics.counter('test_total', 'Test counter.').inc()
+        server = self.metrics.start_http_server(0, '127.0.0.1')
+        try:
+            url = 'http://127.0.0.1:{}/metrics'.format(server.server_address[1])
+            with urllib.request.urlopen(url) as response:
+                self.assertEqual(response.headers['Content-Type'], RekcurdMetrics.CONTENT_TYPE)
+                self.assertIn('test_total 1.0', response.read().decode())
+        finally:
+            server.shutdown()
+            server.server_close()
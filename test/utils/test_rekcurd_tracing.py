@@ -0,0 +1,118 @@
+import json
+import os
+import tempfile
+import unittest
+
+from rekcurd.utils.rekcurd_tracing import RekcurdTracer, get_current_trace, SPAN_KIND_SERVER, STATUS_CODE_ERROR
+
+
+TRACE_ID = '463ac35c9f6413ad48485a3953bb6124'
+SPAN_ID = 'a2fb4a1d1a96d312'
+
+
+class RekcurdTracerTest(unittest.TestCase):
+    """Tests for RekcurdTracer.
+    """
+
+    def setUp(self):
+        self.tracer = RekcurdTracer()
+        fd, self.filepath = tempfile.mkstemp(suffix='.jsonl')
+        os.close(fd)
+
+    def tearDown(self):
+        self.tracer.shutdown()
+        os.remove(self.filepath)
+
+    def read_spans(self):
+        with open(self.filepath) as f:
+            requests = [json.loads(line) for line in f]
+        return [span for request in requests
+                for resource_spans in request['resourceSpans']
+                for scope_spans in resource_spans['scopeSpans']
+                for span in scope_spans['spans']]
+
+    def test_trace(self):
+        self.tracer.start('test', filepath=self.filepath)
+        headers = {'x-b3-traceid': TRACE_ID, 'x-b3-spanid': SPAN_ID, 'x-request-id': 'req-1'}
+        with self.tracer.trace('Predict_String_String', headers) as trace:
+            self.assertIs(get_current_trace(), trace)
+            with trace.span('predict'):
+                pass
+            with self.assertRaises(ValueError):
+                with trace.span('service_log'):
+                    raise ValueError('broken')
+        self.assertIsNone(get_current_trace())
+        self.assertEqual(trace.get_log_fields(),
+                         {'trace_id': TRACE_ID, 'span_id': trace.span_id, 'request_id': 'req-1'})
+        self.assertTrue(self.tracer.exporter.flush(5))
+
+        spans = {span['name']: span for span in self.read_spans()}
+        self.assertEqual(set(spans), {'Predict_String_String', 'predict', 'service_log'})
+        root = spans['Predict_String_String']
+        self.assertEqual(root['traceId'], TRACE_ID)
+        self.assertEqual(root['parentSpanId'], SPAN_ID)
+        self.assertEqual(root['kind'], SPAN_KIND_SERVER)
+        self.assertNotIn('status', root)
+        for name in ['predict', 'service_log']:
+            self.assertEqual(spans[name]['traceId'], TRACE_ID)
+            self.assertEqual(spans[name]['parentSpanId'], root['spanId'])
+            self.assertLessEqual(int(root['startTimeUnixNano']), int(spans[name]['startTimeUnixNano']))
+            self.assertLessEqual(int(spans[name]['endTimeUnixNano']), int(root['endTimeUnixNano']))
+        self.assertEqual(spans['service_log']['status'], {'code': STATUS_CODE_ERROR, 'message': 'broken'})
+        self.assertEqual(self.tracer.exporter.exported, 3)
+
+    def test_new_trace(self):
+        self.tracer.start('test', filepath=self.filepath)
+        with self.tracer.trace('Predict_String_String', {'x-b3-traceid': 'invalid'}) as trace:
+            pass
+        self.assertEqual(len(trace.trace_id), 32)
+        self.assertNotEqual(trace.trace_id, 'invalid')
+        self.assertTrue(self.tracer.exporter.flush(5))
+        spans = self.read_spans()
+        self.assertEqual(len(spans), 1)
+        self.assertNotIn('parentSpanId', spans[0])
+
+    def test_64bit_trace_id(self):
+        self.tracer.start('test', filepath=self.filepath)
+        with self.tracer.trace('Predict', {'x-b3-traceid': TRACE_ID[16:], 'x-b3-spanid': SPAN_ID}) as trace:
+            pass
+        self.assertEqual(trace.trace_id, '0' * 16 + TRACE_ID[16:])
+
+    def test_sampling(self):
+        self.tracer.start('test', filepath=self.filepath, sample_ratio=0.0)
+        with self.tracer.trace('Predict', {'x-b3-traceid': TRACE_ID, 'x-b3-spanid': SPAN_ID}) as trace:
+            self.assertFalse(trace.sampled)
+            with trace.span('predict') as span:
+                self.assertIsNone(span)
+        self.assertEqual(trace.get_log_fields()['trace_id'], TRACE_ID)
+        with self.tracer.trace('Predict', {'x-b3-traceid': TRACE_ID, 'x-b3-sampled': '1'}) as trace:
+            self.assertTrue(trace.sampled)
+        self.tracer.sample_ratio = 1.0
+        with self.tracer.trace('Predict', {'x-b3-traceid': TRACE_ID, 'x-b3-sampled': '0'}) as trace:
+            self.assertFalse(trace.sampled)
+        self.assertTrue(self.tracer.exporter.flush(5))
+        self.assertEqual(len(self.read_spans()), 1)
+
+    def test_disabled(self):
+        self.assertFalse(self.tracer.enabled)
+        with self.tracer.trace('Predict', {'x-b3-traceid': TRACE_ID, 'x-b3-spanid': SPAN_ID}) as trace:
+            self.assertFalse(trace.sampled)
+        self.assertEqual(trace.get_log_fields(), {'trace_id': TRACE_ID, 'span_id': SPAN_ID})
+        with self.tracer.trace('Predict', {}) as trace:
+            pass
+        self.assertEqual(trace.get_log_fields(), {})
+
+    def test_error(self):
+        self.tracer.start('test', filepath=self.filepath)
+        with self.assertRaises(Exception):
+            with self.tracer.trace('Predict', {}):
+                raise Exception('aborted')
+        self.assertTrue(self.tracer.exporter.flush(5))
+        self.assertEqual(self.read_spans()[0]['status']['message'], 'aborted')
+
+    def test_failed_sink(self):
+        self.tracer.start('test', filepath=os.path.join(self.filepath, 'not_a_directory'))
+        with self.tracer.trace('Predict', {}):
+            pass
+        self.assertTrue(self.tracer.exporter.flush(5))
+        self.assertEqual(self.tracer.exporter.failed, 1)